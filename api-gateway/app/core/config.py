@@ -13,6 +13,14 @@ class Settings(BaseSettings):
     # Health check settings
     HEALTH_CHECK_TIMEOUT: int = 5  # seconds
     WARMUP_INTERVAL: int = 180  # 3 minutes in seconds
+    HEALTH_REFRESH_INTERVAL: int = 30  # background probe interval in seconds
+    HEALTH_SNAPSHOT_TTL: int = 90  # max age of a cached health snapshot in seconds
+    
+    # Proxy connection pool settings (one pool per upstream service)
+    PROXY_TIMEOUT: float = 30.0  # seconds
+    PROXY_MAX_CONNECTIONS: int = 100
+    PROXY_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    PROXY_KEEPALIVE_EXPIRY: float = 30.0  # seconds
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,128 @@
+# app/core/http_metrics.py
+# Vendored from shared/http_metrics.py: edit it there and run `python shared/sync.py`
+"""
+Per-route HTTP metrics and the Prometheus exposition endpoint, shared by the
+gateway, auth and content services. Service-specific metrics live in each
+service's app/core/metrics.py.
+"""
+import os
+import time
+from typing import Dict, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+from starlette.responses import Response
+
+KNOWN_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"}
+
+REQUESTS = Counter("http_requests_total", "HTTP requests handled", ["method", "route", "status"])
+REQUEST_ERRORS = Counter("http_request_errors_total", "HTTP requests answered with a 5xx or an exception", ["method", "route"])
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Time spent handling HTTP requests", ["method", "route"])
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "HTTP response body size",
+    ["method", "route"],
+    buckets=(100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000),
+)
+IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests currently being handled", multiprocess_mode="livesum")
+
+
+def route_label(scope) -> str:
+    """Route template (not the raw path) so label cardinality stays bounded"""
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path", "unmatched")
+    endpoint = scope.get("endpoint")
+    if endpoint is not None:
+        return getattr(endpoint, "__name__", "unmatched")
+    return "unmatched"
+
+
+class _RouteMetrics:
+    """Label children bound once per (method, route)"""
+
+    __slots__ = ("method", "route", "latency", "size", "errors", "by_status")
+
+    def __init__(self, method: str, route: str):
+        self.method = method
+        self.route = route
+        self.latency = REQUEST_LATENCY.labels(method, route)
+        self.size = RESPONSE_SIZE.labels(method, route)
+        self.errors = REQUEST_ERRORS.labels(method, route)
+        self.by_status: Dict[int, Counter] = {}
+
+    def requests(self, status_code: int):
+        child = self.by_status.get(status_code)
+        if child is None:
+            child = self.by_status[status_code] = REQUESTS.labels(self.method, self.route, str(status_code))
+        return child
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request count, latency, response size,
+    errors and in-flight requests per route.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: Dict[Tuple[str, str], _RouteMetrics] = {}
+
+    def _route_metrics(self, method: str, route: str) -> _RouteMetrics:
+        key = (method, route)
+        metrics = self._routes.get(key)
+        if metrics is None:
+            metrics = self._routes[key] = _RouteMetrics(method, route)
+        return metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        response_size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            status_code = 500
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_PROGRESS.dec()
+            method = scope["method"] if scope["method"] in KNOWN_METHODS else "OTHER"
+            metrics = self._route_metrics(method, route_label(scope))
+            metrics.latency.observe(elapsed)
+            metrics.size.observe(response_size)
+            metrics.requests(status_code).inc()
+            if status_code >= 500:
+                metrics.errors.inc()
+
+
+def metrics_response() -> Response:
+    """Prometheus exposition, aggregated across workers when PROMETHEUS_MULTIPROC_DIR is set"""
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,9 @@
+# app/core/metrics.py
+from prometheus_client import Counter, Histogram
+
+# Request metrics and the /metrics endpoint are shared with the other services
+from app.core.http_metrics import MetricsMiddleware, metrics_response  # noqa: F401
+
+# Proxied upstream calls (time until upstream response headers arrive)
+UPSTREAM_LATENCY = Histogram("gateway_upstream_duration_seconds", "Latency of proxied upstream requests", ["upstream"])
+UPSTREAM_ERRORS = Counter("gateway_upstream_errors_total", "Proxied upstream requests that failed", ["upstream", "reason"])
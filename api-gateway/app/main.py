@@ -1,24 +1,181 @@
 from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from contextlib import asynccontextmanager
 import httpx
 import time
 import datetime
 import asyncio
-from typing import Dict, Any
+import logging
+from typing import Dict, Any, Optional
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, metrics_response, UPSTREAM_LATENCY, UPSTREAM_ERRORS
 
-app = FastAPI(
-    title="E-Learning API Gateway",
-    description="Central gateway for microservices communication",
-    version="1.0.0"
-)
+logger = logging.getLogger(__name__)
 
 # Service URLs
 SERVICES = {
-    "auth": "http://localhost:8000",
-    "content": "http://localhost:8080",
+    "auth": settings.AUTH_SERVICE_URL,
+    "content": settings.CONTENT_SERVICE_URL,
     # Add more services as needed
 }
 
+# Hop-by-hop headers must not be forwarded by a proxy (RFC 7230 section 6.1)
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailers",
+    "transfer-encoding",
+    "upgrade",
+}
+
+# One pooled client per upstream, created in the app lifespan
+upstream_clients: Dict[str, httpx.AsyncClient] = {}
+
+# Long-lived client for health probes, kept apart so a saturated proxy pool
+# doesn't make healthy services look unreachable
+health_client: Optional[httpx.AsyncClient] = None
+
+# Metric children bound once per upstream
+upstream_latency = {name: UPSTREAM_LATENCY.labels(name) for name in SERVICES}
+upstream_timeouts = {name: UPSTREAM_ERRORS.labels(name, "timeout") for name in SERVICES}
+upstream_failures = {name: UPSTREAM_ERRORS.labels(name, "error") for name in SERVICES}
+
+
+# Latest /health/services result, kept fresh by a background task
+health_snapshot: Dict[str, Any] = {}
+
+# Probe round in flight, shared by every caller that needs a fresh snapshot
+health_refresh_task: Optional[asyncio.Task] = None
+
+
+async def probe_service(client: httpx.AsyncClient, service_name: str, base_url: str) -> Dict[str, Any]:
+    """Probe a single service's /health endpoint within its own deadline"""
+    service_start = time.monotonic()
+    try:
+        response = await asyncio.wait_for(
+            client.get(f"{base_url}/health"),
+            timeout=settings.HEALTH_CHECK_TIMEOUT
+        )
+        response_time = round((time.monotonic() - service_start) * 1000, 2)
+        
+        if response.status_code == 200:
+            return {
+                "status": "healthy",
+                "response_time_ms": response_time,
+                "url": base_url
+            }
+        return {
+            "status": "unhealthy",
+            "response_time_ms": response_time,
+            "url": base_url,
+            "error": f"HTTP {response.status_code}"
+        }
+    except asyncio.TimeoutError:
+        return {
+            "status": "unreachable",
+            "response_time_ms": -1,
+            "url": base_url,
+            "error": f"Timed out after {settings.HEALTH_CHECK_TIMEOUT}s"
+        }
+    except Exception as e:
+        return {
+            "status": "unreachable",
+            "response_time_ms": -1,
+            "url": base_url,
+            "error": str(e)
+        }
+
+
+async def refresh_health_snapshot() -> Dict[str, Any]:
+    """Probe every service concurrently and store the result as the current snapshot"""
+    start_time = time.monotonic()
+    
+    results = await asyncio.gather(*(
+        probe_service(health_client, service_name, base_url)
+        for service_name, base_url in SERVICES.items()
+    ))
+    service_statuses = dict(zip(SERVICES.keys(), results))
+    
+    # Determine overall status
+    all_healthy = all(status["status"] == "healthy" for status in service_statuses.values())
+    overall_status = "healthy" if all_healthy else "degraded"
+    
+    result = {
+        "status": overall_status,
+        "service": "api-gateway",
+        "timestamp": datetime.datetime.utcnow().isoformat(),
+        "services": service_statuses,
+        "response_time_ms": round((time.monotonic() - start_time) * 1000, 2)
+    }
+    health_snapshot["result"] = result
+    health_snapshot["updated_at"] = time.monotonic()
+    return result
+
+
+async def get_fresh_health_snapshot() -> Dict[str, Any]:
+    """
+    Single-flight refresh: join the probe round already in flight instead of
+    starting another. Shielded so a disconnecting caller can't cancel it for
+    the others.
+    """
+    global health_refresh_task
+    if health_refresh_task is None or health_refresh_task.done():
+        health_refresh_task = asyncio.create_task(refresh_health_snapshot())
+    return await asyncio.shield(health_refresh_task)
+
+
+async def health_refresher():
+    """Background loop keeping the health snapshot warm"""
+    while True:
+        try:
+            await get_fresh_health_snapshot()
+        except Exception:
+            logger.exception("Health snapshot refresh failed")
+        await asyncio.sleep(settings.HEALTH_REFRESH_INTERVAL)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global health_client
+    limits = httpx.Limits(
+        max_connections=settings.PROXY_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.PROXY_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.PROXY_KEEPALIVE_EXPIRY,
+    )
+    for service_name, base_url in SERVICES.items():
+        upstream_clients[service_name] = httpx.AsyncClient(
+            base_url=base_url,
+            limits=limits,
+            timeout=httpx.Timeout(settings.PROXY_TIMEOUT),
+        )
+    health_client = httpx.AsyncClient(timeout=settings.HEALTH_CHECK_TIMEOUT)
+    refresher = asyncio.create_task(health_refresher())
+    try:
+        yield
+    finally:
+        refresher.cancel()
+        if health_refresh_task is not None:
+            health_refresh_task.cancel()
+        for client in upstream_clients.values():
+            await client.aclose()
+        upstream_clients.clear()
+        await health_client.aclose()
+        health_client = None
+
+
+app = FastAPI(
+    title="E-Learning API Gateway",
+    description="Central gateway for microservices communication",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+app.add_middleware(MetricsMiddleware)
+
 # =================== HEALTH CHECK ENDPOINTS ===================
 
 @app.get("/health")
@@ -35,56 +192,19 @@ async def gateway_health_check():
     }
 
 @app.get("/health/services")
-async def services_health_check():
+async def services_health_check(fresh: bool = False):
     """
     Check health of all microservices.
-    Use this to ensure all services are warm and responsive.
+    Answers from the in-memory snapshot kept by the background refresher;
+    pass ?fresh=1 (or let the snapshot expire) to force a live probe.
     """
-    start_time = time.time()
-    service_statuses = {}
-    
-    async with httpx.AsyncClient(timeout=5.0) as client:
-        # Check each service health
-        for service_name, base_url in SERVICES.items():
-            try:
-                service_start = time.time()
-                response = await client.get(f"{base_url}/health")
-                response_time = round((time.time() - service_start) * 1000, 2)
-                
-                if response.status_code == 200:
-                    service_statuses[service_name] = {
-                        "status": "healthy",
-                        "response_time_ms": response_time,
-                        "url": base_url
-                    }
-                else:
-                    service_statuses[service_name] = {
-                        "status": "unhealthy",
-                        "response_time_ms": response_time,
-                        "url": base_url,
-                        "error": f"HTTP {response.status_code}"
-                    }
-            except Exception as e:
-                service_statuses[service_name] = {
-                    "status": "unreachable",
-                    "response_time_ms": -1,
-                    "url": base_url,
-                    "error": str(e)
-                }
-    
-    # Determine overall status
-    all_healthy = all(status["status"] == "healthy" for status in service_statuses.values())
-    overall_status = "healthy" if all_healthy else "degraded"
+    snapshot = health_snapshot.get("result")
+    is_stale = time.monotonic() - health_snapshot.get("updated_at", 0.0) > settings.HEALTH_SNAPSHOT_TTL
     
-    total_response_time = round((time.time() - start_time) * 1000, 2)
+    if fresh or snapshot is None or is_stale:
+        snapshot = await get_fresh_health_snapshot()
     
-    return {
-        "status": overall_status,
-        "service": "api-gateway",
-        "timestamp": datetime.datetime.utcnow().isoformat(),
-        "services": service_statuses,
-        "response_time_ms": total_response_time
-    }
+    return snapshot
 
 @app.get("/warmup")
 async def warmup_services():
@@ -93,7 +213,14 @@ async def warmup_services():
     Use this to prevent cold starts across all microservices.
     Should be called every 2-3 minutes by frontend or monitoring.
     """
-    return await services_health_check()
+    return await services_health_check(fresh=True)
+
+# =================== METRICS ENDPOINTS ===================
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint: per-route traffic and per-upstream latency"""
+    return metrics_response()
 
 # =================== SERVICE PROXY ENDPOINTS ===================
 
@@ -107,40 +234,49 @@ async def content_proxy(request: Request, path: str):
     """Proxy requests to content service"""
     return await proxy_request(request, "content", path)
 
+def _filter_headers(headers) -> Dict[str, str]:
+    """Drop hop-by-hop headers (and host) before forwarding in either direction"""
+    return {
+        key: value
+        for key, value in headers.items()
+        if key.lower() not in HOP_BY_HOP_HEADERS and key.lower() != "host"
+    }
+
 async def proxy_request(request: Request, service: str, path: str):
-    """Generic proxy function for forwarding requests to microservices"""
+    """
+    Generic proxy function for forwarding requests to microservices.
+    The request body is streamed to the upstream and the upstream response
+    (status, headers and body) is streamed back unchanged.
+    """
     if service not in SERVICES:
         raise HTTPException(status_code=404, detail=f"Service {service} not found")
     
-    service_url = SERVICES[service]
-    url = f"{service_url}/{path}"
+    client = upstream_clients[service]
+    upstream_request = client.build_request(
+        method=request.method,
+        url=f"/{path}",
+        headers=_filter_headers(request.headers),
+        content=request.stream(),
+        params=request.query_params
+    )
     
-    # Get request body if exists
-    body = await request.body()
+    start = time.perf_counter()
+    try:
+        response = await client.send(upstream_request, stream=True)
+    except httpx.TimeoutException:
+        upstream_timeouts[service].inc()
+        raise HTTPException(status_code=504, detail="Service timeout")
+    except Exception as e:
+        upstream_failures[service].inc()
+        raise HTTPException(status_code=502, detail=f"Service error: {str(e)}")
+    upstream_latency[service].observe(time.perf_counter() - start)
     
-    # Forward headers (excluding host)
-    headers = dict(request.headers)
-    headers.pop("host", None)
-    
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        try:
-            response = await client.request(
-                method=request.method,
-                url=url,
-                headers=headers,
-                content=body,
-                params=request.query_params
-            )
-            
-            return {
-                "data": response.json() if response.headers.get("content-type", "").startswith("application/json") else response.text,
-                "status_code": response.status_code,
-                "headers": dict(response.headers)
-            }
-        except httpx.TimeoutException:
-            raise HTTPException(status_code=504, detail="Service timeout")
-        except Exception as e:
-            raise HTTPException(status_code=502, detail=f"Service error: {str(e)}")
+    return StreamingResponse(
+        response.aiter_raw(),
+        status_code=response.status_code,
+        headers=_filter_headers(response.headers),
+        background=BackgroundTask(response.aclose)
+    )
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,169 @@
+"""
+Proxy benchmark: pooled streaming proxy vs. the previous client-per-request proxy.
+
+Starts a local stub upstream and two gateways on loopback ports:
+- "pooled": the real app.main gateway (shared keep-alive client, streamed body)
+- "legacy": the previous proxy_request (new AsyncClient per call, body
+  buffered, upstream response re-wrapped in a JSON dict), reproduced below
+
+then drives the same request mix through each and prints p50/p99 latency
+and requests per second.
+
+    cd api-gateway
+    pip install uvicorn
+    python benchmarks/bench_proxy.py --requests 2000 --concurrency 50 --payload-kb 64
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+UPSTREAM_PORT = free_port()
+# The gateway reads its upstream URLs from the environment at import time
+os.environ["AUTH_SERVICE_URL"] = f"http://127.0.0.1:{UPSTREAM_PORT}"
+os.environ["CONTENT_SERVICE_URL"] = f"http://127.0.0.1:{UPSTREAM_PORT}"
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from fastapi import FastAPI, HTTPException, Request  # noqa: E402
+from fastapi.responses import Response  # noqa: E402
+
+from app.main import app as pooled_app  # noqa: E402
+
+
+def build_upstream(payload_kb: int) -> FastAPI:
+    """Stub service: a JSON document of the requested size, and an echo for uploads"""
+    upstream = FastAPI()
+    body = b'{"items": "' + b"x" * (payload_kb * 1024) + b'"}'
+
+    @upstream.get("/api/v1/items")
+    async def items():
+        return Response(body, media_type="application/json")
+
+    @upstream.post("/api/v1/upload")
+    async def upload(request: Request):
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+        return {"received": size}
+
+    return upstream
+
+
+def build_legacy_gateway(upstream_url: str) -> FastAPI:
+    """The gateway's proxy as it was before the pooled streaming proxy"""
+    legacy = FastAPI()
+
+    @legacy.api_route("/auth/{path:path}", methods=["GET", "POST"])
+    async def proxy(request: Request, path: str):
+        body = await request.body()
+        headers = dict(request.headers)
+        headers.pop("host", None)
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            try:
+                response = await client.request(
+                    method=request.method,
+                    url=f"{upstream_url}/{path}",
+                    headers=headers,
+                    content=body,
+                    params=request.query_params
+                )
+                return {
+                    "data": response.json() if response.headers.get("content-type", "").startswith("application/json") else response.text,
+                    "status_code": response.status_code,
+                    "headers": dict(response.headers)
+                }
+            except httpx.TimeoutException:
+                raise HTTPException(status_code=504, detail="Service timeout")
+
+    return legacy
+
+
+async def serve(app: FastAPI, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"))
+    asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    return server
+
+
+async def drive(base_url: str, total: int, concurrency: int, upload_kb: int):
+    """Fire `total` requests (4 GETs : 1 upload) with `concurrency` in flight"""
+    upload_body = b"p" * (upload_kb * 1024)
+    latencies = []
+    errors = 0
+    next_index = 0
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0,
+                                 limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def worker():
+            nonlocal next_index, errors
+            while next_index < total:
+                index = next_index
+                next_index += 1
+                start = time.perf_counter()
+                if index % 5 == 4:
+                    response = await client.post("/auth/api/v1/upload", content=upload_body)
+                else:
+                    response = await client.get("/auth/api/v1/items")
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "rps": total / elapsed,
+        "errors": errors,
+    }
+
+
+async def main(args):
+    upstream = await serve(build_upstream(args.payload_kb), UPSTREAM_PORT)
+    gateways = {
+        "legacy": (build_legacy_gateway(f"http://127.0.0.1:{UPSTREAM_PORT}"), free_port()),
+        "pooled": (pooled_app, free_port()),
+    }
+    servers = [upstream]
+    for app, port in gateways.values():
+        servers.append(await serve(app, port))
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, "
+          f"{args.payload_kb} KB responses, {args.upload_kb} KB uploads (1 in 5)")
+    print(f"{'gateway':<8} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>9} {'errors':>7}")
+    for name, (_, port) in gateways.items():
+        # Warm-up round so both sides start with imports and pools initialized
+        await drive(f"http://127.0.0.1:{port}", args.concurrency * 2, args.concurrency, args.upload_kb)
+        result = await drive(f"http://127.0.0.1:{port}", args.requests, args.concurrency, args.upload_kb)
+        print(f"{name:<8} {result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['rps']:>9.0f} {result['errors']:>7}")
+
+    for server in servers:
+        server.should_exit = True
+    await asyncio.sleep(0.2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--payload-kb", type=int, default=64)
+    parser.add_argument("--upload-kb", type=int, default=512)
+    asyncio.run(main(parser.parse_args()))
@@ -1,23 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException,status
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordBearer
-from app.schemas.user import UserCreate, UserLogin, UserRead, OAuthData, RefreshTokenRequest, TokenResponse
-from app.services.auth import hash_password, verify_password, create_access_token,decode_access_token, create_access_token_for_user, create_token_pair, decode_refresh_token
+from app.schemas.user import UserCreate, UserLogin, UserRead, OAuthData, RefreshTokenRequest, TokenResponse, LogoutRequest
+from app.services.auth import hash_password_async, verify_password_async, create_access_token,decode_access_token, create_access_token_for_user, create_token_pair, decode_refresh_token
 from app.crud.user import get_user_by_email, create_user, get_or_create_fournisseur,get_user_by_id,get_role_by_name
 from db.session import get_db
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
+from app.services.google_oauth import google_token_verifier
 from app.models.utilisateur import Utilisateur
 from app.services.auth import create_access_token
 from app.services.audit import log_action
+from app.services.user_cache import get_user_profile, invalidate_user
 from pydantic import BaseModel
 from app.core.config import settings
 from app.crud.verification import get_verification_by_token
 from app.crud.verification import  get_verification_by_token, save_verification_token
 import uuid
-from app.services.email import send_verification_email
-from app.dependencies.auth import get_current_user, require_role, require_any_role
-from typing import Dict, Any
+from app.services.email import queue_verification_email, email_dispatcher
+from app.dependencies.auth import get_current_user, get_current_user_for_refresh, require_role, require_any_role, require_service_token
+from app.services.revocation import revocation_filter, revoke_token, consume_refresh_token, load_revocations, confirm_revocation
+from typing import Dict, Any, Optional
 import time
 import datetime
 
@@ -92,16 +93,17 @@ async def user_health_check(current_user: Dict[str, Any] = Depends(get_current_u
 @router.get("/users/me")
 async def read_users_me(current_user: Dict[str, Any] = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     """Get current user information from JWT token"""
-    # We can get most info directly from JWT, but still need DB for some fields like is_verified
-    user = await get_user_by_id(db, current_user["user_id"])
-    if not user:
+    # Identity and roles come from the verified token; only the DB-only fields
+    # are looked up, through the profile cache
+    profile = await get_user_profile(db, current_user["user_id"])
+    if not profile:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
     return {
         "id": current_user["user_id"],
         "email": current_user["email"],
-        "is_verified": user.is_verified,
-        "full_name": user.nom_utilisateur,
+        "is_verified": profile["is_verified"],
+        "full_name": profile["nom_utilisateur"],
         "roles": current_user["roles"]
     }
 
@@ -151,6 +153,15 @@ async def refresh_access_token(refresh_request: RefreshTokenRequest, db: AsyncSe
             roles=role_names
         )
         
+        # Rotate: a refresh token is single-use, so replaying a rotated (or
+        # logged-out) one is rejected. Checked in the database, not the filter.
+        if not await consume_refresh_token(db, payload.get("jti"), payload["exp"], utilisateur_id=user.id):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Refresh token has been revoked"
+            )
+        await db.commit()
+        
         await log_action(
             db=db,
             utilisateur_id=user.id,
@@ -166,8 +177,42 @@ async def refresh_access_token(refresh_request: RefreshTokenRequest, db: AsyncSe
             detail="Invalid or expired refresh token"
         )
 
+@router.post("/logout")
+async def logout(
+    logout_request: Optional[LogoutRequest] = None,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Revoke the current access token and, if given, the session's refresh token"""
+    user_id = int(current_user["user_id"])
+    access_jti = await revoke_token(
+        db,
+        current_user.get("jti"),
+        current_user["exp"],
+        utilisateur_id=user_id
+    )
+    
+    if logout_request and logout_request.refresh_token:
+        refresh_payload = decode_refresh_token(logout_request.refresh_token)
+        if refresh_payload and str(refresh_payload.get("sub")) == str(user_id):
+            await revoke_token(db, refresh_payload.get("jti"), refresh_payload["exp"], token_type="refresh", utilisateur_id=user_id)
+    
+    await db.commit()
+    # Only once the revocation is durable, so workers never disagree with the table
+    if access_jti:
+        revocation_filter.add(access_jti)
+    
+    await log_action(
+        db=db,
+        utilisateur_id=user_id,
+        action="logout",
+        details="Tokens revoked on logout"
+    )
+    
+    return {"message": "Logged out successfully"}
+
 @router.post("/refresh")
-async def refresh_token(current_user: Dict[str, Any] = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+async def refresh_token(current_user: Dict[str, Any] = Depends(get_current_user_for_refresh), db: AsyncSession = Depends(get_db)):
     """
     Refresh token and upgrade to new format if needed.
     Critical endpoint to prevent users from being logged out.
@@ -213,7 +258,7 @@ async def refresh_token(current_user: Dict[str, Any] = Depends(get_current_user)
     }
 
 @router.post("/token/refresh")
-async def refresh_token_legacy(current_user: Dict[str, Any] = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+async def refresh_token_legacy(current_user: Dict[str, Any] = Depends(get_current_user_for_refresh), db: AsyncSession = Depends(get_db)):
     """
     Legacy refresh token endpoint - kept for backward compatibility.
     Use /refresh instead.
@@ -237,7 +282,7 @@ async def force_new_token(credentials: UserLogin, db: AsyncSession = Depends(get
     """Force create new format token - for testing"""
     user = await get_user_by_email(db, credentials.email)
 
-    if not user or not verify_password(credentials.mot_de_passe, user.mot_de_passe):
+    if not user or not await verify_password_async(credentials.mot_de_passe, user.mot_de_passe):
         raise HTTPException(status_code=400, detail="Invalid credentials")
 
     # Force roles even if empty
@@ -313,7 +358,7 @@ async def debug_login(credentials: UserLogin, db: AsyncSession = Depends(get_db)
     if not user:
         raise HTTPException(status_code=400, detail="User not found")
     
-    if not verify_password(credentials.mot_de_passe, user.mot_de_passe):
+    if not await verify_password_async(credentials.mot_de_passe, user.mot_de_passe):
         raise HTTPException(status_code=400, detail="Invalid password")
 
     # Debug: Check user roles
@@ -354,6 +399,7 @@ async def verify_email(token: str, db: AsyncSession = Depends(get_db)):
     db.add(user)
     await db.delete(verification) 
     await db.commit()
+    invalidate_user(user.id)
     await log_action(
         db=db,
         utilisateur_id=user.id,
@@ -369,7 +415,7 @@ async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_pw = hash_password(user.mot_de_passe)
+    hashed_pw = await hash_password_async(user.mot_de_passe)
     new_user = await create_user(db, user, hashed_pw)
 
     # 🔐 Crée un token unique de vérification
@@ -382,7 +428,12 @@ async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     FRONTEND_URL = "https://frontend-five-pi-35.vercel.app"
 
     verification_link = f"{FRONTEND_URL}/verify-email?token={verification_token}"
-    await send_verification_email(new_user.email, verification_link)
+    queue_verification_email(db, new_user.email, verification_link)
+
+    # User, verification token and outgoing email land in one transaction;
+    # the dispatcher sends the email in the background
+    await db.commit()
+    email_dispatcher.notify()
 
     await log_action(
         db=db,
@@ -397,7 +448,7 @@ async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
 async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     user = await get_user_by_email(db, credentials.email)
 
-    if not user or not verify_password(credentials.mot_de_passe, user.mot_de_passe):
+    if not user or not await verify_password_async(credentials.mot_de_passe, user.mot_de_passe):
         raise HTTPException(status_code=400, detail="Invalid credentials")
 
     await log_action(
@@ -431,9 +482,7 @@ from app.services.audit import log_action  # à adapter selon ton arborescence
 async def oauth_login(oauth_data: OAuthToken, db: AsyncSession = Depends(get_db)):
     try:
         # validation et extraction
-        idinfo = id_token.verify_oauth2_token(
-            oauth_data.token, google_requests.Request(), settings.GOOGLE_CLIENT_ID
-        )
+        idinfo = await google_token_verifier.verify(oauth_data.token)
         email = idinfo.get("email")
         name = idinfo.get("name", "GoogleUser")
 
@@ -473,6 +522,7 @@ async def oauth_login(oauth_data: OAuthToken, db: AsyncSession = Depends(get_db)
             db.add(user)
             await db.commit()
             await db.refresh(user)
+            invalidate_user(user.id)
 
         # 🔥 journaliser ici
         await log_action(
@@ -504,21 +554,20 @@ async def list_users(
     page: int = 1,
     per_page: int = 20,
     role: str = None,
+    cursor: Optional[int] = None,
     current_user: Dict[str, Any] = Depends(require_role("admin")),
     db: AsyncSession = Depends(get_db)
 ):
-    """List all users with pagination and optional role filtering"""
-    skip = (page - 1) * per_page
-    
+    """
+    List all users with pagination and optional role filtering.
+    Pass ?cursor=0 (then the returned next_cursor) for keyset pagination,
+    which skips the OFFSET scan and the total count.
+    """
     # Import here to avoid circular imports
-    from app.crud.user import get_users, get_users_count
-    
-    users = await get_users(db, skip=skip, limit=per_page, role_filter=role)
-    total = await get_users_count(db, role_filter=role)
+    from app.crud.user import get_users_page, get_users_after
     
-    users_data = []
-    for user in users:
-        user_dict = {
+    def serialize(user):
+        return {
             "id": user.id,
             "nom_utilisateur": user.nom_utilisateur,
             "email": user.email,
@@ -526,10 +575,22 @@ async def list_users(
             "is_verified": user.is_verified,
             "roles": [{"id": r.id, "nom": r.nom} for r in user.roles] if user.roles else []
         }
-        users_data.append(user_dict)
+    
+    if cursor is not None:
+        users = await get_users_after(db, after_id=cursor, limit=per_page + 1, role_filter=role)
+        has_more = len(users) > per_page
+        users = users[:per_page]
+        return {
+            "users": [serialize(user) for user in users],
+            "per_page": per_page,
+            "next_cursor": users[-1].id if has_more else None
+        }
+    
+    skip = (page - 1) * per_page
+    users, total = await get_users_page(db, skip=skip, limit=per_page, role_filter=role)
     
     return {
-        "users": users_data,
+        "users": [serialize(user) for user in users],
         "total": total,
         "page": page,
         "per_page": per_page,
@@ -564,7 +625,7 @@ async def create_user_by_admin(
 ):
     """Create a new user (admin only)"""
     from app.crud.user import create_user_by_admin
-    from app.services.auth import hash_password
+    from app.services.auth import hash_password_async
     
     # Check if user exists
     existing_user = await get_user_by_email(db, user_data["email"])
@@ -572,7 +633,7 @@ async def create_user_by_admin(
         raise HTTPException(status_code=400, detail="User with this email already exists")
     
     # Hash password
-    hashed_password = hash_password(user_data["mot_de_passe"])
+    hashed_password = await hash_password_async(user_data["mot_de_passe"])
     
     # Extract roles
     role_names = user_data.get("roles", [])
@@ -757,6 +818,56 @@ async def unblock_user(
     
     return {"message": "User unblocked successfully", "user_id": user.id}
 
+@router.get("/admin/audit", response_model=Dict[str, Any])
+async def list_audit_entries(
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    cursor: Optional[str] = None,
+    per_page: int = 50,
+    current_user: Dict[str, Any] = Depends(require_role("admin")),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Audit log, newest first. Pass the returned next_cursor as ?cursor= to get
+    the following page; since/until bound the months scanned.
+    """
+    from app.crud.audit import get_audit_entries, encode_audit_cursor, decode_audit_cursor
+    
+    per_page = max(1, min(per_page, 200))
+    try:
+        before = decode_audit_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    entries = await get_audit_entries(
+        db,
+        utilisateur_id=user_id,
+        action=action,
+        since=since,
+        until=until,
+        before=before,
+        limit=per_page + 1
+    )
+    has_more = len(entries) > per_page
+    entries = entries[:per_page]
+    
+    return {
+        "entries": [
+            {
+                "id": entry.id,
+                "utilisateur_id": entry.utilisateur_id,
+                "action": entry.action,
+                "horodatage": entry.horodatage,
+                "details": entry.details
+            }
+            for entry in entries
+        ],
+        "per_page": per_page,
+        "next_cursor": encode_audit_cursor(entries[-1]) if has_more else None
+    }
+
 # Additional admin endpoints for dashboard stats
 @router.get("/admin/stats/users")
 async def get_user_stats(
@@ -764,16 +875,35 @@ async def get_user_stats(
     db: AsyncSession = Depends(get_db)
 ):
     """Get user statistics for dashboard"""
-    from app.crud.user import get_users_count
+    from app.crud.user import get_users_count, get_users_count_by_role
     
     total_users = await get_users_count(db)
-    students_count = await get_users_count(db, role_filter="student")
-    teachers_count = await get_users_count(db, role_filter="teacher")
-    admins_count = await get_users_count(db, role_filter="admin")
+    role_counts = await get_users_count_by_role(db)
     
     return {
         "total_users": total_users,
-        "students": students_count,
-        "teachers": teachers_count,
-        "admins": admins_count
+        "students": role_counts.get("student", 0),
+        "teachers": role_counts.get("teacher", 0),
+        "admins": role_counts.get("admin", 0)
     }
+
+# =================== SERVICE-TO-SERVICE ENDPOINTS ===================
+
+@router.get("/revocations")
+async def list_revocations(
+    since: int = 0,
+    limit: int = 1000,
+    service: Dict[str, Any] = Depends(require_service_token)
+):
+    """Unexpired access-token revocations with id > since, for other services' revocation filters"""
+    limit = max(1, min(limit, 5000))
+    rows, has_more = await load_revocations(since, limit)
+    return {
+        "revocations": [{"id": revocation_id, "jti": jti} for revocation_id, jti in rows],
+        "has_more": has_more
+    }
+
+@router.get("/revocations/{jti}")
+async def check_revocation(jti: str, service: Dict[str, Any] = Depends(require_service_token)):
+    """Exact lookup for a jti that hit another service's Bloom filter"""
+    return {"jti": jti, "revoked": await confirm_revocation(jti)}
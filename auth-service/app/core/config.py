@@ -8,11 +8,49 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30  # Short-lived access token
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7     # Long-lived refresh token (7 days)
     
+    # Password hashing pool (bcrypt runs off the event loop)
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 32  # queued + running hashes before answering 503
+    
+    # Audit log writer (batched, off the request path)
+    AUDIT_QUEUE_MAX_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 200
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    
+    # /users/me profile cache (per process, invalidated on user updates)
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10000
+    
+    # Roles / auth providers read on every login
+    REFERENCE_CACHE_TTL_SECONDS: int = 300
+    
+    # Token revocation filter (Bloom filter + exact recent set, synced from token_revocation)
+    REVOCATION_BLOOM_CAPACITY: int = 100000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.01
+    REVOCATION_RECENT_SIZE: int = 10000
+    REVOCATION_SYNC_SECONDS: float = 5.0
+    REVOCATION_REBUILD_SECONDS: float = 3600.0
+    REVOCATION_SYNC_OVERLAP_IDS: int = 1000  # re-read on every sync: ids can commit out of order
+    SERVICE_TOKEN_EXPIRE_SECONDS: int = 60  # max lifetime (exp - iat) of service tokens for /revocations
+    
+    # Retention sweeper (audit partitions, verification tokens, sessions, revocations)
+    RETENTION_SWEEP_INTERVAL_SECONDS: float = 3600.0
+    RETENTION_BATCH_SIZE: int = 1000
+    RETENTION_BATCH_PAUSE_SECONDS: float = 0.1  # between delete batches, lets other writers in
+    RETENTION_LOCK_TIMEOUT: str = "5s"  # partition DDL gives up instead of queueing inserts
+    AUDIT_RETENTION_MONTHS: int = 12  # whole months kept in journal_audit (0 keeps everything)
+    AUDIT_PARTITIONS_AHEAD: int = 3
+    EMAIL_VERIFICATION_TTL_HOURS: int = 48
+    
     # Database Configuration
     DATABASE_URL: str
     
     # Google OAuth Configuration
     GOOGLE_CLIENT_ID: str
+    GOOGLE_CERTS_TIMEOUT_SECONDS: float = 10.0
+    GOOGLE_CERTS_DEFAULT_MAX_AGE: int = 3600  # used when Google sends no max-age
+    GOOGLE_CERTS_REFRESH_MARGIN_SECONDS: int = 300
+    GOOGLE_CERTS_MIN_REFRESH_SECONDS: int = 60  # unknown key ids force a fetch at most this often
     
     # Email Configuration
     MAIL_USERNAME: str
@@ -22,6 +60,14 @@ class Settings(BaseSettings):
     MAIL_SERVER: str
     MAIL_TLS: bool = True
     MAIL_SSL: bool = False
+    MAIL_USE_CREDENTIALS: bool = True  # false for a local SMTP stand-in such as aiosmtpd
+    
+    # Email outbox dispatcher
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50
+    EMAIL_OUTBOX_POLL_SECONDS: float = 5.0
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 8
+    EMAIL_OUTBOX_RETRY_BASE_SECONDS: int = 30
+    EMAIL_SMTP_TIMEOUT_SECONDS: float = 30.0
     
     # Application URLs
     FRONTEND_URL: str = "http://localhost:5173"
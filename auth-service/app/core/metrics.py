@@ -0,0 +1,15 @@
+# app/core/metrics.py
+from prometheus_client import Counter, Gauge, Histogram
+
+# Request metrics and the /metrics endpoint are shared with the other services
+from app.core.http_metrics import MetricsMiddleware, metrics_response  # noqa: F401
+
+# Batched audit log writer
+AUDIT_EVENTS_WRITTEN = Counter("audit_events_written_total", "Audit events written to journal_audit")
+AUDIT_EVENTS_DROPPED = Counter("audit_events_dropped_total", "Audit events dropped (buffer full or insert failed)")
+AUDIT_EVENT_DELAY = Histogram(
+    "audit_event_delay_seconds",
+    "Time between logging an audit event and writing it",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+AUDIT_QUEUE_DEPTH = Gauge("audit_queue_depth", "Audit events waiting to be written", multiprocess_mode="livesum")
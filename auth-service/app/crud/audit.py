@@ -0,0 +1,49 @@
+# app/crud/audit.py
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import and_, or_
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.journal_audit import JournalAudit
+
+
+def encode_audit_cursor(entry: JournalAudit) -> str:
+    return f"{entry.horodatage.isoformat()}|{entry.id}"
+
+def decode_audit_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError for a malformed cursor"""
+    horodatage, entry_id = cursor.rsplit("|", 1)
+    return datetime.fromisoformat(horodatage), int(entry_id)
+
+async def get_audit_entries(
+    db: AsyncSession,
+    utilisateur_id: Optional[int] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    before: Optional[Tuple[datetime, int]] = None,
+    limit: int = 50
+) -> List[JournalAudit]:
+    """
+    Audit entries newest first, with keyset pagination on (horodatage, id).
+    A user filter is served by idx_journal_audit_user_time, and time bounds
+    let the planner skip partitions outside the range.
+    """
+    query = select(JournalAudit)
+    if utilisateur_id is not None:
+        query = query.where(JournalAudit.utilisateur_id == utilisateur_id)
+    if action:
+        query = query.where(JournalAudit.action == action)
+    if since is not None:
+        query = query.where(JournalAudit.horodatage >= since)
+    if until is not None:
+        query = query.where(JournalAudit.horodatage < until)
+    if before is not None:
+        before_time, before_id = before
+        query = query.where(or_(
+            JournalAudit.horodatage < before_time,
+            and_(JournalAudit.horodatage == before_time, JournalAudit.id < before_id)
+        ))
+    query = query.order_by(JournalAudit.horodatage.desc(), JournalAudit.id.desc()).limit(limit)
+    result = await db.execute(query)
+    return result.scalars().all()
@@ -1,27 +1,28 @@
 # app/crud/user.py
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
+from sqlalchemy import func
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.utilisateur import Utilisateur
 from app.models.role import Role
 from app.schemas.user import UserCreate
-from sqlalchemy.orm import selectinload
+from app.services.user_cache import invalidate_user_on_commit
+from app.services.reference_cache import reference_cache
+from sqlalchemy.orm import selectinload, noload
 async def get_user_by_email(db: AsyncSession, email: str) -> Optional[Utilisateur]:
     query = select(Utilisateur).options(selectinload(Utilisateur.roles)).where(Utilisateur.email == email)
     result = await db.execute(query)
-    user = result.scalars().first()
-    
-    # DEBUG: Print user roles after loading
-    if user:
-        print(f"DEBUG CRUD - User {user.id} loaded with {len(user.roles)} roles")
-        for role in user.roles:
-            print(f"DEBUG CRUD - Role: {role.id} - {role.nom}")
-    
-    return user
+    return result.scalars().first()
 
 async def get_role_by_name(db: AsyncSession, role_name: str) -> Role | None:
+    cached = reference_cache.get(("role", role_name))
+    if cached is not None:
+        return await reference_cache.attach(db, cached)
     result = await db.execute(select(Role).filter(Role.nom == role_name))
-    return result.scalars().first()
+    role = result.scalars().first()
+    if role:
+        reference_cache.put(("role", role_name), role)
+    return role
 
 async def get_user_by_id(db: AsyncSession, user_id: str) -> Optional[Utilisateur]:
     user_id_int = int(user_id)
@@ -29,29 +30,62 @@ async def get_user_by_id(db: AsyncSession, user_id: str) -> Optional[Utilisateur
     result = await db.execute(query)
     return result.scalars().first()
 
-async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100, role_filter: str = None) -> List[Utilisateur]:
-    query = select(Utilisateur).options(selectinload(Utilisateur.roles))
+def _users_query(*columns, role_filter: str = None):
+    """Users (plus any extra columns) with roles eager-loaded, optionally filtered by role name"""
+    from app.models.links import utilisateur_role
     
+    query = select(Utilisateur, *columns).options(
+        selectinload(Utilisateur.roles),
+        noload(Utilisateur.fournisseurs)
+    )
     if role_filter:
-        # Join with roles table to filter by role
-        from app.models.role import Role
-        from app.models.links import utilisateur_role
         query = query.join(utilisateur_role).join(Role).filter(Role.nom == role_filter)
-    
-    query = query.offset(skip).limit(limit)
+    return query
+
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100, role_filter: str = None) -> List[Utilisateur]:
+    query = _users_query(role_filter=role_filter).order_by(Utilisateur.id).offset(skip).limit(limit)
+    result = await db.execute(query)
+    return result.scalars().all()
+
+async def get_users_page(db: AsyncSession, skip: int = 0, limit: int = 100, role_filter: str = None) -> Tuple[List[Utilisateur], int]:
+    """One page of users plus the total match count, from a single statement using count(*) OVER ()"""
+    total_column = func.count().over().label("total")
+    query = _users_query(total_column, role_filter=role_filter).order_by(Utilisateur.id).offset(skip).limit(limit)
+    result = await db.execute(query)
+    rows = result.all()
+    if not rows:
+        # Past the last page the window has no rows to report on
+        return [], (await get_users_count(db, role_filter=role_filter) if skip else 0)
+    return [row[0] for row in rows], rows[0].total
+
+async def get_users_after(db: AsyncSession, after_id: int = 0, limit: int = 100, role_filter: str = None) -> List[Utilisateur]:
+    """Keyset pagination: the next `limit` users with id greater than after_id"""
+    query = _users_query(role_filter=role_filter).where(Utilisateur.id > after_id).order_by(Utilisateur.id).limit(limit)
     result = await db.execute(query)
     return result.scalars().all()
 
 async def get_users_count(db: AsyncSession, role_filter: str = None) -> int:
-    query = select(Utilisateur)
+    from app.models.links import utilisateur_role
     
+    query = select(func.count()).select_from(Utilisateur)
     if role_filter:
-        from app.models.role import Role
-        from app.models.links import utilisateur_role
         query = query.join(utilisateur_role).join(Role).filter(Role.nom == role_filter)
     
     result = await db.execute(query)
-    return len(result.scalars().all())
+    return result.scalar_one()
+
+async def get_users_count_by_role(db: AsyncSession) -> Dict[str, int]:
+    """Number of users holding each role, from one GROUP BY query"""
+    from app.models.links import utilisateur_role
+    
+    query = (
+        select(Role.nom, func.count(utilisateur_role.c.utilisateur_id))
+        .select_from(Role)
+        .outerjoin(utilisateur_role, utilisateur_role.c.role_id == Role.id)
+        .group_by(Role.nom)
+    )
+    result = await db.execute(query)
+    return {role_name: count for role_name, count in result.all()}
 
 async def update_user_roles(db: AsyncSession, user_id: int, role_names: List[str]) -> Optional[Utilisateur]:
     """Update user roles by replacing existing roles with new ones"""
@@ -69,6 +103,7 @@ async def update_user_roles(db: AsyncSession, user_id: int, role_names: List[str
     # Replace user's roles
     user.roles = new_roles
     await db.flush()
+    invalidate_user_on_commit(db, user_id)
     
     return user
 
@@ -80,6 +115,7 @@ async def update_user_status(db: AsyncSession, user_id: int, statut_compte: str)
     
     user.statut_compte = statut_compte
     await db.flush()
+    invalidate_user_on_commit(db, user_id)
     return user
 
 async def update_user(db: AsyncSession, user_id: int, user_data: dict) -> Optional[Utilisateur]:
@@ -93,6 +129,7 @@ async def update_user(db: AsyncSession, user_id: int, user_data: dict) -> Option
             setattr(user, field, value)
     
     await db.flush()
+    invalidate_user_on_commit(db, user_id)
     return user
 
 async def delete_user(db: AsyncSession, user_id: int) -> bool:
@@ -103,6 +140,7 @@ async def delete_user(db: AsyncSession, user_id: int) -> bool:
     
     await db.delete(user)
     await db.flush()
+    invalidate_user_on_commit(db, user_id)
     return True
 
 async def create_user_by_admin(db: AsyncSession, user_data: dict, hashed_password: str, role_names: List[str]) -> Utilisateur:
@@ -145,8 +183,9 @@ async def create_user(db: AsyncSession, user_in: UserCreate, hashed_password: st
         roles=[default_role]  # or False, depending on your logic
     )
     db.add(user)
-    await db.commit()
-    await db.refresh(user)
+    # Flushed, not committed: registration commits the user, its verification
+    # token and the outgoing email together
+    await db.flush()
    
     return user
 
@@ -166,7 +205,12 @@ async def create_fournisseur(db: AsyncSession, nom_fournisseur: str, type_fourni
     return fournisseur
 
 async def get_or_create_fournisseur(db: AsyncSession, nom_fournisseur: str, type_fournisseur: str) -> FournisseurAuthentification:
+    cached = reference_cache.get(("fournisseur", nom_fournisseur))
+    if cached is not None:
+        return await reference_cache.attach(db, cached)
     fournisseur = await get_fournisseur_by_name(db, nom_fournisseur)
     if fournisseur:
+        # Only rows that already exist are cached; a new one is cached once committed and read back
+        reference_cache.put(("fournisseur", nom_fournisseur), fournisseur)
         return fournisseur
     return await create_fournisseur(db, nom_fournisseur, type_fournisseur)
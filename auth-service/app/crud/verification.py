@@ -2,16 +2,21 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.verification import EmailVerification
 from sqlalchemy.future import select
+from sqlalchemy import func
+from datetime import timedelta
+from app.core.config import settings
 
 async def save_verification_token(db: AsyncSession, user_id: str, token: str):
     verification = EmailVerification(token=token, utilisateur_id=user_id)
     db.add(verification)
-    await db.commit()
-    await db.refresh(verification)
+    await db.flush()
     return verification
 
 async def get_verification_by_token(db: AsyncSession, token: str):
     result = await db.execute(
-        select(EmailVerification).where(EmailVerification.token == token)
+        select(EmailVerification).where(
+            EmailVerification.token == token,
+            EmailVerification.created_at > func.now() - timedelta(hours=settings.EMAIL_VERIFICATION_TTL_HOURS)
+        )
     )
     return result.scalars().first()
@@ -1,30 +1,69 @@
 # app/dependencies/auth.py
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from typing import Dict, Any
-from app.services.auth import get_user_info_from_token, is_token_new_format
+from typing import Dict, Any, Tuple
+from app.services.auth import get_user_info_from_token, is_token_new_format, decode_service_token
+from app.services.revocation import revocation_filter, is_refresh_token_revoked
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme)) -> Dict[str, Any]:
-    """
-    Dependency to get current user information from JWT token.
-    Supports both old format (sub, exp) and new format (sub, email, roles, exp).
-    Returns a dict with user_id, email, roles, and exp.
-    Can be used by other services as well.
-    """
+async def _authenticate(token: str, allowed_types: Tuple[str, ...]) -> Dict[str, Any]:
     user_info = get_user_info_from_token(token)
-    if not user_info:
+    if not user_info or user_info.get("token_type") not in allowed_types:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Access tokens: in-memory check, only a Bloom filter hit outside the recent
+    # set costs a query. Refresh tokens aren't in the filter.
+    if user_info["token_type"] == "refresh":
+        revoked = await is_refresh_token_revoked(user_info.get("jti"))
+    else:
+        revoked = await revocation_filter.is_revoked(user_info.get("jti"))
+    if revoked:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
     # For old format tokens, roles will be empty and email will be None
     # The frontend should call /token/refresh to upgrade to new format
     return user_info
 
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> Dict[str, Any]:
+    """
+    Dependency to get current user information from JWT token.
+    Supports both old format (sub, exp) and new format (sub, email, roles, exp).
+    Returns a dict with user_id, email, roles, and exp.
+    Only access tokens are accepted: refresh tokens are not bearer credentials.
+    Can be used by other services as well.
+    """
+    return await _authenticate(token, ("access",))
+
+async def get_current_user_for_refresh(token: str = Depends(oauth2_scheme)) -> Dict[str, Any]:
+    """
+    Like get_current_user, but also accepts refresh tokens (checked against the
+    revocation table). Only for the /refresh endpoints.
+    """
+    return await _authenticate(token, ("access", "refresh"))
+
+def require_service_token(token: str = Depends(oauth2_scheme)) -> Dict[str, Any]:
+    """
+    Dependency for service-to-service endpoints (e.g. revocation sync).
+    Accepts only short-lived tokens with token_type "service".
+    """
+    payload = decode_service_token(token)
+    if not payload:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Service token required",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
+
 def require_role(required_role: str):
     """
     Dependency factory to require specific roles.
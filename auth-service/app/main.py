@@ -1,5 +1,15 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from app.api.v1.routes import router as auth_router
+from db.session import engine
+from db.metrics import get_pool_metrics
+from app.core.metrics import MetricsMiddleware, metrics_response
+from app.services.auth import PasswordHasherBusy
+from app.services.audit import audit_writer
+from app.services.email import email_dispatcher
+from app.services.google_oauth import google_token_verifier
+from app.services.revocation import revocation_filter
+from app.services.retention import retention_sweeper
 
 app = FastAPI(
     title="E-Learning Auth Service",
@@ -7,6 +17,37 @@ app = FastAPI(
     version="1.0.0"
 )
 
+
+@app.on_event("startup")
+async def start_background_writers():
+    await audit_writer.start()
+    await email_dispatcher.start()
+    await google_token_verifier.start()
+    await revocation_filter.start()
+    await retention_sweeper.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_writers():
+    # Write any audit events still buffered before the process exits
+    await audit_writer.stop()
+    await email_dispatcher.stop()
+    await google_token_verifier.stop()
+    await revocation_filter.stop()
+    await retention_sweeper.stop()
+    await engine.dispose()
+
+app.add_middleware(MetricsMiddleware)
+
+# Password hashing pool saturated: fail fast instead of queueing behind it
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Authentication service busy, please retry"},
+        headers={"Retry-After": "1"}
+    )
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -16,4 +57,14 @@ async def health_check():
         "version": "1.0.0"
     }
 
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return metrics_response()
+
+# Database pool metrics
+@app.get("/metrics/db")
+async def database_pool_metrics():
+    return get_pool_metrics(engine)
+
 app.include_router(auth_router, prefix="/api/v1")
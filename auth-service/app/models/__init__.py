@@ -7,4 +7,6 @@ from .session import Session
 from .jeton_reinitialisation import JetonReinitialisation
 from .journal_audit import JournalAudit
 from .permission import Permission
+from .email_outbox import EmailOutbox
+from .token_revocation import TokenRevocation
 # Add other models here if you have more
@@ -0,0 +1,21 @@
+# app/models/email_outbox.py
+from sqlalchemy import Column, Integer, String, Text, TIMESTAMP
+from sqlalchemy.sql import func
+from db.session import Base
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    recipient = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    subtype = Column(String(20), nullable=False, default="plain")
+
+    # Delivery state: 'pending', 'sent', 'failed'
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
+    last_error = Column(Text)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    sent_at = Column(TIMESTAMP)
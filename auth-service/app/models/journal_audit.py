@@ -1,16 +1,22 @@
 # app/models/journal_audit.py
-from sqlalchemy import Column, Integer, ForeignKey, String, TIMESTAMP, Text
+from sqlalchemy import Column, Integer, ForeignKey, String, TIMESTAMP, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from db.session import Base
 
 class JournalAudit(Base):
     __tablename__ = "journal_audit"
+    # Monthly range partitions on horodatage (see migration_journal_audit_partitioning.sql);
+    # the partition key has to be part of the primary key
+    __table_args__ = (
+        Index("idx_journal_audit_user_time", "utilisateur_id", "horodatage"),
+        {"postgresql_partition_by": "RANGE (horodatage)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     utilisateur_id = Column(Integer, ForeignKey("utilisateur.id", ondelete="CASCADE"), nullable=False)
     action = Column(String(100), nullable=False)
-    horodatage = Column(TIMESTAMP, server_default=func.now())
+    horodatage = Column(TIMESTAMP, primary_key=True, nullable=False, server_default=func.now())
     details = Column(Text)
 
     utilisateur = relationship("Utilisateur", back_populates="journal_audit")
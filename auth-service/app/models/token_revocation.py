@@ -0,0 +1,15 @@
+# app/models/token_revocation.py
+from sqlalchemy import Column, BigInteger, Integer, String, TIMESTAMP, ForeignKey
+from sqlalchemy.sql import func
+from db.session import Base
+
+class TokenRevocation(Base):
+    __tablename__ = "token_revocation"
+
+    # Doubles as the incremental sync cursor (re-read with an overlap: ids can commit out of order)
+    id = Column(BigInteger, primary_key=True, index=True)
+    jti = Column(String(64), unique=True, nullable=False)
+    token_type = Column(String(20), nullable=False, server_default="access")  # only "access" is synced to filters
+    utilisateur_id = Column(Integer, ForeignKey("utilisateur.id", ondelete="CASCADE"), nullable=True)
+    expires_at = Column(TIMESTAMP, nullable=False)  # revocation is moot once the token expires
+    revoked_at = Column(TIMESTAMP, server_default=func.now())
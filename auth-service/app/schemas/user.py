@@ -25,6 +25,9 @@ class OAuthData(BaseModel):
 class RefreshTokenRequest(BaseModel):
     refresh_token: str
 
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
 class TokenResponse(BaseModel):
     access_token: str
     refresh_token: str
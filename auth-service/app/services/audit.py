@@ -1,14 +1,154 @@
 # app/services/audit.py
-from app.models.journal_audit import JournalAudit
-from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import logging
+import time
 from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import AUDIT_EVENTS_DROPPED, AUDIT_EVENTS_WRITTEN, AUDIT_EVENT_DELAY, AUDIT_QUEUE_DEPTH
+from app.models.journal_audit import JournalAudit
+from db.session import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    """
+    Buffers audit events in memory and writes them with one multi-row INSERT
+    per batch, when the batch fills up or the flush interval elapses.
+    Events leave the buffer only once written, so a batch in flight survives a
+    failed insert or shutdown and is retried on the next flush. The buffer is
+    bounded: events beyond AUDIT_QUEUE_MAX_SIZE (retried ones included) are
+    dropped and counted.
+    """
+
+    def __init__(self, max_size: int, batch_size: int, flush_interval: float):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: List[Dict] = []
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._flush_lock = asyncio.Lock()
+
+    def enqueue(self, utilisateur_id: int, action: str, details: str = ""):
+        if len(self._buffer) >= self.max_size:
+            AUDIT_EVENTS_DROPPED.inc()
+            logger.warning(f"Audit buffer full, dropping '{action}' for user {utilisateur_id}")
+            return
+        self._buffer.append({
+            "utilisateur_id": utilisateur_id,
+            "action": action,
+            "horodatage": datetime.utcnow(),
+            "details": details,
+            "_enqueued_at": time.monotonic(),
+        })
+        AUDIT_QUEUE_DEPTH.set(len(self._buffer))
+        if len(self._buffer) >= self.batch_size:
+            self._wake.set()
+
+    async def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Let the loop finish its current flush, then write whatever is still buffered"""
+        if self._task is not None:
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Final audit flush failed: {str(e)}")
+        if self._buffer:
+            AUDIT_EVENTS_DROPPED.inc(len(self._buffer))
+            logger.error(f"❌ {len(self._buffer)} audit events could not be written before shutdown")
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Audit flush failed: {str(e)}")
+
+    async def flush(self):
+        async with self._flush_lock:
+            while self._buffer:
+                # enqueue only appends, so the front of the buffer is stable while writing
+                batch = self._buffer[:self.batch_size]
+                done = await self._write(batch)
+                del self._buffer[:done]
+                AUDIT_QUEUE_DEPTH.set(len(self._buffer))
+                if done < len(batch):
+                    return  # database unavailable: keep the rest for the next flush
+
+    async def _write(self, batch: List[Dict]) -> int:
+        """
+        Write a batch; returns how many events from its front are done with
+        (written, or rejected by the database for good). Events after that
+        point hit a transient error and must stay buffered.
+        """
+        rows = [{key: value for key, value in event.items() if key != "_enqueued_at"} for event in batch]
+        written = []
+        async with AsyncSessionLocal() as db:
+            try:
+                await db.execute(insert(JournalAudit).values(rows))
+                await db.commit()
+                self._record_written(batch)
+                return len(batch)
+            except (IntegrityError, DataError) as e:
+                # One bad row (e.g. a user deleted meanwhile) must not lose the whole batch
+                await db.rollback()
+                logger.warning(f"Audit batch insert failed, retrying row by row: {str(e)}")
+            except Exception as e:
+                logger.error(f"Audit batch insert failed, keeping {len(batch)} events buffered: {str(e)}")
+                return 0
+
+            for index, (event, row) in enumerate(zip(batch, rows)):
+                try:
+                    await db.execute(insert(JournalAudit).values(row))
+                    await db.commit()
+                    written.append(event)
+                except (IntegrityError, DataError):
+                    await db.rollback()
+                    AUDIT_EVENTS_DROPPED.inc()
+                except Exception as e:
+                    logger.error(f"Audit insert failed, keeping {len(batch) - index} events buffered: {str(e)}")
+                    self._record_written(written)
+                    return index
+        self._record_written(written)
+        return len(batch)
+
+    def _record_written(self, written: List[Dict]):
+        now = time.monotonic()
+        AUDIT_EVENTS_WRITTEN.inc(len(written))
+        for event in written:
+            AUDIT_EVENT_DELAY.observe(now - event["_enqueued_at"])
+
+audit_writer = AuditWriter(
+    max_size=settings.AUDIT_QUEUE_MAX_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+)
+
 
 async def log_action(db: AsyncSession, utilisateur_id: int, action: str, details: str = ""):
-    log = JournalAudit(
-        utilisateur_id=utilisateur_id,
-        action=action,
-        horodatage=datetime.utcnow(),
-        details=details,
-    )
-    db.add(log)
-    await db.commit()
+    """
+    Record an audit event. It is written asynchronously by audit_writer, so it
+    neither commits nor splits the caller's transaction; db is kept for callers.
+    """
+    audit_writer.enqueue(utilisateur_id, action, details)
@@ -1,5 +1,8 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, List
+from uuid import uuid4
 from passlib.context import CryptContext
 import jwt  # PyJWT
 from app.core.config import settings  # To get SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
@@ -16,10 +19,40 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+# 4. Bounded pool for the async versions: bcrypt releases the GIL while hashing,
+# so threads keep the event loop free for token checks and refreshes
+class PasswordHasherBusy(Exception):
+    """Raised when too many hashes are already queued; surfaced as a 503"""
+
+
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+_pending_password_tasks = 0
+
+async def _run_password_task(func, *args):
+    global _pending_password_tasks
+    if _pending_password_tasks >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise PasswordHasherBusy()
+    _pending_password_tasks += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, func, *args)
+    finally:
+        _pending_password_tasks -= 1
+
+async def hash_password_async(password: str) -> str:
+    return await _run_password_task(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_task(verify_password, plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire, "token_type": "access"})
+    to_encode.update({"exp": expire, "token_type": "access", "jti": uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -27,7 +60,7 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None)
     """Create a long-lived refresh token"""
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS))
-    to_encode.update({"exp": expire, "token_type": "refresh"})
+    to_encode.update({"exp": expire, "token_type": "refresh", "jti": uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -41,7 +74,7 @@ def create_access_token_for_user(user_id: str, email: str, roles: List[str], exp
         "token_format": "new"
     }
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire, "token_type": "access"})
+    to_encode.update({"exp": expire, "token_type": "access", "jti": uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -55,7 +88,7 @@ def create_refresh_token_for_user(user_id: str, email: str, roles: List[str], ex
         "token_format": "new"
     }
     expire = datetime.utcnow() + (expires_delta or timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS))
-    to_encode.update({"exp": expire, "token_type": "refresh"})
+    to_encode.update({"exp": expire, "token_type": "refresh", "jti": uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -90,6 +123,24 @@ def decode_refresh_token(token: str) -> Optional[dict]:
     except jwt.PyJWTError:
         return None
 
+def decode_service_token(token: str) -> Optional[dict]:
+    """Decode a short-lived service-to-service token (token_type "service")"""
+    try:
+        payload = jwt.decode(
+            token,
+            settings.SECRET_KEY,
+            algorithms=[settings.ALGORITHM],
+            options={"require": ["exp", "iat"]}
+        )
+        if payload.get("token_type") != "service":
+            return None
+        # Service tokens must be short-lived; a leaked long-lived one is refused
+        if payload["exp"] - payload["iat"] > settings.SERVICE_TOKEN_EXPIRE_SECONDS:
+            return None
+        return payload
+    except jwt.PyJWTError:
+        return None
+
 def verify_token_type(token: str, expected_type: str) -> bool:
     """Verify that the token is of the expected type (access or refresh)"""
     try:
@@ -116,6 +167,8 @@ def get_user_info_from_token(token: str) -> Optional[dict]:
             "email": payload["email"],
             "roles": payload["roles"],
             "exp": payload["exp"],
+            "jti": payload.get("jti"),
+            "token_type": payload.get("token_type"),
             "token_format": "new"
         }
     else:
@@ -128,6 +181,8 @@ def get_user_info_from_token(token: str) -> Optional[dict]:
             "email": None,  # Not available in old format
             "roles": [],    # Not available in old format
             "exp": payload["exp"],
+            "jti": payload.get("jti"),
+            "token_type": payload.get("token_type"),
             "token_format": "old"
         }
 
@@ -1,26 +1,174 @@
 # app/services/email.py
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
+import asyncio
+import logging
+from datetime import timedelta
+from email.message import EmailMessage
+from typing import Optional
+
+import aiosmtplib
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
 from app.core.config import settings
+from app.models.email_outbox import EmailOutbox
+from db.session import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.MAIL_USERNAME,
-    MAIL_PASSWORD=settings.MAIL_PASSWORD,
-    MAIL_FROM=settings.MAIL_FROM,
-    MAIL_PORT=settings.MAIL_PORT,
-    MAIL_SERVER=settings.MAIL_SERVER,
-    MAIL_TLS=True,
-    MAIL_SSL=False,
-    USE_CREDENTIALS=True,
-)
-
-async def send_verification_email(email_to: str, link: str):
-    message = MessageSchema(
+
+def queue_email(db: AsyncSession, recipient: str, subject: str, body: str, subtype: str = "plain") -> EmailOutbox:
+    """Add an email to the outbox; it is sent once the caller's transaction commits"""
+    email = EmailOutbox(recipient=recipient, subject=subject, body=body, subtype=subtype)
+    db.add(email)
+    return email
+
+def queue_verification_email(db: AsyncSession, email_to: str, link: str) -> EmailOutbox:
+    return queue_email(
+        db,
+        recipient=email_to,
         subject="Please verify your email",
-        recipients=[email_to],
         body=f"Click this link to verify your email: {link}",
-        subtype="plain"
     )
 
-    fm = FastMail(conf)
-    
-    await fm.send_message(message)
+
+def build_message(email: EmailOutbox) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = settings.MAIL_FROM
+    message["To"] = email.recipient
+    message["Subject"] = email.subject
+    message.set_content(email.body, subtype=email.subtype)
+    return message
+
+
+class EmailDispatcher:
+    """
+    Drains email_outbox in batches over a single persistent SMTP connection.
+    Failed sends are retried with exponential backoff until EMAIL_OUTBOX_MAX_ATTEMPTS.
+    Rows are claimed with FOR UPDATE SKIP LOCKED, so several workers can run one each.
+    """
+
+    def __init__(self):
+        self._smtp: Optional[aiosmtplib.SMTP] = None
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self):
+        """Wake the dispatcher right away instead of waiting for the next poll"""
+        self._wake.set()
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._disconnect()
+
+    async def _connection(self) -> aiosmtplib.SMTP:
+        if self._smtp is not None and self._smtp.is_connected:
+            return self._smtp
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.MAIL_SERVER,
+            port=settings.MAIL_PORT,
+            use_tls=settings.MAIL_SSL,
+            timeout=settings.EMAIL_SMTP_TIMEOUT_SECONDS,
+        )
+        await smtp.connect()
+        if settings.MAIL_TLS and not settings.MAIL_SSL:
+            await smtp.starttls()
+        if settings.MAIL_USE_CREDENTIALS:
+            await smtp.login(settings.MAIL_USERNAME, settings.MAIL_PASSWORD)
+        self._smtp = smtp
+        return smtp
+
+    async def _disconnect(self):
+        if self._smtp is None:
+            return
+        try:
+            await self._smtp.quit()
+        except Exception:
+            self._smtp.close()
+        self._smtp = None
+
+    def _schedule_retry(self, email: EmailOutbox, error: str):
+        email.attempts += 1
+        email.last_error = error[:1000]
+        if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            email.status = "failed"
+            logger.error(f"❌ Giving up on email {email.id} to {email.recipient} after {email.attempts} attempts: {error}")
+        else:
+            backoff = settings.EMAIL_OUTBOX_RETRY_BASE_SECONDS * 2 ** (email.attempts - 1)
+            email.next_attempt_at = func.now() + timedelta(seconds=backoff)
+
+    async def dispatch_due(self) -> int:
+        """Send one batch of due emails; returns how many were sent"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(EmailOutbox)
+                .where(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= func.now())
+                .order_by(EmailOutbox.id)
+                .limit(settings.EMAIL_OUTBOX_BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+            )
+            emails = result.scalars().all()
+            if not emails:
+                return 0
+
+            try:
+                smtp = await self._connection()
+            except Exception as e:
+                # SMTP is down: push the whole batch back instead of failing each send
+                await self._disconnect()
+                for email in emails:
+                    self._schedule_retry(email, f"SMTP connection failed: {str(e)}")
+                await db.commit()
+                return 0
+
+            sent = 0
+            for email in emails:
+                if smtp is None:
+                    self._schedule_retry(email, "SMTP connection lost")
+                    continue
+                try:
+                    await smtp.send_message(build_message(email))
+                    email.status = "sent"
+                    email.sent_at = func.now()
+                    email.last_error = None
+                    sent += 1
+                except Exception as e:
+                    self._schedule_retry(email, str(e))
+                    if not smtp.is_connected:
+                        await self._disconnect()
+                        try:
+                            smtp = await self._connection()
+                        except Exception:
+                            smtp = None
+            # Record what was sent even if the connection dropped midway
+            await db.commit()
+            return sent
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.EMAIL_OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                # Keep draining while full batches go out
+                while await self.dispatch_due() >= settings.EMAIL_OUTBOX_BATCH_SIZE:
+                    pass
+            except Exception as e:
+                logger.error(f"Email outbox dispatch failed: {str(e)}")
+                await self._disconnect()
+
+
+# Global instance
+email_dispatcher = EmailDispatcher()
@@ -0,0 +1,117 @@
+# app/services/google_oauth.py
+import asyncio
+import logging
+import re
+import time
+from typing import Dict, Optional
+
+import httpx
+from google.auth import jwt as google_jwt
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_ISSUERS = {"accounts.google.com", "https://accounts.google.com"}
+
+_max_age = re.compile(r"max-age=(\d+)")
+
+
+class GoogleTokenVerifier:
+    """
+    Verifies Google ID tokens locally against an in-memory copy of Google's
+    signing certificates. The certificates are refreshed in the background
+    before their Cache-Control max-age runs out, so logins never wait on
+    Google unless a key rotation brings an unknown key id. Such forced
+    refreshes happen at most once per GOOGLE_CERTS_MIN_REFRESH_SECONDS;
+    meanwhile tokens with unknown key ids are rejected without a fetch.
+
+    Passing `certs` (key id -> PEM certificate) pins a local key set and
+    disables fetching, which lets the verifier run offline.
+    """
+
+    def __init__(self, client_id: str, certs: Optional[Dict[str, str]] = None):
+        self.client_id = client_id
+        self._certs: Dict[str, str] = dict(certs or {})
+        self._static = certs is not None
+        self._expires_at = float("inf") if self._static else 0.0
+        self._refresh_lock = asyncio.Lock()
+        self._last_forced_refresh = float("-inf")
+        self._task: Optional[asyncio.Task] = None
+
+    def set_certs(self, certs: Dict[str, str]):
+        """Pin a local key set (tests, offline environments)"""
+        self._certs = dict(certs)
+        self._static = True
+        self._expires_at = float("inf")
+
+    async def refresh(self) -> float:
+        """Fetch the current certificates; returns their max-age in seconds"""
+        async with httpx.AsyncClient(timeout=settings.GOOGLE_CERTS_TIMEOUT_SECONDS) as client:
+            response = await client.get(GOOGLE_CERTS_URL)
+            response.raise_for_status()
+        match = _max_age.search(response.headers.get("cache-control", ""))
+        max_age = float(match.group(1)) if match else settings.GOOGLE_CERTS_DEFAULT_MAX_AGE
+        self._certs = response.json()
+        self._expires_at = time.monotonic() + max_age
+        return max_age
+
+    def _fresh(self) -> bool:
+        return bool(self._certs) and time.monotonic() < self._expires_at
+
+    async def _ensure_certs(self, key_id: Optional[str]):
+        if self._static:
+            return
+        if self._fresh() and (key_id is None or key_id in self._certs):
+            return
+        async with self._refresh_lock:
+            # Another request may have refreshed while we waited for the lock
+            if self._fresh() and (key_id is None or key_id in self._certs):
+                return
+            if self._fresh():
+                # Unknown key id with a current key set: anyone can send one,
+                # so only let it trigger a fetch once per interval
+                now = time.monotonic()
+                if now - self._last_forced_refresh < settings.GOOGLE_CERTS_MIN_REFRESH_SECONDS:
+                    raise ValueError(f"Unknown Google key id: {key_id}")
+                self._last_forced_refresh = now
+            await self.refresh()
+
+    async def verify(self, token: str) -> dict:
+        """Verify signature, audience, expiry and issuer; returns the token claims"""
+        header = google_jwt.decode_header(token)
+        await self._ensure_certs(header.get("kid"))
+        certs = self._certs
+        # RSA verification is CPU work; keep it off the event loop
+        claims = await asyncio.to_thread(google_jwt.decode, token, certs=certs, audience=self.client_id)
+        if claims.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError(f"Wrong issuer: {claims.get('iss')}")
+        return claims
+
+    async def start(self):
+        if self._task is None and not self._static:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                max_age = await self.refresh()
+                # Refresh ahead of expiry so requests never see a stale key set
+                delay = max(max_age - settings.GOOGLE_CERTS_REFRESH_MARGIN_SECONDS, 60)
+            except Exception as e:
+                logger.warning(f"Could not refresh Google certificates: {str(e)}")
+                delay = 60
+            await asyncio.sleep(delay)
+
+
+google_token_verifier = GoogleTokenVerifier(settings.GOOGLE_CLIENT_ID)
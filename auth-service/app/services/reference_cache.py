@@ -0,0 +1,50 @@
+# app/services/reference_cache.py
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import settings
+
+
+class ReferenceCache:
+    """
+    Small in-process cache for reference rows (roles, auth providers) that
+    are read on every login and almost never change.
+
+    Entries are detached column-only snapshots; attach() merges one into the
+    caller's session without a query, so a cached object is never shared
+    between sessions.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, snapshot = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        return snapshot
+
+    def put(self, key: Hashable, instance: Any):
+        model = type(instance)
+        columns = {attr.key: getattr(instance, attr.key) for attr in inspect(model).column_attrs}
+        snapshot = model(**columns)
+        make_transient_to_detached(snapshot)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, snapshot)
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    async def attach(self, db: AsyncSession, snapshot: Any) -> Any:
+        return await db.merge(snapshot, load=False)
+
+
+reference_cache = ReferenceCache(ttl_seconds=settings.REFERENCE_CACHE_TTL_SECONDS)
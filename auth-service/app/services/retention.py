@@ -0,0 +1,161 @@
+# app/services/retention.py
+import asyncio
+import logging
+import re
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from db.session import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+_PARTITION_NAME = re.compile(r"^journal_audit_p(\d{4})_(\d{2})$")
+
+
+def _add_months(month_start: date, months: int) -> date:
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class RetentionSweeper:
+    """
+    Periodic housekeeping for tables that would otherwise grow without bound:
+    - journal_audit: creates upcoming monthly partitions and drops whole months
+      older than AUDIT_RETENTION_MONTHS
+    - email_verification: deletes tokens older than EMAIL_VERIFICATION_TTL_HOURS
+    - session: deletes invalidated sessions
+    - token_revocation: deletes revocations whose token has expired anyway
+    Rows are deleted in small committed batches (SKIP LOCKED) so no statement
+    holds locks for long, and several workers can run the sweeper side by side.
+    """
+
+    def __init__(self, interval: float, batch_size: int, batch_pause: float):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self.sweep()
+            await asyncio.sleep(self.interval)
+
+    async def sweep(self):
+        """Run every housekeeping step; one failing step doesn't stop the others"""
+        steps = [
+            ("audit partitions", self.maintain_audit_partitions),
+            ("email verifications", self.sweep_expired_verifications),
+            ("sessions", self.sweep_invalid_sessions),
+            ("token revocations", self.sweep_expired_revocations),
+        ]
+        for name, step in steps:
+            try:
+                await step()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Retention sweep of {name} failed: {str(e)}")
+
+    # =================== JOURNAL_AUDIT PARTITIONS ===================
+
+    async def maintain_audit_partitions(self):
+        async with AsyncSessionLocal() as db:
+            partitioned = await db.scalar(text(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'journal_audit'::regclass)"
+            ))
+            if not partitioned:
+                return  # migration_journal_audit_partitioning.sql not applied yet
+
+            result = await db.execute(text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE pg_inherits.inhparent = 'journal_audit'::regclass"
+            ))
+            existing = set(result.scalars().all())
+
+        this_month = date.today().replace(day=1)
+        for offset in range(settings.AUDIT_PARTITIONS_AHEAD + 1):
+            month_start = _add_months(this_month, offset)
+            name = f"journal_audit_p{month_start:%Y_%m}"
+            if name not in existing:
+                await self._run_ddl(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF journal_audit "
+                    f"FOR VALUES FROM ('{month_start}') TO ('{_add_months(month_start, 1)}')"
+                )
+                logger.info(f"🗂️ Created audit partition {name}")
+
+        if settings.AUDIT_RETENTION_MONTHS <= 0:
+            return
+        oldest_kept = _add_months(this_month, -settings.AUDIT_RETENTION_MONTHS)
+        for name in sorted(existing):
+            match = _PARTITION_NAME.match(name)
+            if not match or date(int(match.group(1)), int(match.group(2)), 1) >= oldest_kept:
+                continue
+            await self._run_ddl(f"ALTER TABLE journal_audit DETACH PARTITION {name}")
+            await self._run_ddl(f"DROP TABLE IF EXISTS {name}")
+            logger.info(f"🗑️ Dropped audit partition {name}")
+
+    async def _run_ddl(self, statement: str):
+        # Partition DDL takes a lock on journal_audit; give up quickly rather
+        # than make audit inserts queue behind a waiting ALTER
+        async with AsyncSessionLocal() as db:
+            await db.execute(text(f"SET LOCAL lock_timeout = '{settings.RETENTION_LOCK_TIMEOUT}'"))
+            await db.execute(text(statement))
+            await db.commit()
+
+    # =================== BATCHED DELETES ===================
+
+    async def _delete_in_batches(self, table: str, key: str, condition: str, **params) -> int:
+        statement = text(
+            f"DELETE FROM {table} WHERE {key} IN ("
+            f"SELECT {key} FROM {table} WHERE {condition} LIMIT :batch_size FOR UPDATE SKIP LOCKED)"
+        )
+        deleted = 0
+        while True:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(statement, {"batch_size": self.batch_size, **params})
+                await db.commit()
+            deleted += result.rowcount
+            if result.rowcount < self.batch_size:
+                break
+            await asyncio.sleep(self.batch_pause)
+        if deleted:
+            logger.info(f"🧹 Deleted {deleted} rows from {table}")
+        return deleted
+
+    async def sweep_expired_verifications(self) -> int:
+        return await self._delete_in_batches(
+            "email_verification",
+            "token",
+            "created_at < NOW() - make_interval(hours => :ttl_hours)",
+            ttl_hours=settings.EMAIL_VERIFICATION_TTL_HOURS,
+        )
+
+    async def sweep_invalid_sessions(self) -> int:
+        return await self._delete_in_batches('"session"', "id", "est_valide = false")
+
+    async def sweep_expired_revocations(self) -> int:
+        return await self._delete_in_batches("token_revocation", "id", "expires_at < NOW()")
+
+
+retention_sweeper = RetentionSweeper(
+    interval=settings.RETENTION_SWEEP_INTERVAL_SECONDS,
+    batch_size=settings.RETENTION_BATCH_SIZE,
+    batch_pause=settings.RETENTION_BATCH_PAUSE_SECONDS,
+)
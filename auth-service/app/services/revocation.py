@@ -0,0 +1,101 @@
+# app/services/revocation.py
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.models.token_revocation import TokenRevocation
+from app.services.revocation_filter import RevocationFilter
+from db.session import AsyncSessionLocal
+
+# Only access-token revocations are mirrored in memory: they are checked on
+# every request. Refresh tokens are checked against the table directly, so
+# rotating them on each refresh doesn't fill the Bloom filter.
+
+async def load_revocations(since: int, limit: int = 1000) -> Tuple[List[Tuple[int, str]], bool]:
+    """Unexpired access-token revocations with id > since, oldest first (callers re-read an overlap)"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(TokenRevocation.id, TokenRevocation.jti)
+            .where(
+                TokenRevocation.id > since,
+                TokenRevocation.token_type == "access",
+                TokenRevocation.expires_at > func.now()
+            )
+            .order_by(TokenRevocation.id)
+            .limit(limit)
+        )
+        rows = [(row.id, row.jti) for row in result.all()]
+    return rows, len(rows) == limit
+
+async def confirm_revocation(jti: str) -> bool:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(TokenRevocation.id).where(TokenRevocation.jti == jti))
+        return result.first() is not None
+
+async def revoke_token(
+    db: AsyncSession,
+    jti: Optional[str],
+    expires_at: float,
+    token_type: str = "access",
+    utilisateur_id: Optional[int] = None
+) -> Optional[str]:
+    """
+    Durably revoke a token (no-op for tokens without a jti). The caller commits,
+    then passes the returned jti to revocation_filter.add; None is returned for
+    refresh tokens, which stay out of the in-memory filter.
+    """
+    if not jti:
+        return None
+    stmt = insert(TokenRevocation).values(
+        jti=jti,
+        token_type=token_type,
+        utilisateur_id=utilisateur_id,
+        expires_at=datetime.utcfromtimestamp(expires_at),
+    ).on_conflict_do_nothing(index_elements=["jti"])
+    await db.execute(stmt)
+    return jti if token_type == "access" else None
+
+async def consume_refresh_token(
+    db: AsyncSession,
+    jti: Optional[str],
+    expires_at: float,
+    utilisateur_id: Optional[int] = None
+) -> bool:
+    """
+    Atomically mark a refresh token as used. False means it was already
+    revoked or consumed (a replay), so concurrent refreshes can't both win.
+    Tokens without a jti can't be tracked and are always accepted.
+    """
+    if not jti:
+        return True
+    stmt = insert(TokenRevocation).values(
+        jti=jti,
+        token_type="refresh",
+        utilisateur_id=utilisateur_id,
+        expires_at=datetime.utcfromtimestamp(expires_at),
+    ).on_conflict_do_nothing(index_elements=["jti"]).returning(TokenRevocation.id)
+    result = await db.execute(stmt)
+    return result.first() is not None
+
+async def is_refresh_token_revoked(jti: Optional[str]) -> bool:
+    """Exact check for refresh tokens, which are not mirrored in the filter"""
+    if not jti:
+        return False
+    return await confirm_revocation(jti)
+
+
+revocation_filter = RevocationFilter(
+    load=load_revocations,
+    confirm=confirm_revocation,
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+    recent_size=settings.REVOCATION_RECENT_SIZE,
+    sync_interval=settings.REVOCATION_SYNC_SECONDS,
+    rebuild_interval=settings.REVOCATION_REBUILD_SECONDS,
+    sync_overlap=settings.REVOCATION_SYNC_OVERLAP_IDS,
+)
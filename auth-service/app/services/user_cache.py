@@ -0,0 +1,77 @@
+# app/services/user_cache.py
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.utilisateur import Utilisateur
+
+# user_id -> (expires_at, profile); the fields /users/me needs that are not in the token
+_user_profiles: "OrderedDict[int, tuple]" = OrderedDict()
+
+# Session.info key holding user ids to invalidate once the transaction commits
+_PENDING_INVALIDATIONS = "user_cache_pending_invalidations"
+
+
+def invalidate_user(user_id) -> None:
+    """Drop a user's cached profile; call whenever the user row or its roles change"""
+    _user_profiles.pop(int(user_id), None)
+
+
+def invalidate_user_on_commit(db: AsyncSession, user_id) -> None:
+    """
+    Invalidate a user's cached profile when db's transaction commits. Dropping
+    it before the commit would let a concurrent /users/me miss re-cache the
+    old committed row for the whole TTL.
+    """
+    db.info.setdefault(_PENDING_INVALIDATIONS, set()).add(int(user_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session):
+    for user_id in session.info.pop(_PENDING_INVALIDATIONS, ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_invalidations(session):
+    session.info.pop(_PENDING_INVALIDATIONS, None)
+
+
+async def get_user_profile(db: AsyncSession, user_id) -> Optional[Dict[str, Any]]:
+    """
+    nom_utilisateur, is_verified and statut_compte for a user, from a bounded
+    TTL cache. On a miss only those three columns are read (no role/provider loads).
+    """
+    user_id = int(user_id)
+    now = time.monotonic()
+    entry = _user_profiles.get(user_id)
+    if entry is not None:
+        expires_at, profile = entry
+        if expires_at > now:
+            _user_profiles.move_to_end(user_id)
+            return profile
+        del _user_profiles[user_id]
+
+    result = await db.execute(
+        select(Utilisateur.nom_utilisateur, Utilisateur.is_verified, Utilisateur.statut_compte)
+        .where(Utilisateur.id == user_id)
+    )
+    row = result.first()
+    if row is None:
+        return None
+
+    profile = {
+        "nom_utilisateur": row.nom_utilisateur,
+        "is_verified": row.is_verified,
+        "statut_compte": row.statut_compte,
+    }
+    _user_profiles[user_id] = (now + settings.USER_CACHE_TTL_SECONDS, profile)
+    while len(_user_profiles) > settings.USER_CACHE_MAX_SIZE:
+        _user_profiles.popitem(last=False)
+    return profile
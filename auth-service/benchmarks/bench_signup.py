@@ -0,0 +1,212 @@
+"""
+Signup benchmark: verification email sent inline vs. through the outbox.
+
+Serves one test app with two signup endpoints that do the same database
+write (a stand-in for the user and verification-token rows) and differ only
+in how the verification email goes out:
+- "inline": sent before the response over a fresh SMTP connection per email,
+            as FastMail did in register (reproduced below)
+- "outbox": queue_verification_email in the same transaction, then
+            email_dispatcher.notify(); the real EmailDispatcher sends it
+
+The SMTP server is a local aiosmtpd stub that takes --smtp-delay-ms to accept
+each message, standing in for a remote provider. The report gives signup
+latency, signups/s, and for the outbox the time until every queued email was
+delivered.
+
+Needs a scratch PostgreSQL database in DATABASE_URL: the email_outbox table
+is created if missing and the benchmark's rows (@bench.invalid) are deleted
+afterwards.
+
+    cd auth-service
+    pip install uvicorn aiosmtpd
+    DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_signup.py --clients 20 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+SMTP_PORT = free_port()
+# Read by app.core.config at import time; the SMTP stub speaks plain SMTP without auth
+os.environ.update({
+    "MAIL_SERVER": "127.0.0.1",
+    "MAIL_PORT": str(SMTP_PORT),
+    "MAIL_TLS": "false",
+    "MAIL_SSL": "false",
+    "MAIL_USE_CREDENTIALS": "false",
+})
+for name, value in {
+    "SECRET_KEY": "benchmark-secret-key-of-32-bytes!",
+    "GOOGLE_CLIENT_ID": "bench",
+    "MAIL_USERNAME": "bench",
+    "MAIL_PASSWORD": "bench",
+    "MAIL_FROM": "bench@example.com",
+}.items():
+    os.environ.setdefault(name, value)
+
+import aiosmtplib  # noqa: E402
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from aiosmtpd.controller import Controller  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from sqlalchemy import delete, text  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.models.email_outbox import EmailOutbox  # noqa: E402
+from app.services.email import email_dispatcher, queue_verification_email  # noqa: E402
+from db.session import AsyncSessionLocal, engine  # noqa: E402
+
+RECIPIENT_DOMAIN = "bench.invalid"
+
+
+class SlowSMTPHandler:
+    """Accepts every message after a fixed delay and counts deliveries"""
+
+    def __init__(self, delay_ms: float):
+        self.delay = delay_ms / 1000
+        self.delivered = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.delay)
+        self.delivered += 1
+        return "250 OK"
+
+
+async def legacy_send_verification_email(email_to: str, link: str):
+    """One connection per email, like FastMail.send_message"""
+    message = f"Subject: Please verify your email\r\n\r\nClick this link to verify your email: {link}"
+    await aiosmtplib.send(
+        message,
+        sender=settings.MAIL_FROM,
+        recipients=[email_to],
+        hostname=settings.MAIL_SERVER,
+        port=settings.MAIL_PORT,
+    )
+
+
+async def write_signup(db):
+    """Stand-in for the user and verification-token inserts"""
+    await db.execute(text("SELECT 1"))
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/signup/inline")
+    async def signup_inline():
+        email = f"{uuid.uuid4().hex}@{RECIPIENT_DOMAIN}"
+        async with AsyncSessionLocal() as db:
+            await write_signup(db)
+            await db.commit()
+        await legacy_send_verification_email(email, f"https://example.com/verify-email?token={uuid.uuid4()}")
+        return {"email": email}
+
+    @app.post("/signup/outbox")
+    async def signup_outbox():
+        email = f"{uuid.uuid4().hex}@{RECIPIENT_DOMAIN}"
+        async with AsyncSessionLocal() as db:
+            await write_signup(db)
+            queue_verification_email(db, email, f"https://example.com/verify-email?token={uuid.uuid4()}")
+            await db.commit()
+        email_dispatcher.notify()
+        return {"email": email}
+
+    return app
+
+
+def percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[max(0, int(len(values) * fraction) - 1)] * 1000 if values else float("nan")
+
+
+async def run(base_url: str, variant: str, clients: int, duration: float):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.post(f"/signup/{variant}")
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "signups": len(latencies),
+        "rate": len(latencies) / elapsed,
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+        "errors": errors,
+    }
+
+
+async def wait_for_deliveries(handler: SlowSMTPHandler, expected: int, timeout: float) -> float:
+    started = time.perf_counter()
+    while handler.delivered < expected and time.perf_counter() - started < timeout:
+        await asyncio.sleep(0.05)
+    return time.perf_counter() - started
+
+
+async def main(args):
+    handler = SlowSMTPHandler(args.smtp_delay_ms)
+    smtp = Controller(handler, hostname="127.0.0.1", port=SMTP_PORT)
+    smtp.start()
+
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: EmailOutbox.__table__.create(sync_conn, checkfirst=True))
+    await email_dispatcher.start()
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(build_app(), host="127.0.0.1", port=port, log_level="warning"))
+    asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    print(f"{args.clients} clients for {args.duration}s, SMTP accepts a message in {args.smtp_delay_ms} ms")
+    print(f"{'email':<7} {'signups/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7} {'all emails out after s':>23}")
+    try:
+        for variant in args.variants:
+            delivered_before = handler.delivered
+            result = await run(f"http://127.0.0.1:{port}", variant, args.clients, args.duration)
+            drain = await wait_for_deliveries(handler, delivered_before + result["signups"], timeout=300)
+            print(f"{variant:<7} {result['rate']:>10.1f} {result['p50']:>9.1f} {result['p99']:>9.1f} "
+                  f"{result['errors']:>7} {drain:>23.1f}")
+    finally:
+        server.should_exit = True
+        await email_dispatcher.stop()
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(EmailOutbox).where(EmailOutbox.recipient.like(f"%@{RECIPIENT_DOMAIN}")))
+            await db.commit()
+        await engine.dispose()
+        smtp.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--smtp-delay-ms", type=float, default=300.0)
+    parser.add_argument("--variants", nargs="+", choices=["inline", "outbox"], default=["inline", "outbox"])
+    asyncio.run(main(parser.parse_args()))
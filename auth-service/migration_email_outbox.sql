@@ -0,0 +1,17 @@
+-- Outgoing emails written in the same transaction as the action that triggers them
+CREATE TABLE IF NOT EXISTS public.email_outbox (
+    id SERIAL PRIMARY KEY,
+    recipient VARCHAR(255) NOT NULL,
+    subject VARCHAR(255) NOT NULL,
+    body TEXT NOT NULL,
+    subtype VARCHAR(20) NOT NULL DEFAULT 'plain',
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT NOW(),
+    sent_at TIMESTAMP
+);
+
+-- The dispatcher only scans rows that are still due
+CREATE INDEX IF NOT EXISTS idx_email_outbox_pending ON public.email_outbox(next_attempt_at) WHERE status = 'pending';
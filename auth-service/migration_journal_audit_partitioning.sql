@@ -0,0 +1,57 @@
+-- journal_audit becomes a table partitioned by month on horodatage, so old
+-- months are removed with DROP TABLE instead of a long DELETE.
+-- Partitions are named journal_audit_pYYYY_MM; the retention sweeper creates
+-- upcoming months and drops the ones past AUDIT_RETENTION_MONTHS.
+BEGIN;
+
+ALTER TABLE public.journal_audit RENAME TO journal_audit_legacy;
+ALTER TABLE public.journal_audit_legacy ALTER COLUMN id DROP DEFAULT;
+ALTER SEQUENCE public.journal_audit_id_seq OWNED BY NONE;
+
+CREATE TABLE public.journal_audit (
+    id INTEGER NOT NULL DEFAULT nextval('public.journal_audit_id_seq'),
+    utilisateur_id INTEGER NOT NULL REFERENCES public.utilisateur(id) ON DELETE CASCADE,
+    action VARCHAR(100) NOT NULL,
+    horodatage TIMESTAMP NOT NULL DEFAULT NOW(),
+    details TEXT,
+    PRIMARY KEY (id, horodatage)
+) PARTITION BY RANGE (horodatage);
+
+ALTER SEQUENCE public.journal_audit_id_seq OWNED BY public.journal_audit.id;
+
+-- Per-user audit history, newest first, without scanning other users' rows
+CREATE INDEX idx_journal_audit_user_time ON public.journal_audit (utilisateur_id, horodatage);
+
+-- One partition per month from the oldest existing row to three months ahead
+DO $$
+DECLARE
+    month_start DATE;
+BEGIN
+    FOR month_start IN
+        SELECT generate_series(
+            date_trunc('month', COALESCE((SELECT MIN(horodatage) FROM public.journal_audit_legacy), NOW())),
+            date_trunc('month', NOW()) + INTERVAL '3 months',
+            INTERVAL '1 month'
+        )::date
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS public.%I PARTITION OF public.journal_audit FOR VALUES FROM (%L) TO (%L)',
+            'journal_audit_p' || to_char(month_start, 'YYYY_MM'),
+            month_start,
+            (month_start + INTERVAL '1 month')::date
+        );
+    END LOOP;
+END $$;
+
+INSERT INTO public.journal_audit (id, utilisateur_id, action, horodatage, details)
+SELECT id, utilisateur_id, action, COALESCE(horodatage, NOW()), details
+FROM public.journal_audit_legacy;
+
+DROP TABLE public.journal_audit_legacy;
+
+COMMIT;
+
+-- Expired verification tokens are swept by age
+CREATE INDEX IF NOT EXISTS idx_email_verification_created_at ON public.email_verification(created_at);
+-- Invalidated sessions are swept in batches
+CREATE INDEX IF NOT EXISTS idx_session_invalid ON public.session(id) WHERE est_valide = false;
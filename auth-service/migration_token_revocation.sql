@@ -0,0 +1,14 @@
+-- Revoked token ids (jti); services mirror the unexpired ones in memory
+CREATE TABLE IF NOT EXISTS public.token_revocation (
+    id BIGSERIAL PRIMARY KEY,
+    jti VARCHAR(64) NOT NULL UNIQUE,
+    token_type VARCHAR(20) NOT NULL DEFAULT 'access',
+    utilisateur_id INTEGER REFERENCES public.utilisateur(id) ON DELETE CASCADE,
+    expires_at TIMESTAMP NOT NULL,
+    revoked_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_token_revocation_expires_at ON public.token_revocation(expires_at);
+
+-- Added after the first version of this table: only access tokens go to the in-memory filters
+ALTER TABLE public.token_revocation ADD COLUMN IF NOT EXISTS token_type VARCHAR(20) NOT NULL DEFAULT 'access';
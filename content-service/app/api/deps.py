@@ -1,11 +1,7 @@
 from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
 from uuid import UUID
-import requests
-import os
-
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+from app.dependencies.auth import oauth2_scheme, authenticate_token
 
 class CurrentUser(BaseModel):
     id: int  # Must match your external_user_id type
@@ -18,25 +14,19 @@ class CurrentUser(BaseModel):
 
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> CurrentUser:
     """Returns a typed CurrentUser object, not a dict"""
+    user_data = await authenticate_token(token)
+    
     try:
-        # Use NGINX gateway URL for auth service in production
-        auth_service_url = os.getenv("AUTH_SERVICE_URL", "https://nginx-gateway.blackbush-661cc25b.spaincentral.azurecontainerapps.io")
-        
-        response = requests.get(
-            f"{auth_service_url}/api/v1/users/me",
-            headers={"Authorization": f"Bearer {token}"},
-            timeout=10
+        return CurrentUser(
+            # Ensure the ID is an integer
+            id=int(user_data["user_id"]),
+            email=user_data["email"],
+            is_active=user_data.get("is_active", True),
+            roles=user_data.get("roles", [])
         )
-        response.raise_for_status()
-        user_data = response.json()
-        
-        # Ensure the ID is an integer
-        user_data["id"] = int(user_data["id"])
-        
-        return CurrentUser(**user_data)
         
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Authentication failed: {str(e)}"
-        )
\ No newline at end of file
+        )
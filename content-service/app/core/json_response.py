@@ -0,0 +1,39 @@
+# app/core/json_response.py
+from typing import Any, Iterable, Optional
+
+import orjson
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+# UTC datetimes end in "Z", matching Pydantic's JSON output
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def orjson_response(content: Any, status_code: int = 200) -> Response:
+    """
+    Serialize plain dicts/lists with orjson, bypassing jsonable_encoder and
+    response_model validation. UUIDs and datetimes are encoded natively.
+    """
+    return Response(
+        content=orjson.dumps(content, option=ORJSON_OPTIONS),
+        status_code=status_code,
+        media_type="application/json",
+    )
+
+
+def raw_json(value: Optional[str]):
+    """
+    Embed an already-encoded JSON document (a JSONB column selected as text)
+    without decoding and re-encoding it.
+    """
+    return orjson.Fragment(value) if value is not None else None
+
+
+def model_list_response(adapter: TypeAdapter, rows: Iterable[Any]) -> Response:
+    """
+    Validate ORM rows once against the response schema and let pydantic-core
+    write the JSON bytes directly, instead of validating, dumping to dicts and
+    re-encoding through FastAPI's default path.
+    """
+    validated = adapter.validate_python(rows, from_attributes=True)
+    return Response(content=adapter.dump_json(validated), media_type="application/json")
@@ -0,0 +1,16 @@
+# app/core/metrics.py
+from prometheus_client import Counter, Histogram
+
+# Request metrics and the /metrics endpoint are shared with the other services
+from app.core.http_metrics import MetricsMiddleware, metrics_response  # noqa: F401
+
+# Quiz generation background run
+QUIZ_RUN_DURATION = Histogram(
+    "quiz_generation_run_duration_seconds",
+    "Duration of one quiz generation pass over all lessons",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800),
+)
+QUIZ_LESSONS = Counter("quiz_generation_lessons_total", "Lessons processed by quiz generation", ["outcome"])
+QUIZ_LESSONS_GENERATED = QUIZ_LESSONS.labels("generated")
+QUIZ_LESSONS_SKIPPED = QUIZ_LESSONS.labels("skipped")
+QUIZ_LESSONS_FAILED = QUIZ_LESSONS.labels("failed")
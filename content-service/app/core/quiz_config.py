@@ -14,4 +14,13 @@ class QuizConfig:
     # PDF base URL - updated to correct content service port
     PDF_BASE_URL = os.getenv("PDF_BASE_URL", "http://localhost:8002/static/pdfs/")  # Fixed port
 
+    # Pipeline tuning: lessons processed in parallel, lessons per DB update batch
+    QUIZ_GENERATION_CONCURRENCY = int(os.getenv("QUIZ_GENERATION_CONCURRENCY", "4"))
+    QUIZ_GENERATION_BATCH_SIZE = int(os.getenv("QUIZ_GENERATION_BATCH_SIZE", "20"))
+    
+    # Per-lesson deadline (download + generation) and retry policy
+    QUIZ_LESSON_TIMEOUT_SECONDS = float(os.getenv("QUIZ_LESSON_TIMEOUT_SECONDS", "180"))
+    QUIZ_MAX_ATTEMPTS = int(os.getenv("QUIZ_MAX_ATTEMPTS", "3"))
+    QUIZ_RETRY_BACKOFF_SECONDS = float(os.getenv("QUIZ_RETRY_BACKOFF_SECONDS", "2"))
+
 quiz_config = QuizConfig()
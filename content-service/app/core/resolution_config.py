@@ -0,0 +1,27 @@
+# app/core/resolution_config.py
+import os
+
+class ResolutionConfig:
+    # How long the scorer waits to collect concurrent answers into one batch
+    BATCH_WINDOW_MS = float(os.getenv("RESOLUTION_BATCH_WINDOW_MS", "5"))
+    
+    # Upper bound on answers encoded in a single model call
+    MAX_BATCH_SIZE = int(os.getenv("RESOLUTION_MAX_BATCH_SIZE", "64"))
+    
+    # Upper bound on answers accepted by one /resolution/score-exam request
+    MAX_EXAM_ANSWERS = int(os.getenv("RESOLUTION_MAX_EXAM_ANSWERS", "200"))
+    
+    # Number of model-answer embeddings kept in memory
+    MODEL_ANSWER_CACHE_SIZE = int(os.getenv("RESOLUTION_MODEL_ANSWER_CACHE_SIZE", "2048"))
+
+    # "lazy" loads the model on the first scoring call, "background" starts
+    # loading it right after the app begins serving
+    MODEL_LOADING = os.getenv("RESOLUTION_MODEL_LOADING", "lazy")
+    
+    # When set, scoring is delegated to a shared local scoring process
+    # (uvicorn app.scoring_server:app) instead of loading the model per worker
+    SCORER_URL = os.getenv("RESOLUTION_SCORER_URL", "")
+    
+    SCORER_TIMEOUT_SECONDS = float(os.getenv("RESOLUTION_SCORER_TIMEOUT_SECONDS", "30"))
+
+resolution_config = ResolutionConfig()
@@ -1,7 +1,8 @@
 from uuid import UUID
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, and_, literal, true, false
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import selectinload
 from datetime import datetime
 from typing import List
@@ -30,6 +31,61 @@ async def get_user_progress(
 
 
 
+SEMESTER_ORDER = ["S1", "S2", "S3", "S4"]
+
+
+async def get_semester_progress(db: AsyncSession, user_id: int) -> dict:
+    """
+    Completed/total module counts for every semester, computed in a single
+    grouped query (modules LEFT JOIN user_progress GROUP BY semester).
+
+    The result is memoized on the session, so every caller within the same
+    request reuses it. Write helpers in this module drop it again through
+    invalidate_semester_progress.
+    """
+    cache_key = ("semester_progress", user_id)
+    cached = db.info.get(cache_key)
+    if cached is not None:
+        return cached
+
+    result = await db.execute(
+        select(
+            Module.semester,
+            func.count(Module.id).label("total_modules"),
+            func.count(UserProgress.module_id)
+            .filter(UserProgress.is_module_completed == True)
+            .label("completed_modules"),
+            func.coalesce(func.sum(UserProgress.progress_percentage), 0).label("total_progress"),
+        )
+        .select_from(Module)
+        .outerjoin(
+            UserProgress,
+            and_(
+                UserProgress.module_id == Module.id,
+                UserProgress.external_user_id == user_id
+            )
+        )
+        .group_by(Module.semester)
+        .order_by(Module.semester)
+    )
+
+    semester_progress = {
+        row.semester: {
+            "completed_modules": row.completed_modules,
+            "total_modules": row.total_modules,
+            "total_progress": row.total_progress,
+        }
+        for row in result.all()
+    }
+    db.info[cache_key] = semester_progress
+    return semester_progress
+
+
+def invalidate_semester_progress(db: AsyncSession, user_id: int) -> None:
+    """Drop the memoized semester progress after a progress write"""
+    db.info.pop(("semester_progress", user_id), None)
+
+
 async def get_user_progress_with_module(
     db: AsyncSession,
     user_id: int,
@@ -155,6 +211,7 @@ async def create_user_progress(
     db.add(progress)
     await db.commit()
     await db.refresh(progress)
+    invalidate_semester_progress(db, user_id)
     return progress
 
 
@@ -172,6 +229,7 @@ async def unlock_module(
         progress.last_accessed = datetime.utcnow()
         await db.commit()
         await db.refresh(progress)
+        invalidate_semester_progress(db, user_id)
     return progress
 
 
@@ -192,6 +250,7 @@ async def mark_module_completed(
     progress.last_accessed = datetime.utcnow()
     await db.commit()
     await db.refresh(progress)
+    invalidate_semester_progress(db, user_id)
     return progress
 
 
@@ -213,6 +272,7 @@ async def update_user_progress(
     progress.last_accessed = datetime.utcnow()
     await db.commit()
     await db.refresh(progress)
+    invalidate_semester_progress(db, user_id)
     return progress
 
 
@@ -228,6 +288,7 @@ async def delete_user_progress(
     
     await db.delete(progress)
     await db.commit()
+    invalidate_semester_progress(db, user_id)
     return True
 
 
@@ -295,37 +356,13 @@ async def get_modules_with_unlock_status(db: AsyncSession, user_id: int):
 
 
 async def get_highest_unlocked_semester_for_user(db: AsyncSession, user_id: int) -> str:
-    # 1. Get all semesters ordered ascending, e.g., ["S1", "S2", "S3", ...]
-    semesters_result = await db.execute(
-        select(Module.semester).distinct().order_by(Module.semester)
-    )
-    semesters = [row[0] for row in semesters_result.all()]
+    semester_progress = await get_semester_progress(db, user_id)
 
     highest_unlocked = "S1"  # Default to first semester
 
-    for semester in semesters:
-        # 2. Get all modules in the semester
-        modules_result = await db.execute(
-            select(Module.id).where(Module.semester == semester)
-        )
-        module_ids = [row[0] for row in modules_result.all()]
-
-        # 3. Check if user completed all these modules
-        # Assuming you have UserProgress or ExamResult table to check completion
-        # For example, count modules completed by user in this semester
-        completed_result = await db.execute(
-            select(func.count())
-            .select_from(UserProgress)
-            .where(
-                UserProgress.external_user_id == user_id,
-                UserProgress.module_id.in_(module_ids),
-                UserProgress.is_module_completed == True  # or whatever field indicates completion
-            )
-        )
-        completed_count = completed_result.scalar()
-
-        # 4. Check if all modules in semester completed
-        if completed_count == len(module_ids):
+    # Semesters come back ordered ascending, e.g., ["S1", "S2", "S3", ...]
+    for semester, counts in semester_progress.items():
+        if counts["completed_modules"] == counts["total_modules"]:
             # User completed this semester fully, unlock next one
             highest_unlocked = semester
         else:
@@ -382,29 +419,16 @@ async def get_semester_completion_status(db: AsyncSession, user_id: int) -> dict
     """
     Calculate completion status for all semesters
     """
-    semesters = ["S1", "S2", "S3", "S4"]
+    semester_progress = await get_semester_progress(db, user_id)
     completion_status = {}
     
-    for semester in semesters:
-        # Get all modules in semester
-        result = await db.execute(
-            select(Module).where(Module.semester == semester)
-        )
-        semester_modules = result.scalars().all()
+    for semester in SEMESTER_ORDER:
+        counts = semester_progress.get(semester)
         
-        if not semester_modules:
-            completion_status[semester] = False
-            continue
-        
-        # Check how many are completed
-        completed_count = 0
-        for module in semester_modules:
-            progress = await get_user_progress(db, user_id, module.id)
-            if progress and progress.is_module_completed:
-                completed_count += 1
-        
-        # Semester is completed if all modules are completed
-        completion_status[semester] = completed_count == len(semester_modules)
+        # Semester is completed if it has modules and all of them are completed
+        completion_status[semester] = bool(
+            counts and counts["completed_modules"] == counts["total_modules"]
+        )
     
     return completion_status
 
@@ -476,6 +500,7 @@ async def update_module_progress_percentage(
     if progress.progress_percentage == 100 and not progress.is_module_completed:
         progress.is_module_completed = True
         progress.completed_at = datetime.utcnow()
+        invalidate_semester_progress(db, user_id)
         
         # Check if this completion unlocks next semester
         await check_and_unlock_next_semester(db, user_id)
@@ -491,28 +516,12 @@ async def check_and_unlock_next_semester(db: AsyncSession, user_id: int):
     """
     semester_completion = await get_semester_completion_status(db, user_id)
     
-    # Define progression order
-    semester_order = ["S1", "S2", "S3", "S4"]
-    
-    for i, semester in enumerate(semester_order[:-1]):  # Exclude last semester
+    for i, semester in enumerate(SEMESTER_ORDER[:-1]):  # Exclude last semester
         if semester_completion.get(semester, False):
-            next_semester = semester_order[i + 1]
-            
-            # Unlock all modules in next semester
-            result = await db.execute(
-                select(Module).where(Module.semester == next_semester)
-            )
-            next_semester_modules = result.scalars().all()
+            next_semester = SEMESTER_ORDER[i + 1]
             
-            for module in next_semester_modules:
-                progress = await get_user_progress(db, user_id, module.id)
-                if not progress:
-                    # Create unlocked progress for the module
-                    await create_user_progress(db, user_id, module.id, is_module_unlocked=True)
-                elif not progress.is_module_unlocked:
-                    # Unlock existing progress
-                    progress.is_module_unlocked = True
-                    await db.commit()
+            # Unlock all modules in next semester in one upsert
+            await unlock_semester_modules(db, user_id, next_semester)
 
 
 async def get_user_dashboard_progress(db: AsyncSession, user_id: int):
@@ -522,31 +531,15 @@ async def get_user_dashboard_progress(db: AsyncSession, user_id: int):
     # Get all user progress
     all_progress = await get_all_user_progress(db, user_id)
     
-    # Calculate semester statistics
+    # Calculate semester statistics from the shared grouped query
+    semester_progress = await get_semester_progress(db, user_id)
     semester_stats = {}
-    semesters = ["S1", "S2", "S3", "S4"]
     
-    for semester in semesters:
-        # Get modules in semester
-        result = await db.execute(
-            select(Module).where(Module.semester == semester)
-        )
-        semester_modules = result.scalars().all()
-        
-        completed_modules = 0
-        total_modules = len(semester_modules)
-        total_progress = 0
-        
-        for module in semester_modules:
-            progress = next(
-                (p for p in all_progress if p.module_id == module.id),
-                None
-            )
-            
-            if progress:
-                if progress.is_module_completed:
-                    completed_modules += 1
-                total_progress += progress.progress_percentage
+    for semester in SEMESTER_ORDER:
+        counts = semester_progress.get(semester, {})
+        completed_modules = counts.get("completed_modules", 0)
+        total_modules = counts.get("total_modules", 0)
+        total_progress = counts.get("total_progress", 0)
         
         avg_progress = (total_progress / total_modules) if total_modules > 0 else 0
         
@@ -575,12 +568,10 @@ async def is_semester_accessible(db: AsyncSession, user_id: int, target_semester
     
     semester_completion = await get_semester_completion_status(db, user_id)
     
-    semester_order = {"S1": 0, "S2": 1, "S3": 2, "S4": 3}
-    target_order = semester_order.get(target_semester, 0)
+    target_order = SEMESTER_ORDER.index(target_semester) if target_semester in SEMESTER_ORDER else 0
     
     # Check if all previous semesters are completed
-    for i in range(target_order):
-        prev_semester = list(semester_order.keys())[i]
+    for prev_semester in SEMESTER_ORDER[:target_order]:
         if not semester_completion.get(prev_semester, False):
             return False
     
@@ -594,8 +585,7 @@ async def get_current_semester(db: AsyncSession, user_id: int) -> str:
     semester_completion = await get_semester_completion_status(db, user_id)
     
     # Find the first incomplete semester
-    semesters = ["S1", "S2", "S3", "S4"]
-    for semester in semesters:
+    for semester in SEMESTER_ORDER:
         if not semester_completion.get(semester, False):
             return semester
     
@@ -603,19 +593,48 @@ async def get_current_semester(db: AsyncSession, user_id: int) -> str:
     return "S4"
 
 
-async def unlock_semester_modules(db: AsyncSession, user_id: int, semester: str):
+async def unlock_semester_modules(db: AsyncSession, user_id: int, semester: str) -> List[UserProgress]:
     """
-    Unlock all modules in a specific semester for a user
+    Unlock all modules in a specific semester for a user.
+
+    Runs as a single INSERT ... SELECT ... ON CONFLICT DO UPDATE over the
+    semester's modules in one transaction, and returns the progress rows
+    that were created or flipped to unlocked.
     """
+    now = datetime.utcnow()
+    stmt = insert(UserProgress).from_select(
+        [
+            UserProgress.external_user_id,
+            UserProgress.module_id,
+            UserProgress.is_module_unlocked,
+            UserProgress.is_module_completed,
+            UserProgress.progress_percentage,
+            UserProgress.last_accessed,
+            UserProgress.started_at,
+        ],
+        select(
+            literal(user_id),
+            Module.id,
+            true(),
+            false(),
+            literal(0),
+            literal(now),
+            literal(now),
+        ).where(Module.semester == semester),
+        include_defaults=False,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserProgress.external_user_id, UserProgress.module_id],
+        set_={"is_module_unlocked": True},
+        where=UserProgress.is_module_unlocked.is_not(True),
+    ).returning(UserProgress)
+
     result = await db.execute(
-        select(Module).where(Module.semester == semester)
+        select(UserProgress)
+        .from_statement(stmt)
+        .execution_options(populate_existing=True)
     )
-    modules = result.scalars().all()
-    
-    for module in modules:
-        progress = await get_user_progress(db, user_id, module.id)
-        if not progress:
-            await create_user_progress(db, user_id, module.id, is_module_unlocked=True)
-        elif not progress.is_module_unlocked:
-            progress.is_module_unlocked = True
-            await db.commit()
+    unlocked = result.scalars().all()
+    await db.commit()
+    invalidate_semester_progress(db, user_id)
+    return unlocked
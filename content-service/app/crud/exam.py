@@ -5,9 +5,9 @@ from sqlalchemy import and_
 from sqlalchemy import update
 from app.models.user_exams import UserExam
 from uuid import UUID
-from sqlalchemy import and_, func
+from sqlalchemy import and_, func, cast, Text
 import os
-import redis
+import redis.asyncio as aioredis
 import uuid, json
 from datetime import datetime
 from uuid import UUID
@@ -16,19 +16,36 @@ from typing import Optional, List, Dict
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
 
+# One async client per process; it owns the connection pool shared by every call
 if REDIS_PASSWORD:
-    r = redis.Redis(
+    r = aioredis.Redis(
         host=REDIS_HOST, 
         port=REDIS_PORT, 
         db=0,
         password=REDIS_PASSWORD,
         ssl=True,
         ssl_check_hostname=False,
-        ssl_cert_reqs=None
+        ssl_cert_reqs=None,
+        max_connections=REDIS_MAX_CONNECTIONS
     )
 else:
-    r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
+    r = aioredis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0, max_connections=REDIS_MAX_CONNECTIONS)
+
+# Resolve the user+module index key and the exam payload in one round-trip.
+# The exam key is built inside the script, which (like the MGET below) assumes
+# a single Redis node rather than Cluster.
+GET_EXAM_BY_INDEX_SCRIPT = r.register_script("""
+local exam_id = redis.call('GET', KEYS[1])
+if not exam_id then
+    return nil
+end
+return redis.call('GET', 'exam:' .. exam_id)
+""")
+
+async def close_redis():
+    await r.aclose()
 
 async def get_exam_by_user_and_module(db: AsyncSession, user_id: int, module_id: UUID):
     result = await db.execute(
@@ -57,22 +74,13 @@ async def get_exam_from_redis(user_id: int, module_id: UUID):
     """Get exam data from Redis using user_id + module_id index"""
     logger.info("-----Start get stuff from redis")
 
-    # First get exam_id from user+module index
+    # Index lookup and exam payload fetched together by a Lua script
     exam_id_key = f"user:{user_id}:module:{module_id}:exam"
-    logger.info("Looking for exam_id with key: %s", exam_id_key)
+    logger.info("Looking for exam with index key: %s", exam_id_key)
 
-    exam_id = r.get(exam_id_key)
-    if not exam_id:
-        logger.info("No exam_id found for key %s", exam_id_key)
-        return None
-
-    exam_id = exam_id.decode("utf-8")  # <-- decode bytes to string
-    logger.info("-----Got exam id from redis: %s", exam_id)
-
-    # Then get full exam data
-    exam_data = r.get(f"exam:{exam_id}")
+    exam_data = await GET_EXAM_BY_INDEX_SCRIPT(keys=[exam_id_key])
     if not exam_data:
-        logger.info("No exam data found for key exam:%s", exam_id)
+        logger.info("No exam found for key %s", exam_id_key)
         return None
 
     exam_data = exam_data.decode("utf-8")  # <-- decode bytes to string
@@ -81,29 +89,23 @@ async def get_exam_from_redis(user_id: int, module_id: UUID):
     return json.loads(exam_data)
 
 
+async def _get_exams_for_index(index_key: str) -> list:
+    """Fetch every exam listed in an index set with a single MGET"""
+    exam_ids = await r.smembers(index_key)
+    if not exam_ids:
+        return []
+
+    payloads = await r.mget([f"exam:{exam_id.decode('utf-8')}" for exam_id in exam_ids])
+    return [json.loads(exam_data) for exam_data in payloads if exam_data]
+
+
 async def get_user_exams_from_redis(user_id: int):
-    """Get all exam IDs for a user"""
-    exam_ids = r.smembers(f"user:{user_id}:exams")
-    exams = []
-    
-    for exam_id in exam_ids:
-        exam_data = r.get(f"exam:{exam_id}")
-        if exam_data:
-            exams.append(json.loads(exam_data))
-    
-    return exams
+    """Get all exams for a user"""
+    return await _get_exams_for_index(f"user:{user_id}:exams")
 
 async def get_module_exams_from_redis(module_id: UUID):
-    """Get all exam IDs for a module"""
-    exam_ids = r.smembers(f"module:{module_id}:exams")
-    exams = []
-    
-    for exam_id in exam_ids:
-        exam_data = r.get(f"exam:{exam_id}")
-        if exam_data:
-            exams.append(json.loads(exam_data))
-    
-    return exams
+    """Get all exams for a module"""
+    return await _get_exams_for_index(f"module:{module_id}:exams")
 
 
 async def get_user_module_attempts(db: AsyncSession, user_id: int, module_id: UUID) -> int:
@@ -210,6 +212,39 @@ async def get_module_exams_for_user(db: AsyncSession, user_id: int, module_id: U
     return result.scalars().all()
 
 
+async def get_module_exam_rows_for_user(db: AsyncSession, user_id: int, module_id: UUID):
+    """
+    Same rows as get_module_exams_for_user, as plain column tuples with the
+    JSONB content/user_answer columns read as text so they can be passed
+    straight through to the response.
+    """
+    result = await db.execute(
+        select(
+            UserExam.id,
+            UserExam.external_user_id,
+            UserExam.module_id,
+            UserExam.status,
+            cast(UserExam.content, Text).label("content"),
+            UserExam.score,
+            UserExam.correct_answers,
+            UserExam.total_questions,
+            UserExam.time_spent,
+            UserExam.attempt_number,
+            UserExam.is_retake,
+            UserExam.created_at,
+            UserExam.started_at,
+            UserExam.completed_at,
+            cast(UserExam.user_answer, Text).label("user_answer"),
+        ).where(
+            and_(
+                UserExam.external_user_id == user_id,
+                UserExam.module_id == module_id
+            )
+        )
+    )
+    return result.all()
+
+
 
 async def update_user_exam_results(
     db: AsyncSession,
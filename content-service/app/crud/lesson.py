@@ -5,6 +5,7 @@ from sqlalchemy import update, delete
 from app.models.lesson import Lesson
 from app.models.user_lesson_progress import UserLessonProgress
 from app.schemas.lesson import LessonCreate, LessonUpdate,LessonWithProgress
+from app.services.catalog_cache import catalog_cache
 from uuid import UUID
 
 async def get_lesson(db: AsyncSession, lesson_id: UUID):
@@ -29,6 +30,7 @@ async def create_lesson(db: AsyncSession, lesson_create: LessonCreate):
     db.add(new_lesson)
     await db.commit()
     await db.refresh(new_lesson)
+    await catalog_cache.bump()
     return new_lesson
 
 async def update_lesson(db: AsyncSession, lesson_id: UUID, lesson_update: LessonUpdate):
@@ -42,6 +44,7 @@ async def update_lesson(db: AsyncSession, lesson_id: UUID, lesson_update: Lesson
     stmt = update(Lesson).where(Lesson.id == lesson_id).values(**update_data).returning(Lesson)
     result = await db.execute(stmt)
     await db.commit()
+    await catalog_cache.bump()
     updated = result.fetchone()
     return updated
 
@@ -50,6 +53,7 @@ async def update_lesson_quiz_id(db: AsyncSession, lesson_id: UUID, quiz_id: str)
     stmt = update(Lesson).where(Lesson.id == lesson_id).values(quiz_id=quiz_id).returning(Lesson)
     result = await db.execute(stmt)
     await db.commit()
+    await catalog_cache.bump()
     updated = result.fetchone()
     return updated
 
@@ -67,6 +71,7 @@ async def delete_lesson(db: AsyncSession, lesson_id: UUID):
     stmt = delete(Lesson).where(Lesson.id == lesson_id)
     await db.execute(stmt)
     await db.commit()
+    await catalog_cache.bump()
 
 
 from typing import List
@@ -95,6 +100,7 @@ async def reorder_lessons_for_module(db: AsyncSession, module_id: UUID):
         )
     
     await db.commit()
+    await catalog_cache.bump()
     return len(lessons)
 
 
@@ -153,6 +159,7 @@ async def update_lesson_order(db: AsyncSession, lesson_id: UUID, new_order: int)
     
     await db.commit()
     await db.refresh(lesson)
+    await catalog_cache.bump()
     return lesson
 
 
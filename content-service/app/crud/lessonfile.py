@@ -4,6 +4,7 @@ from uuid import UUID
 
 from app.models.lesson_file import LessonFile
 from app.schemas.lessonfile import LessonFileCreate, LessonFileUpdate
+from app.services.catalog_cache import catalog_cache
 
 async def get_lessonfile(db: AsyncSession, lessonfile_id: UUID) -> LessonFile | None:
     result = await db.execute(select(LessonFile).where(LessonFile.id == lessonfile_id))
@@ -18,6 +19,7 @@ async def create_lessonfile(db: AsyncSession, lessonfile_in: LessonFileCreate) -
     db.add(new_file)
     await db.commit()
     await db.refresh(new_file)
+    await catalog_cache.bump()
     return new_file
 
 async def update_lessonfile(db: AsyncSession, lessonfile_id: UUID, update_data: LessonFileUpdate) -> LessonFile | None:
@@ -28,6 +30,7 @@ async def update_lessonfile(db: AsyncSession, lessonfile_id: UUID, update_data:
         setattr(lessonfile, key, value)
     await db.commit()
     await db.refresh(lessonfile)
+    await catalog_cache.bump()
     return lessonfile
 
 async def delete_lessonfile(db: AsyncSession, lessonfile_id: UUID) -> bool:
@@ -36,4 +39,5 @@ async def delete_lessonfile(db: AsyncSession, lessonfile_id: UUID) -> bool:
         return False
     await db.delete(lessonfile)
     await db.commit()
+    await catalog_cache.bump()
     return True
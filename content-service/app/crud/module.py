@@ -2,9 +2,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete
 from uuid import UUID
 from sqlalchemy.orm import selectinload
+from pydantic import TypeAdapter
 
 from app.models.lesson import Lesson
 from app.models.module import Module
+from app.schemas.module import ModuleReadCustom
+from app.services.catalog_cache import catalog_cache
 
 async def get_module(db: AsyncSession, module_id: UUID) -> Module | None:
     result = await db.execute(select(Module).where(Module.id == module_id))
@@ -19,6 +22,7 @@ async def create_module(db: AsyncSession, module_data) -> Module:
     db.add(new_module)
     await db.commit()
     await db.refresh(new_module)
+    await catalog_cache.bump()
     return new_module
 
 async def update_module(db: AsyncSession, module_id: UUID, update_data) -> Module | None:
@@ -29,6 +33,7 @@ async def update_module(db: AsyncSession, module_id: UUID, update_data) -> Modul
         setattr(module, key, value)
     await db.commit()
     await db.refresh(module)
+    await catalog_cache.bump()
     return module
 
 async def delete_module(db: AsyncSession, module_id: UUID) -> bool:
@@ -37,6 +42,7 @@ async def delete_module(db: AsyncSession, module_id: UUID) -> bool:
         return False
     await db.delete(module)
     await db.commit()
+    await catalog_cache.bump()
     return True
 
 
@@ -133,3 +139,28 @@ async def get_modules_with_lessons_and_files(db: AsyncSession, skip: int = 0, li
         modules_list.append(module_dict)
 
     return modules_list
+
+
+# =================== CACHED CATALOG (serialized JSON) ===================
+
+module_list_adapter = TypeAdapter(List[ModuleReadCustom])
+
+
+def serialize_modules(modules) -> bytes:
+    validated = module_list_adapter.validate_python(modules, from_attributes=True)
+    return module_list_adapter.dump_json(validated)
+
+
+async def get_full_json(db: AsyncSession, skip: int = 0, limit: int = 100) -> bytes:
+    """get_full serialized as List[ModuleReadCustom], served from the catalog cache"""
+    async def build():
+        return serialize_modules(await get_full(db, skip, limit))
+    return await catalog_cache.get_or_build(("full", skip, limit), build)
+
+
+async def get_full_by_moduleid_json(db: AsyncSession, moduleid: UUID) -> bytes:
+    """get_full_by_moduleid serialized as List[ModuleReadCustom], served from the catalog cache"""
+    async def build():
+        return serialize_modules(await get_full_by_moduleid(db, moduleid))
+    return await catalog_cache.get_or_build(("full_by_module", moduleid), build)
+
@@ -0,0 +1,73 @@
+# app/crud/quiz_generation_job.py
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import update
+from datetime import datetime, timedelta
+from typing import Iterable
+from uuid import UUID
+
+from app.models.quiz_generation_job import QuizGenerationJob
+
+async def create_quiz_job(db: AsyncSession, lesson_id: UUID) -> QuizGenerationJob:
+    job = QuizGenerationJob(lesson_id=lesson_id, status="pending", progress=0, message="Waiting for a worker")
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+async def get_quiz_job(db: AsyncSession, job_id: UUID) -> QuizGenerationJob | None:
+    result = await db.execute(select(QuizGenerationJob).where(QuizGenerationJob.id == job_id))
+    return result.scalars().first()
+
+async def update_quiz_job(db: AsyncSession, job_id: UUID, **fields) -> None:
+    fields["updated_at"] = datetime.utcnow()
+    await db.execute(update(QuizGenerationJob).where(QuizGenerationJob.id == job_id).values(**fields))
+    await db.commit()
+
+async def touch_quiz_jobs(db: AsyncSession, job_ids: Iterable[UUID]) -> None:
+    """Heartbeat for unfinished jobs this process still owns, so sweeps skip them"""
+    job_ids = list(job_ids)
+    if not job_ids:
+        return
+    await db.execute(
+        update(QuizGenerationJob)
+        .where(QuizGenerationJob.id.in_(job_ids), QuizGenerationJob.status.in_(["pending", "running"]))
+        .values(updated_at=datetime.utcnow())
+    )
+    await db.commit()
+
+async def fail_quiz_jobs(db: AsyncSession, job_ids: Iterable[UUID], error: str) -> int:
+    """Fail the given jobs unless they already finished"""
+    job_ids = list(job_ids)
+    if not job_ids:
+        return 0
+    result = await db.execute(
+        update(QuizGenerationJob)
+        .where(QuizGenerationJob.id.in_(job_ids), QuizGenerationJob.status.in_(["pending", "running"]))
+        .values(status="failed", error=error, updated_at=datetime.utcnow())
+    )
+    await db.commit()
+    return result.rowcount or 0
+
+async def fail_interrupted_quiz_jobs(db: AsyncSession, stale_after_minutes: int) -> int:
+    """
+    Jobs left pending/running by a process that died lost their queued temp
+    file and will never finish. Live processes heartbeat the jobs they own
+    (touch_quiz_jobs), so only jobs without an update for stale_after_minutes
+    are touched.
+    """
+    stale_before = datetime.utcnow() - timedelta(minutes=stale_after_minutes)
+    result = await db.execute(
+        update(QuizGenerationJob)
+        .where(
+            QuizGenerationJob.status.in_(["pending", "running"]),
+            QuizGenerationJob.updated_at < stale_before
+        )
+        .values(
+            status="failed",
+            error="Interrupted by a service restart, please upload the PDF again",
+            updated_at=datetime.utcnow()
+        )
+    )
+    await db.commit()
+    return result.rowcount or 0
@@ -0,0 +1,108 @@
+# app/db/metrics.py
+# Vendored from shared/pool_metrics.py: edit it there and run `python shared/sync.py`
+"""
+Connection pool counters and the slow-query log for the services' async
+SQLAlchemy engines (auth and content).
+"""
+import logging
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+logger = logging.getLogger("db.slow_query")
+
+
+class PoolStats:
+    """Counters for connection pool activity, read by /metrics/db"""
+
+    def __init__(self):
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self.connections_invalidated = 0
+        self.checkouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.slow_queries = 0
+
+    def record_wait(self, seconds: float):
+        self.checkouts += 1
+        self.wait_time_total += seconds
+        self.wait_time_max = max(self.wait_time_max, seconds)
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_stats.record_wait(time.perf_counter() - start)
+
+
+def instrument_engine(engine: AsyncEngine, slow_query_ms: float):
+    """Attach connection churn counters and the slow-query log to an engine"""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine.pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        pool_stats.connections_opened += 1
+
+    @event.listens_for(sync_engine.pool, "close")
+    def on_close(dbapi_connection, connection_record):
+        pool_stats.connections_closed += 1
+
+    @event.listens_for(sync_engine.pool, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        pool_stats.connections_invalidated += 1
+
+    if slow_query_ms <= 0:
+        return
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+        if elapsed_ms >= slow_query_ms:
+            pool_stats.slow_queries += 1
+            logger.warning(f"🐢 Slow query ({elapsed_ms:.1f} ms): {' '.join(statement.split())[:500]}")
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        # The failed statement never reaches after_cursor_execute
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+
+def get_pool_metrics(engine: AsyncEngine) -> Dict[str, Any]:
+    """Snapshot of pool occupancy plus the counters collected since startup"""
+    pool = engine.sync_engine.pool
+    is_queue_pool = isinstance(pool, AsyncAdaptedQueuePool)
+    return {
+        "pool_class": type(pool).__name__,
+        "pool_size": pool.size() if is_queue_pool else None,
+        "checked_out": pool.checkedout() if is_queue_pool else None,
+        "idle": pool.checkedin() if is_queue_pool else None,
+        "overflow": pool.overflow() if is_queue_pool else None,
+        "checkouts": pool_stats.checkouts,
+        "wait_time_ms": {
+            "total": round(pool_stats.wait_time_total * 1000, 2),
+            "max": round(pool_stats.wait_time_max * 1000, 2),
+            "avg": round(pool_stats.wait_time_total * 1000 / pool_stats.checkouts, 3) if pool_stats.checkouts else 0.0,
+        },
+        "connections_opened": pool_stats.connections_opened,
+        "connections_closed": pool_stats.connections_closed,
+        "connections_invalidated": pool_stats.connections_invalidated,
+        "slow_queries": pool_stats.slow_queries,
+    }
@@ -0,0 +1,145 @@
+# app/db/query_stats.py
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger("db.request_queries")
+
+# Off by default: the Server-Timing header exposes DB timings to every client,
+# so enable it for debugging, staging or load tests only
+SQL_INSTRUMENTATION_ENABLED = os.getenv("SQL_INSTRUMENTATION_ENABLED", "false").lower() == "true"
+# The same statement shape run this many times in one request is reported as a likely N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+
+_whitespace = re.compile(r"\s+")
+_bind_list = re.compile(r"\$\d+(?:::[A-Z]+)?(?:\s*,\s*\$\d+(?:::[A-Z]+)?)*")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so calls differing only in bound values compare equal"""
+    return _bind_list.sub("?", _whitespace.sub(" ", statement).strip())
+
+
+class QueryStats:
+    """Statements executed while handling one request (or inside track_queries)"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.duration += seconds
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated_shapes(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> Dict[str, int]:
+        return {shape: n for shape, n in self.shapes.items() if n >= threshold}
+
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+@contextmanager
+def track_queries():
+    """Collect every statement executed in this context into a fresh QueryStats"""
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+
+
+def instrument_queries(engine: AsyncEngine):
+    """Feed statement counts and timings into the current request's QueryStats"""
+    if not SQL_INSTRUMENTATION_ENABLED:
+        return
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and current_query_stats.get() is not None:
+            context._request_query_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = current_query_stats.get()
+        start = getattr(context, "_request_query_start", None)
+        if stats is not None and start is not None:
+            stats.record(statement, time.perf_counter() - start)
+
+
+def server_timing(stats: QueryStats, total_seconds: float) -> str:
+    """Server-Timing header value: DB time with the query count, plus total handler time"""
+    return (
+        f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", '
+        f"app;dur={total_seconds * 1000:.1f}"
+    )
+
+
+async def sql_instrumentation_middleware(request, call_next):
+    """
+    HTTP middleware counting statements and DB time per request; reports them
+    via Server-Timing and the request log. Register with app.middleware("http").
+    """
+    start = time.perf_counter()
+    with track_queries() as stats:
+        response = await call_next(request)
+    elapsed = time.perf_counter() - start
+    response.headers["Server-Timing"] = server_timing(stats, elapsed)
+    log_request_queries(request.method, request.url.path, response.status_code, stats, elapsed)
+    return response
+
+
+def log_request_queries(method: str, path: str, status_code: int, stats: QueryStats, total_seconds: float):
+    """One structured log line per request that touched the database"""
+    if not stats.count:
+        return
+    repeated = stats.repeated_shapes()
+    record = {
+        "event": "request_sql",
+        "method": method,
+        "path": path,
+        "status": status_code,
+        "queries": stats.count,
+        "db_ms": round(stats.duration * 1000, 2),
+        "total_ms": round(total_seconds * 1000, 2),
+        "n_plus_one": [
+            {"count": n, "statement": shape[:300]}
+            for shape, n in sorted(repeated.items(), key=lambda item: -item[1])
+        ],
+    }
+    if repeated:
+        logger.warning(json.dumps(record))
+    else:
+        logger.info(json.dumps(record))
+
+
+# =================== TEST HELPERS ===================
+
+_query_count = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def query_count_from_response(response) -> int:
+    """Statement count reported in a response's Server-Timing header"""
+    match = _query_count.search(response.headers.get("server-timing", ""))
+    if match is None:
+        raise AssertionError("Response has no db Server-Timing entry; is SQL instrumentation enabled?")
+    return int(match.group(1))
+
+
+def assert_max_queries(response, max_queries: int):
+    """Fail when the request behind response ran more than max_queries statements"""
+    count = query_count_from_response(response)
+    if count > max_queries:
+        raise AssertionError(f"Expected at most {max_queries} queries, got {count}")
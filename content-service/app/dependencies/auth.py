@@ -1,9 +1,13 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from collections import OrderedDict
+import hashlib
 import httpx
 import os
+import time
 import jwt
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
+from app.services.revocation import revocation_filter
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -14,6 +18,16 @@ ALGORITHM = "HS256"
 # Get auth service URL from environment - updated to correct auth service port
 AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://localhost:8001") + "/api/v1/users/me"
 
+# Recently validated tokens, keyed by token hash and kept until their exp
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+# Cache lifetime for auth-service answers whose token carries no readable exp
+TOKEN_CACHE_FALLBACK_TTL = int(os.getenv("AUTH_TOKEN_CACHE_TTL_SECONDS", "60"))
+
+_token_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+# Shared pooled client for the auth-service fallback, created on first use
+_auth_client: Optional[httpx.AsyncClient] = None
+
 def decode_jwt_locally(token: str) -> Optional[dict]:
     """
     Decode JWT token locally (faster than calling auth service)
@@ -23,6 +37,11 @@ def decode_jwt_locally(token: str) -> Optional[dict]:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         
+        # Refresh (and service) tokens are signed with the same key but are not
+        # bearer credentials; refresh revocations never reach the filter either
+        if payload.get("token_type") != "access":
+            return None
+        
         # Check if this is new format (has email and roles) or old format (just sub and exp)
         if "email" in payload and "roles" in payload:
             # New format token
@@ -36,6 +55,7 @@ def decode_jwt_locally(token: str) -> Optional[dict]:
                 "email": payload["email"],
                 "roles": payload["roles"],
                 "exp": payload["exp"],
+                "jti": payload.get("jti"),
                 "token_format": "new"
             }
         else:
@@ -49,28 +69,80 @@ def decode_jwt_locally(token: str) -> Optional[dict]:
                 "email": None,  # Not available in old format
                 "roles": [],    # Not available in old format
                 "exp": payload["exp"],
+                "jti": payload.get("jti"),
                 "token_format": "old"
             }
     except jwt.PyJWTError:
         return None
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> Dict[str, Any]:
+def _token_cache_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def _get_cached_user(cache_key: str) -> Optional[Dict[str, Any]]:
+    """Return the memoized user for a token hash if it has not expired yet"""
+    entry = _token_cache.get(cache_key)
+    if entry is None:
+        return None
+    
+    expires_at, user_info = entry
+    if expires_at <= time.time():
+        _token_cache.pop(cache_key, None)
+        return None
+    
+    _token_cache.move_to_end(cache_key)
+    return user_info
+
+def _cache_user(cache_key: str, user_info: Dict[str, Any], expires_at: float) -> None:
+    """Memoize a validated token, evicting the least recently used entries"""
+    _token_cache[cache_key] = (expires_at, user_info)
+    _token_cache.move_to_end(cache_key)
+    while len(_token_cache) > TOKEN_CACHE_MAX_SIZE:
+        _token_cache.popitem(last=False)
+
+def _unverified_claims(token: str) -> Tuple[Optional[float], Optional[str], Optional[str]]:
     """
-    Get current user info from JWT token.
-    First tries local decoding (faster), falls back to auth service if needed.
+    Read exp, jti and token_type without verifying the signature (only used
+    after the auth service accepted the token)
     """
-    # Try local JWT decoding first (faster)
-    if SECRET_KEY and SECRET_KEY != "your-secret-key":
-        user_info = decode_jwt_locally(token)
-        if user_info:
-            return user_info
-    
-    # Fallback to auth service verification
+    try:
+        payload = jwt.decode(token, options={"verify_signature": False})
+    except jwt.PyJWTError:
+        return None, None, None
+    try:
+        exp = float(payload["exp"])
+    except (KeyError, TypeError, ValueError):
+        exp = None
+    return exp, payload.get("jti"), payload.get("token_type")
+
+async def _reject_if_revoked(jti: Optional[str]) -> None:
+    if await revocation_filter.is_revoked(jti):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+
+def get_auth_client() -> httpx.AsyncClient:
+    """Shared keep-alive client used when a token has to be checked by the auth service"""
+    global _auth_client
+    if _auth_client is None:
+        _auth_client = httpx.AsyncClient(
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=10)
+        )
+    return _auth_client
+
+async def close_auth_client() -> None:
+    global _auth_client
+    if _auth_client is not None:
+        await _auth_client.aclose()
+        _auth_client = None
+
+async def verify_with_auth_service(token: str) -> Dict[str, Any]:
+    """Validate a token against the auth service's /users/me (non-blocking, pooled)"""
     headers = {"Authorization": f"Bearer {token}"}
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(AUTH_SERVICE_URL, headers=headers, timeout=10.0)
+        response = await get_auth_client().get(AUTH_SERVICE_URL, headers=headers)
         
         if response.status_code != 200:
             raise HTTPException(
@@ -78,8 +150,14 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> Dict[str, Any
                 detail="Invalid credentials"
             )
         
-        return response.json()
+        user_info = response.json()
+        # /users/me answers with "id"; local decoding exposes it as both keys
+        user_info.setdefault("user_id", user_info.get("id"))
+        user_info.setdefault("roles", [])
+        return user_info
     
+    except HTTPException:
+        raise
     except httpx.TimeoutException:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -91,6 +169,49 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> Dict[str, Any
             detail="Authentication failed"
         )
 
+async def authenticate_token(token: str) -> Dict[str, Any]:
+    """
+    Single authentication path for every content-service dependency.
+    Recently validated tokens are answered from an LRU cache until they expire;
+    otherwise the token is verified locally with the shared signing key, and
+    only falls back to the auth service when local verification is not possible
+    (no key configured, or an old-format token without email/roles).
+    Revocation is checked on every call, cached or not, against the in-memory
+    revocation filter.
+    """
+    cache_key = _token_cache_key(token)
+    user_info = _get_cached_user(cache_key)
+    if user_info is not None:
+        await _reject_if_revoked(user_info.get("jti"))
+        return user_info
+    
+    # Try local JWT decoding first (faster)
+    if SECRET_KEY and SECRET_KEY != "your-secret-key":
+        user_info = decode_jwt_locally(token)
+        if user_info and user_info["token_format"] == "new":
+            await _reject_if_revoked(user_info["jti"])
+            _cache_user(cache_key, user_info, float(user_info["exp"]))
+            return user_info
+    
+    # Fallback to auth service verification (which checks revocation itself)
+    user_info = await verify_with_auth_service(token)
+    exp, jti, token_type = _unverified_claims(token)
+    if token_type != "access":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid credentials"
+        )
+    user_info["jti"] = jti
+    _cache_user(cache_key, user_info, exp or time.time() + TOKEN_CACHE_FALLBACK_TTL)
+    return user_info
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> Dict[str, Any]:
+    """
+    Get current user info from JWT token.
+    First tries local decoding (faster), falls back to auth service if needed.
+    """
+    return await authenticate_token(token)
+
 def require_role(required_role: str):
     """
     Dependency factory to require specific roles in Content Service.
@@ -5,7 +5,8 @@ import time
 import datetime
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.routers import lessons  # import your lessons router
 from app.routers import modules  # import your lessons router
@@ -19,19 +20,64 @@ from app.routers import exams  # import admin router
 from app.routers import alternative_exams  # import admin router
 from app.routers import users_progress, user_lesson_progress
 from app.services.quiz_background_service import quiz_background_service
-from app.db.session import get_db
+from app.services.quiz_job_service import quiz_job_service
+from app.db.session import get_db, engine
+from app.db.metrics import get_pool_metrics
+from app.core.metrics import MetricsMiddleware, metrics_response
+from app.db.query_stats import SQL_INSTRUMENTATION_ENABLED, sql_instrumentation_middleware
+from app.dependencies.auth import close_auth_client
+from app.services.revocation import revocation_filter
+from app.crud.exam import close_redis
+from app.services.resolution_scoring import resolution_scoring_service
+from app.core.resolution_config import resolution_config
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the resolution model after the app starts serving, if configured;
+    # otherwise it is loaded lazily on the first scoring request
+    warm_up_task = None
+    if resolution_config.MODEL_LOADING == "background":
+        warm_up_task = asyncio.create_task(resolution_scoring_service.warm_up())
+    await quiz_job_service.start()
+    await revocation_filter.start()
+    yield
+    if warm_up_task is not None and not warm_up_task.done():
+        warm_up_task.cancel()
+        try:
+            await warm_up_task
+        except asyncio.CancelledError:
+            pass
+    await revocation_filter.stop()
+    await quiz_job_service.stop()
+    # Release pooled connections held for auth-service token checks
+    await close_auth_client()
+    await resolution_scoring_service.shutdown()
+    await close_redis()
+    await quiz_background_service.close()
+    await engine.dispose()
+
+
 app = FastAPI(
     title="E-Learning Content Service", 
     description="Content management and quiz generation service",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
+app.add_middleware(MetricsMiddleware)
+
+# =================== SQL INSTRUMENTATION ===================
+
+if SQL_INSTRUMENTATION_ENABLED:
+    # Count statements and DB time per request; reported via Server-Timing and the request log
+    app.middleware("http")(sql_instrumentation_middleware)
+
 # =================== HEALTH CHECK ENDPOINTS ===================
 
 @app.get("/health")
@@ -83,6 +129,21 @@ async def detailed_health_check(db: AsyncSession = Depends(get_db)):
         "response_time_ms": total_response_time
     }
 
+# =================== METRICS ENDPOINTS ===================
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint: per-route traffic, latency, sizes, errors and quiz generation runs"""
+    return metrics_response()
+
+@app.get("/metrics/db")
+async def database_pool_metrics():
+    """
+    Connection pool occupancy, checkout wait time, connection churn
+    and slow-query count since startup.
+    """
+    return get_pool_metrics(engine)
+
 app.include_router(lessons.router)
 app.include_router(modules.router)
 app.include_router(quiz.router)
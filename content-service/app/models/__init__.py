@@ -5,4 +5,5 @@ from .teacher import Teacher
 from .moduleteacher import ModuleTeacher
 from .user_progress import UserProgress
 from .user_exams import UserExam
-from .alternative_exam import AlternativeExam
\ No newline at end of file
+from .alternative_exam import AlternativeExam
+from .quiz_generation_job import QuizGenerationJob
\ No newline at end of file
@@ -21,6 +21,7 @@ class Lesson(Base):
     completed = Column(Boolean, default=False, nullable=False)
     quiz_id = Column(String, nullable=True)
     quiz_json = Column(JSONB, nullable=True)
+    pdf_fingerprint = Column(String, nullable=True)  # ETag/Last-Modified or sha256 of the PDF the quiz was generated from
     vimeo_id = Column(String, nullable=True)  # Store Vimeo video ID separately
     video_type = Column(String, nullable=True)  # Type: 'vimeo', 'youtube', 'local', etc.
     
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, ForeignKey, Integer, DateTime, String, Text
+from app.db.session import Base
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+import uuid
+
+class QuizGenerationJob(Base):
+    __tablename__ = "quiz_generation_job"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    lesson_id = Column(UUID(as_uuid=True), ForeignKey("lesson.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    # Job progress
+    status = Column(String(20), default='pending', nullable=False)  # 'pending', 'running', 'completed', 'failed'
+    progress = Column(Integer, default=0, nullable=False)  # Percentage
+    message = Column(String(255), nullable=True)
+    error = Column(Text, nullable=True)
+    quiz_id = Column(String, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
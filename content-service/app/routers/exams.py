@@ -11,6 +11,7 @@ from app.crud.exam import (
     update_user_exam,
     get_user_exams,
     get_module_exams_for_user,
+    get_module_exam_rows_for_user,
     get_user_passed_exams_count,
     get_exam_from_redis,
     get_user_module_attempts,
@@ -18,6 +19,7 @@ from app.crud.exam import (
 )
 from app.db.session import get_db
 from app.schemas.exam import ExamCreate, ExamUpdate, ExamResponse,ExamCreatedResponse,ExamResultUpdate
+from app.core.json_response import orjson_response, raw_json
 import logging
 logging.basicConfig(
     level=logging.INFO,
@@ -105,28 +107,29 @@ async def get_user_module_exams(
     current_user: dict = Depends(get_current_user)
 ):
 
-    exams = await get_module_exams_for_user(db, current_user.id, module_id)
-
-    return [
-        ExamResponse(
-            id=e.id,
-            user_id=e.external_user_id,   # map DB field to Pydantic field
-            status=e.status,
-            content=e.content,
-            module_id=e.module_id,
-            score=e.score,
-            correct_answers=e.correct_answers,
-            total_questions=e.total_questions,
-            time_spent=e.time_spent,
-            attempt_number=e.attempt_number,
-            is_retake=e.is_retake,
-            created_at=e.created_at,
-            started_at=e.started_at,
-            completed_at=e.completed_at,
-            user_answer=e.user_answer,
-        )
+    # Rows are already shaped like ExamResponse; JSONB blobs are passed through as raw JSON
+    exams = await get_module_exam_rows_for_user(db, current_user.id, module_id)
+
+    return orjson_response([
+        {
+            "user_id": e.external_user_id,   # map DB field to response field
+            "module_id": e.module_id,
+            "id": e.id,
+            "score": e.score,
+            "status": e.status,
+            "content": raw_json(e.content),
+            "correct_answers": e.correct_answers,
+            "total_questions": e.total_questions,
+            "time_spent": e.time_spent,
+            "attempt_number": e.attempt_number if e.attempt_number is not None else 1,
+            "is_retake": bool(e.is_retake),
+            "created_at": e.created_at,
+            "started_at": e.started_at,
+            "completed_at": e.completed_at,
+            "user_answer": raw_json(e.user_answer),
+        }
         for e in exams
-    ]
+    ])
 
 @router.get("/{exam_id}", response_model=ExamResponse)
 async def get_exam_by_id_endpoint(exam_id: UUID, db: AsyncSession = Depends(get_db)):
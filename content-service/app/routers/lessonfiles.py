@@ -1,8 +1,13 @@
 
 # app/api/v1/endpoints/lessonfiles.py
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+import asyncio
+import functools
+import hashlib
+import tempfile
 import uuid
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from uuid import UUID
@@ -20,10 +25,7 @@ from app.crud.lessonfile import (
 from dotenv import load_dotenv
 load_dotenv()
 import json
-import redis
 
-r = redis.Redis(host="localhost", port=6379, db=0, decode_responses=True)
-AGENT_SERVICE_URL = "http://localhost:8004" 
 router = APIRouter(prefix="/lessonfiles", tags=["LessonFiles"])
 
 
@@ -40,24 +42,97 @@ supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 # Supabase storage bucket name for PDFs
 PDF_BUCKET = "Lessons"
 
+# Upload limits: files are streamed in chunks and never held whole in memory
+MAX_PDF_SIZE = 50 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
-async def upload_to_supabase(file: UploadFile) -> str:
+# The Supabase storage client is synchronous; its calls run on this bounded pool
+# instead of the event loop
+storage_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("STORAGE_UPLOAD_WORKERS", "4")),
+    thread_name_prefix="supabase-storage"
+)
+
+
+async def run_storage_call(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(storage_executor, functools.partial(func, *args, **kwargs))
+
+
+class SpooledUpload:
+    """An uploaded file spooled to a temp file, with its size and content hash"""
+
+    def __init__(self, path: str, size: int, sha256: str, filename: str, content_type: Optional[str]):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self.filename = filename
+        self.content_type = content_type
+
+    def release(self) -> str:
+        """Hand the temp file over to another owner (who deletes it); cleanup() becomes a no-op"""
+        path, self.path = self.path, None
+        return path
+
+    def cleanup(self):
+        if self.path is None:
+            return
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+async def spool_upload(file: UploadFile, max_size: int = MAX_PDF_SIZE) -> SpooledUpload:
+    """
+    Stream an UploadFile to a temp file in chunks, enforcing the size limit
+    and computing the SHA-256 on the fly.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_size:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="File size too large. Maximum size is 50MB"
+                )
+            digest.update(chunk)
+            await asyncio.to_thread(tmp.write, chunk)
+    except BaseException:
+        tmp.close()
+        os.unlink(tmp.name)
+        raise
+    tmp.close()
+
+    return SpooledUpload(
+        path=tmp.name,
+        size=size,
+        sha256=digest.hexdigest(),
+        filename=file.filename,
+        content_type=file.content_type
+    )
+
+
+async def upload_to_supabase(upload: SpooledUpload) -> str:
     try:
         # Generate unique filename
-        file_extension = file.filename.split('.')[-1] if '.' in file.filename else 'pdf'
+        file_extension = upload.filename.split('.')[-1] if upload.filename and '.' in upload.filename else 'pdf'
         unique_filename = f"{uuid.uuid4()}.{file_extension}"
 
-        # Read file bytes
-        file_content = await file.read()
-        file.file.seek(0)
-
-        # Upload file to Supabase
+        # Upload file to Supabase straight from the spooled temp file
         try:
-            upload_response = supabase.storage.from_(PDF_BUCKET).upload(
+            upload_response = await run_storage_call(
+                supabase.storage.from_(PDF_BUCKET).upload,
                 path=unique_filename,
-                file=file_content,
+                file=upload.path,
                 file_options={
-                    "content-type": file.content_type or "application/pdf",
+                    "content-type": upload.content_type or "application/pdf",
                     "upsert": False
                 }
             )
@@ -86,7 +161,7 @@ async def upload_to_supabase(file: UploadFile) -> str:
         except Exception as url_error:
             # Clean up the uploaded file if URL generation fails
             try:
-                supabase.storage.from_(PDF_BUCKET).remove([unique_filename])
+                await run_storage_call(supabase.storage.from_(PDF_BUCKET).remove, [unique_filename])
             except Exception as cleanup_error:
                 logging.error(f"Failed to cleanup uploaded file: {cleanup_error}")
                 
@@ -108,7 +183,7 @@ async def delete_from_supabase(file_url: str) -> bool:
         filename = file_url.split('/')[-1].split('?')[0]
         
         # Supabase v2 returns the deleted file info
-        result = supabase.storage.from_(PDF_BUCKET).remove([filename])
+        result = await run_storage_call(supabase.storage.from_(PDF_BUCKET).remove, [filename])
         
         # Check if operation succeeded
         if isinstance(result, list) and any(f['name'] == filename for f in result):
@@ -156,23 +231,17 @@ async def upload_pdf(file: UploadFile = File(...)):
             detail="Only PDF files are allowed"
         )
 
-    # Validate size
-    max_size = 50 * 1024 * 1024
-    contents = await file.read()
-    if len(contents) > max_size:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="File size too large. Maximum size is 50MB"
-        )
-    file.file.seek(0)
+    # Stream to a temp file, validating size and hashing as we go
+    upload = await spool_upload(file)
 
     try:
-        pdf_url = await upload_to_supabase(file)
+        pdf_url = await upload_to_supabase(upload)
         return {
             "message": "PDF uploaded successfully",
             "pdf_url": pdf_url,
             "filename": file.filename,
-            "size": len(contents),
+            "size": upload.size,
+            "sha256": upload.sha256,
             "uploaded_at": datetime.utcnow().isoformat()
         }
     except Exception as e:
@@ -180,6 +249,8 @@ async def upload_pdf(file: UploadFile = File(...)):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Unexpected error during upload: {str(e)}"
         )
+    finally:
+        upload.cleanup()
 
 
 @router.post("/", response_model=LessonFileRead, status_code=status.HTTP_201_CREATED)
@@ -254,12 +325,19 @@ async def delete_lesson_pdf(
 
 
 from fastapi import Form
+from fastapi.responses import StreamingResponse
 from sqlalchemy import update
 from app.models import Lesson
-import httpx
+from app.crud.quiz_generation_job import create_quiz_job, get_quiz_job, update_quiz_job
+from app.db.session import AsyncSessionLocal
+from app.services.quiz_job_service import quiz_job_service, QuizJobQueueFull
+from app.services.catalog_cache import catalog_cache
 
 from app.db.session import get_db
 
+# Upper bound for one job events stream; clients reconnect or poll the job after it
+QUIZ_JOB_EVENTS_MAX_SECONDS = float(os.getenv("QUIZ_JOB_EVENTS_MAX_SECONDS", "900"))
+
 
  # change to your agent service URL
 
@@ -284,13 +362,17 @@ async def upload_and_create_lesson_pdf(
             detail="Only PDF files are allowed"
         )
 
+    # Stream to a temp file, validating size and hashing as we go
+    upload = await spool_upload(file)
+    pdf_url = None
+
     try:
         # Check if a file already exists
         existing_files = await get_lessonfiles_by_lesson(db, lesson_id)
         existing_file = existing_files[0] if existing_files else None
 
         # Upload PDF to Supabase
-        pdf_url = await upload_to_supabase(file)
+        pdf_url = await upload_to_supabase(upload)
         file_data = {
             "lesson_id": lesson_id,
             "filename": title,
@@ -310,60 +392,32 @@ async def upload_and_create_lesson_pdf(
         # Update Lesson row pdf column
         await db.execute(update(Lesson).where(Lesson.id == lesson_id).values(pdf=pdf_url))
         await db.commit()
+        await catalog_cache.bump()
 
-        # ---------------- Trigger Quiz Generation ----------------
-        quiz_json = None
+        # ---------------- Queue Quiz Generation ----------------
+        # Generation runs in a background worker; the client polls the job
+        job = await create_quiz_job(db, lesson_id)
         try:
-            file_content = await file.read()  # read file once
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-        f"{AGENT_SERVICE_URL}/upload-quiz",
-        files={"pdf": (file.filename, file_content, file.content_type)},
-        timeout=60.0
-    )
-
-                if response.status_code != 200:
-                    content = await response.text()
-                    print(f"Agent failed: {response.status_code} - {content}")
-                    raise Exception("Agent failed to process PDF")
-
-    # ✅ Async JSON parsing
-                print("----------------")
-                print(response)
-                print("----------------")
-                response_bytes = await response.aread()  # async read
-                
-                print("----------------")
-                print(response_bytes)
-                print("----------------")
-                response_data = json.loads(response_bytes)
-                
-
-                print("----------------")
-                print(response_data)
-                print("----------------")
-                quiz_id = response_data.get("quizId")
-                if quiz_id:
-                    # Fetch quiz JSON from Redis
-                    print("-----------------------------------")
-                    print("------quiz id",quiz_id)
-                    quiz_data = r.get(quiz_id)
-                    print("-----------------------------------")
-                    if quiz_data:
-                        quiz_json = json.loads(quiz_data)
-                        # Save quiz JSON in Lesson table
-                        await db.execute(
-                            update(Lesson).where(Lesson.id == lesson_id).values(quiz_json=quiz_json)
-                        )
-                        await db.commit()
-        except Exception as quiz_error:
-            print(f"⚠️ Quiz generation failed: {quiz_error}")
+            # Only the temp file path is queued; the worker streams it to the agent
+            quiz_job_service.enqueue(
+                job.id, lesson_id, upload.path,
+                file.filename, file.content_type or "application/pdf"
+            )
+            upload.release()
+        except QuizJobQueueFull as queue_error:
+            await update_quiz_job(db, job.id, status="failed", error=str(queue_error))
+            job.status = "failed"
 
         return {
             "message": f"PDF {action} successfully",
             "lesson_file": lesson_file_obj,
             "pdf_url": pdf_url,
-            "quiz": quiz_json,
+            "quiz_job": {
+                "id": job.id,
+                "status": job.status,
+                "status_url": f"/lessonfiles/jobs/{job.id}",
+                "events_url": f"/lessonfiles/jobs/{job.id}/events"
+            },
             "action": action
         }
 
@@ -371,11 +425,72 @@ async def upload_and_create_lesson_pdf(
         raise
     except Exception as e:
         # Clean up newly uploaded PDF on error
-        await delete_from_supabase(pdf_url)
+        if pdf_url:
+            await delete_from_supabase(pdf_url)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to process lesson file: {str(e)}"
         )
+    finally:
+        upload.cleanup()
+
+
+def serialize_quiz_job(job) -> dict:
+    return {
+        "id": str(job.id),
+        "lesson_id": str(job.lesson_id),
+        "status": job.status,
+        "progress": job.progress,
+        "message": job.message,
+        "error": job.error,
+        "quiz_id": job.quiz_id,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_quiz_job_status(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the progress of a quiz generation job"""
+    job = await get_quiz_job(db, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Quiz generation job not found"
+        )
+    return serialize_quiz_job(job)
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_quiz_job_events(job_id: UUID):
+    """Server-Sent Events stream reporting job progress until it completes, fails or times out"""
+    async def event_stream():
+        last_state = None
+        deadline = asyncio.get_running_loop().time() + QUIZ_JOB_EVENTS_MAX_SECONDS
+        while True:
+            async with AsyncSessionLocal() as db:
+                job = await get_quiz_job(db, job_id)
+            if not job:
+                yield "event: error\ndata: {\"detail\": \"Quiz generation job not found\"}\n\n"
+                return
+
+            state = (job.status, job.progress, job.message)
+            if state != last_state:
+                last_state = state
+                yield f"data: {json.dumps(serialize_quiz_job(job))}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+
+            if job.status in ("completed", "failed"):
+                return
+            if asyncio.get_running_loop().time() >= deadline:
+                yield "event: timeout\ndata: {\"detail\": \"Job still in progress, poll its status_url\"}\n\n"
+                return
+            await asyncio.sleep(1)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
 
 
 # Health check endpoint
@@ -384,7 +499,7 @@ async def health_check():
     """Health check for PDF upload service"""
     try:
         # Test Supabase connection
-        buckets = supabase.storage.list_buckets()
+        buckets = await run_storage_call(supabase.storage.list_buckets)
         
         return {
             "status": "healthy",
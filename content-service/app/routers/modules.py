@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status,Path
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from uuid import UUID
 
 from app.db.session import get_db
 from app.schemas.module import ModuleRead, ModuleCreate, ModuleUpdate,ModuleReadCustom,ModuleDetailedResponse
-from app.crud.module import get_modules, create_module, update_module, delete_module,get_full,get_full_by_moduleid
+from app.crud.module import get_modules, create_module, update_module, delete_module,get_full_json,get_full_by_moduleid_json
 from app.dependencies.roles import require_any_role
 from app.models import Module  # Assurez-vous que le modèle Module est importé correctement
 
@@ -58,11 +59,9 @@ async def read_full(
     limit: int = 100,
     db: AsyncSession = Depends(get_db)
 ):
-    # This already returns a list of Module objects
-    modules = await get_full(db, skip, limit)
-    
-    # Convert SQLAlchemy models to Pydantic models
-    return [ModuleReadCustom.model_validate(module) for module in modules]
+    # Serialized List[ModuleReadCustom] from the catalog cache; a hit skips the ORM and Pydantic
+    body = await get_full_json(db, skip, limit)
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/full/{moduleid}", response_model=List[ModuleReadCustom])
@@ -70,9 +69,8 @@ async def read_full_by_moduleid(
     moduleid: UUID = Path(..., description="ID of the module"),
     db: AsyncSession = Depends(get_db)
 ):
-    
-    modules = await get_full_by_moduleid(db, moduleid)
-    return [ModuleReadCustom.model_validate(module) for module in modules]
+    body = await get_full_by_moduleid_json(db, moduleid)
+    return Response(content=body, media_type="application/json")
 
 
 """
@@ -31,14 +31,16 @@ async def start_background_quiz_generation(
 
 @router.post("/process-now")
 async def process_lessons_now(
+    force: bool = False,
     user=Depends(require_any_role("admin"))
 ):
     """
-    Manually trigger quiz generation for all lessons without quiz_id.
+    Manually trigger quiz generation for lessons whose PDF changed.
+    Pass ?force=true to regenerate every lesson's quiz regardless of its fingerprint.
     This is useful for immediate processing or testing.
     """
     try:
-        success = await quiz_background_service.process_now()
+        success = await quiz_background_service.process_now(force=force)
         if success:
             return {"message": "Lessons processed successfully"}
         else:
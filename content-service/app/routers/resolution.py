@@ -1,20 +1,33 @@
 from fastapi import APIRouter
-from pydantic import BaseModel
-from sentence_transformers import SentenceTransformer, util
-from pathlib import Path
+from pydantic import BaseModel, Field
+from typing import List
+from app.core.resolution_config import resolution_config
+from app.services.resolution_scoring import resolution_scoring_service
 router = APIRouter(prefix="/resolution", tags=["Resolution"])
-MODEL_PATH = Path(__file__).resolve().parent.parent / "model" / "all-MiniLM-L6-v2"
-model = SentenceTransformer(str(MODEL_PATH))
 
 class ResolutionAnswer(BaseModel):
     questionId: int
     studentAnswer: str
     modelAnswer: str
 
+class ExamResolutionAnswers(BaseModel):
+    answers: List[ResolutionAnswer] = Field(..., max_length=resolution_config.MAX_EXAM_ANSWERS)
+
 @router.post("/score-resolution")
-def score_resolution(answer: ResolutionAnswer):
-    emb_model = model.encode(answer.modelAnswer, convert_to_tensor=True)
-    emb_student = model.encode(answer.studentAnswer, convert_to_tensor=True)
-    similarity = util.cos_sim(emb_model, emb_student).item()
+async def score_resolution(answer: ResolutionAnswer):
+    similarity = await resolution_scoring_service.score(answer.studentAnswer, answer.modelAnswer)
     score = round(similarity * 100)  # convert similarity to percentage
     return {"questionId": answer.questionId, "score": score, "similarity": similarity}
+
+@router.post("/score-exam")
+async def score_exam_resolution(exam: ExamResolutionAnswers):
+    """Score every resolution answer of an exam in one batched call"""
+    similarities = await resolution_scoring_service.score_many(
+        [(answer.studentAnswer, answer.modelAnswer) for answer in exam.answers]
+    )
+    return {
+        "results": [
+            {"questionId": answer.questionId, "score": round(similarity * 100), "similarity": similarity}
+            for answer, similarity in zip(exam.answers, similarities)
+        ]
+    }
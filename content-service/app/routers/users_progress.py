@@ -18,7 +18,9 @@ from app.schemas.user_progress import (
     ModuleWithUnlockStatus
 )
 from typing import List, Optional
+from pydantic import TypeAdapter
 from app.api.deps import get_current_user
+from app.core.json_response import model_list_response
 from app.crud.crud_user_progress import (
     get_user_progress_with_module, 
     get_user_progress_by_semester, 
@@ -31,6 +33,7 @@ from app.crud.crud_user_progress import (
     create_user_progress,
     delete_user_progress,
     get_semester_completion_status,
+    get_semester_progress,
     is_module_unlocked_for_user,
     calculate_module_progress_percentage,
     update_module_progress_percentage,
@@ -43,6 +46,9 @@ from app.crud.crud_user_progress import (
 
 router = APIRouter(prefix="/userprogress", tags=["User_Progress"])
 
+# Large list responses are validated once and written to JSON by pydantic-core
+progress_list_adapter = TypeAdapter(List[UserProgressWithModule])
+
 # CREATE USER PROGRESS
 @router.post("/", response_model=UserProgressSchema, status_code=status.HTTP_201_CREATED)
 async def create_progress(
@@ -110,17 +116,17 @@ async def get_user_progress_list(
     if module_id:
         # Get progress for specific module
         progress = await get_user_progress_with_module(db, target_user_id, module_id)
-        return [progress] if progress else []
+        return model_list_response(progress_list_adapter, [progress] if progress else [])
     
     elif semester:
         # Get progress for specific semester
         progress_list = await get_user_progress_by_semester(db, target_user_id, semester)
-        return progress_list
+        return model_list_response(progress_list_adapter, progress_list)
     
     else:
         # Get all progress for user
         progress_list = await get_all_user_progress(db, target_user_id)
-        return progress_list
+        return model_list_response(progress_list_adapter, progress_list)
 
 
 # UPDATE USER PROGRESS
@@ -217,23 +223,15 @@ async def check_semester_completion(
     target_user_id = user_id if user_id is not None else current_user.id
     
     try:
-        # Get all modules in the semester
-        result = await db.execute(
-            select(Module).where(Module.semester == semester)
-        )
-        semester_modules = result.scalars().all()
+        # Completed/total counts for every semester in one grouped query
+        semester_progress = await get_semester_progress(db, target_user_id)
+        counts = semester_progress.get(semester)
         
-        if not semester_modules:
+        if not counts:
             return {"completed": False, "reason": "No modules found for semester"}
         
-        # Check how many modules are completed
-        completed_count = 0
-        total_count = len(semester_modules)
-        
-        for module in semester_modules:
-            progress = await get_user_progress(db, target_user_id, module.id)
-            if progress and progress.is_module_completed:
-                completed_count += 1
+        completed_count = counts["completed_modules"]
+        total_count = counts["total_modules"]
         
         is_completed = completed_count == total_count
         completion_percentage = (completed_count / total_count * 100) if total_count > 0 else 0
@@ -254,13 +252,13 @@ async def check_semester_completion(
 
 
 # LEGACY ENDPOINTS - Keep for backward compatibility
-@router.get("/allusers", response_model=List[ModuleWithUnlockStatus])
+@router.get("/allusers", response_model=List[UserProgressWithModule])
 async def list_all_users_progress(
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Get all users progress - Admin only"""
-    return await get_all_users_progress(db)
+    return model_list_response(progress_list_adapter, await get_all_users_progress(db))
 
 
 @router.get("/modulesProgress", response_model=List[ModuleWithUnlockStatus])
@@ -364,15 +362,12 @@ async def initialize_user_progress(
             }
         
         # Unlock all S1 modules for new user
-        await unlock_semester_modules(db, current_user.id, "S1")
-        
-        # Get updated progress count
-        new_progress = await get_all_user_progress(db, current_user.id)
+        unlocked = await unlock_semester_modules(db, current_user.id, "S1")
         
         return {
             "message": "User progress initialized successfully",
             "unlocked_semester": "S1",
-            "modules_unlocked": len(new_progress)
+            "modules_unlocked": len(unlocked)
         }
         
     except Exception as e:
@@ -426,8 +421,11 @@ async def unlock_semester(
             detail="Invalid semester. Must be S1, S2, S3, or S4"
         )
     
-    await unlock_semester_modules(db, current_user.id, semester)
-    return {"message": f"Semester {semester} unlocked successfully"}
+    unlocked = await unlock_semester_modules(db, current_user.id, semester)
+    return {
+        "message": f"Semester {semester} unlocked successfully",
+        "modules_unlocked": len(unlocked)
+    }
 
 
 from app.services.progress_utils import try_unlock_next_semester_async
@@ -481,17 +479,17 @@ async def get_user_progress_list(
     if module_id:
         # Get progress for specific module
         progress = await get_user_progress_with_module(db, target_user_id, module_id)
-        return [progress] if progress else []
+        return model_list_response(progress_list_adapter, [progress] if progress else [])
     
     elif semester:
         # Get progress for specific semester
         progress_list = await get_user_progress_by_semester(db, target_user_id, semester)
-        return progress_list
+        return model_list_response(progress_list_adapter, progress_list)
     
     else:
         # Get all progress for user
         progress_list = await get_all_user_progress(db, target_user_id)
-        return progress_list
+        return model_list_response(progress_list_adapter, progress_list)
 
 
 # GET USER PROGRESS BY MODULE ID - SPECIFIC ENDPOINT FOR FRONTEND
@@ -514,4 +512,4 @@ async def get_progress_by_module(
             )
     
     progress = await get_user_progress_with_module(db, target_user_id, module_id)
-    return [progress] if progress else []
+    return model_list_response(progress_list_adapter, [progress] if progress else [])
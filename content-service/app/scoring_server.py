@@ -0,0 +1,65 @@
+# app/scoring_server.py
+"""
+Standalone resolution scoring process.
+
+Run one instance next to the content-service workers, e.g.
+    uvicorn app.scoring_server:app --host 127.0.0.1 --port 8010
+and point the workers at it with RESOLUTION_SCORER_URL=http://127.0.0.1:8010,
+so the embedding model is loaded once instead of once per worker.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import List
+
+from fastapi import FastAPI
+from pydantic import BaseModel, Field
+
+from app.core.resolution_config import resolution_config
+from app.services.resolution_scoring import ResolutionScoringService
+
+scorer = ResolutionScoringService()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warm_up = asyncio.create_task(scorer.warm_up())
+    yield
+    warm_up.cancel()
+    await scorer.shutdown()
+
+
+app = FastAPI(title="E-Learning Resolution Scorer", lifespan=lifespan)
+
+
+class ScorePair(BaseModel):
+    studentAnswer: str
+    modelAnswer: str
+
+
+class ScoreManyRequest(BaseModel):
+    pairs: List[ScorePair] = Field(..., max_length=resolution_config.MAX_EXAM_ANSWERS)
+
+
+@app.get("/health")
+async def health_check():
+    return {"status": "healthy", "service": "resolution-scorer", "model_loaded": scorer.is_loaded}
+
+
+@app.post("/warmup")
+async def warmup():
+    await scorer.warm_up()
+    return {"model_loaded": scorer.is_loaded}
+
+
+@app.post("/score")
+async def score(pair: ScorePair):
+    similarity = await scorer.score(pair.studentAnswer, pair.modelAnswer)
+    return {"similarity": similarity}
+
+
+@app.post("/score-many")
+async def score_many(request: ScoreManyRequest):
+    similarities = await scorer.score_many(
+        [(pair.studentAnswer, pair.modelAnswer) for pair in request.pairs]
+    )
+    return {"similarities": similarities}
@@ -0,0 +1,70 @@
+# app/services/catalog_cache.py
+import logging
+import os
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable, Optional, Tuple
+
+from app.crud.exam import r
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_KEY = "catalog:version"
+CATALOG_CACHE_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "256"))
+
+
+class CatalogCache:
+    """
+    In-process cache of serialized module/lesson catalog responses.
+
+    Every entry is tagged with the catalog version it was built from. Writes to
+    modules, lessons and lesson files bump that version in Redis, so all workers
+    drop their stale entries on the next read.
+    """
+
+    def __init__(self, max_entries: int = CATALOG_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[int, bytes]]" = OrderedDict()
+
+    async def current_version(self) -> Optional[int]:
+        """Shared catalog version, or None when Redis cannot be reached"""
+        try:
+            version = await r.get(CATALOG_VERSION_KEY)
+        except Exception as e:
+            logger.warning(f"Catalog version unavailable, bypassing cache: {str(e)}")
+            return None
+        return int(version or 0)
+
+    async def bump(self):
+        """Invalidate every worker's catalog entries; call after the write is committed"""
+        self._entries.clear()
+        try:
+            await r.incr(CATALOG_VERSION_KEY)
+        except Exception as e:
+            logger.error(f"Failed to bump catalog version: {str(e)}")
+
+    async def get_or_build(self, key: Hashable, build: Callable[[], Awaitable[bytes]]) -> bytes:
+        """
+        Return the cached bytes for key when they match the current version,
+        otherwise build, store and return them.
+        """
+        # Read the version before building: a write landing mid-build bumps it,
+        # so the entry stored below is already stale and gets rebuilt next time
+        version = await self.current_version()
+        if version is None:
+            return await build()
+
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        body = await build()
+        self._entries[key] = (version, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return body
+
+
+# Global instance
+catalog_cache = CatalogCache()
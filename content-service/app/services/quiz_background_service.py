@@ -1,15 +1,19 @@
 # app/services/quiz_background_service.py
 import asyncio
+import hashlib
 import logging
 import httpx
-from typing import Optional
+from typing import Optional, Dict, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update
+from sqlalchemy import update, values, column, String
+from sqlalchemy.dialects.postgresql import UUID
 
 from app.models.lesson import Lesson
-from app.db.session import get_db
+from app.db.session import AsyncSessionLocal
 from app.core.quiz_config import quiz_config
+from app.services.catalog_cache import catalog_cache
+from app.core.metrics import QUIZ_RUN_DURATION, QUIZ_LESSONS_GENERATED, QUIZ_LESSONS_SKIPPED, QUIZ_LESSONS_FAILED
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,57 +22,107 @@ logger = logging.getLogger(__name__)
 class QuizBackgroundService:
     def __init__(self):
         self.is_running = False
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    def get_client(self) -> httpx.AsyncClient:
+        """Shared pooled client for PDF downloads and quiz microservice uploads"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=quiz_config.HTTP_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=quiz_config.QUIZ_GENERATION_CONCURRENCY * 2,
+                    max_keepalive_connections=quiz_config.QUIZ_GENERATION_CONCURRENCY * 2
+                )
+            )
+        return self._client
+    
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        
+    def _resolve_pdf_source(self, pdf_url: str) -> Tuple[bool, str]:
+        """Return (is_local_file, location) for the different PDF path formats"""
+        if pdf_url.startswith(('http://', 'https://')):
+            # Already a full URL
+            return False, pdf_url
+        if pdf_url.startswith(('C:', 'D:', '/', '\\')):
+            # Local file path
+            return True, pdf_url
+        # Relative filename - construct URL
+        return False, quiz_config.PDF_BASE_URL + pdf_url.lstrip('/')
+    
+    @staticmethod
+    def _read_local_file(path: str) -> bytes:
+        with open(path, 'rb') as f:
+            return f.read()
+    
+    async def _read_pdf(self, pdf_url: str) -> Optional[bytes]:
+        """Read a lesson PDF from disk or download it"""
+        is_local, location = self._resolve_pdf_source(pdf_url)
         
-    async def call_quiz_microservice(self, pdf_url: str) -> Optional[str]:
+        if is_local:
+            logger.info(f"📁 Detected local file path: {location}")
+            try:
+                # Off the event loop: lesson PDFs can be large
+                pdf_content = await asyncio.to_thread(self._read_local_file, location)
+                logger.info(f"✅ Read local PDF file, size: {len(pdf_content)} bytes")
+                return pdf_content
+            except FileNotFoundError:
+                logger.error(f"❌ Local PDF file not found: {location}")
+                return None
+            except Exception as e:
+                logger.error(f"❌ Error reading local PDF file {location}: {str(e)}")
+                return None
+        
+        # Download the PDF content from URL
+        logger.info(f"⬇️ Downloading PDF from: {location}")
+        pdf_response = await self.get_client().get(location)
+        if pdf_response.status_code != 200:
+            logger.error(f"❌ Failed to download PDF from {location} - Status: {pdf_response.status_code}")
+            return None
+        
+        pdf_content = pdf_response.content
+        logger.info(f"✅ Downloaded PDF content, size: {len(pdf_content)} bytes")
+        return pdf_content
+    
+    async def probe_pdf_fingerprint(self, pdf_url: str) -> Optional[str]:
+        """
+        Cheap fingerprint from the storage validators (ETag, then Last-Modified)
+        using a HEAD request, so unchanged PDFs are never downloaded.
+        Returns None when the source exposes no validator.
+        """
+        is_local, location = self._resolve_pdf_source(pdf_url)
+        if is_local:
+            return None
+        
+        try:
+            response = await self.get_client().head(location)
+        except Exception as e:
+            logger.warning(f"HEAD request failed for {location}: {str(e)}")
+            return None
+        
+        if response.status_code != 200:
+            return None
+        if response.headers.get("etag"):
+            return f"etag:{response.headers['etag']}"
+        if response.headers.get("last-modified"):
+            return f"last-modified:{response.headers['last-modified']}"
+        return None
+    
+    @staticmethod
+    def content_fingerprint(pdf_content: bytes) -> str:
+        return f"sha256:{hashlib.sha256(pdf_content).hexdigest()}"
+    
+    async def call_quiz_microservice(self, pdf_url: str, pdf_content: Optional[bytes] = None) -> Optional[str]:
         """Call the external quiz microservice to generate quiz from PDF"""
         try:
-            # Handle different PDF path formats
-            if pdf_url.startswith(('http://', 'https://')):
-                # Already a full URL
-                full_pdf_url = pdf_url
-                logger.info(f"Using full PDF URL: {full_pdf_url}")
-                print(f"🌐 Using full PDF URL: {full_pdf_url}")
-            elif pdf_url.startswith(('C:', 'D:', '/', '\\')):
-                # Local file path - try to read directly
-                logger.info(f"Detected local file path: {pdf_url}")
-                print(f"📁 Detected local file path: {pdf_url}")
-                try:
-                    with open(pdf_url, 'rb') as f:
-                        pdf_content = f.read()
-                    logger.info(f"Read local PDF file, size: {len(pdf_content)} bytes")
-                    print(f"✅ Read local PDF file, size: {len(pdf_content)} bytes")
-                    
-                    # Skip download step and go directly to quiz generation
-                    return await self._send_pdf_to_quiz_service(pdf_content, pdf_url)
-                except FileNotFoundError:
-                    logger.error(f"Local PDF file not found: {pdf_url}")
-                    print(f"❌ Local PDF file not found: {pdf_url}")
-                    return None
-                except Exception as e:
-                    logger.error(f"Error reading local PDF file {pdf_url}: {str(e)}")
-                    print(f"❌ Error reading local PDF: {str(e)}")
+            if pdf_content is None:
+                pdf_content = await self._read_pdf(pdf_url)
+                if pdf_content is None:
                     return None
-            else:
-                # Relative filename - construct URL
-                full_pdf_url = quiz_config.PDF_BASE_URL + pdf_url.lstrip('/')
-                logger.info(f"Converted relative PDF path '{pdf_url}' to full URL: {full_pdf_url}")
-                print(f"📁 Converting PDF path: {pdf_url} → {full_pdf_url}")
             
-            # Download the PDF content from URL
-            async with httpx.AsyncClient(timeout=quiz_config.HTTP_TIMEOUT_SECONDS) as client:
-                logger.info(f"Downloading PDF from: {full_pdf_url}")
-                print(f"⬇️ Downloading PDF from: {full_pdf_url}")
-                pdf_response = await client.get(full_pdf_url)
-                if pdf_response.status_code != 200:
-                    logger.error(f"Failed to download PDF from {full_pdf_url} - Status: {pdf_response.status_code}")
-                    print(f"❌ Failed to download PDF - Status: {pdf_response.status_code}")
-                    return None
-                
-                pdf_content = pdf_response.content
-                logger.info(f"Downloaded PDF content, size: {len(pdf_content)} bytes")
-                print(f"✅ Downloaded PDF, size: {len(pdf_content)} bytes")
-                
-                return await self._send_pdf_to_quiz_service(pdf_content, pdf_url)
+            return await self._send_pdf_to_quiz_service(pdf_content, pdf_url)
                     
         except Exception as e:
             logger.error(f"Error calling quiz microservice for PDF {pdf_url}: {str(e)}")
@@ -78,30 +132,29 @@ class QuizBackgroundService:
     async def _send_pdf_to_quiz_service(self, pdf_content: bytes, original_path: str) -> Optional[str]:
         """Send PDF content to quiz microservice"""
         try:
-            async with httpx.AsyncClient(timeout=quiz_config.HTTP_TIMEOUT_SECONDS) as client:
-                # Prepare the file for upload to quiz microservice
-                files = {"pdf": ("lesson.pdf", pdf_content, "application/pdf")}
-                
-                # Call quiz generation microservice
-                logger.info(f"Calling quiz microservice at: {quiz_config.QUIZ_MICROSERVICE_URL}")
-                print(f"🔗 Calling quiz microservice...")
-                quiz_response = await client.post(quiz_config.QUIZ_MICROSERVICE_URL, files=files)
-                
-                if quiz_response.status_code == 200:
-                    quiz_data = quiz_response.json()
-                    quiz_id = quiz_data.get("quizId")
-                    if quiz_id:
-                        logger.info(f"🎉 SUCCESS! Generated quiz with ID: {quiz_id} for PDF: {original_path}")
-                        print(f"🎉 QUIZ GENERATED: {quiz_id}")
-                        return quiz_id
-                    else:
-                        logger.error("Quiz microservice returned invalid response - no quizId")
-                        print("❌ Quiz microservice returned invalid response")
-                        return None
+            # Prepare the file for upload to quiz microservice
+            files = {"pdf": ("lesson.pdf", pdf_content, "application/pdf")}
+            
+            # Call quiz generation microservice
+            logger.info(f"Calling quiz microservice at: {quiz_config.QUIZ_MICROSERVICE_URL}")
+            print(f"🔗 Calling quiz microservice...")
+            quiz_response = await self.get_client().post(quiz_config.QUIZ_MICROSERVICE_URL, files=files)
+            
+            if quiz_response.status_code == 200:
+                quiz_data = quiz_response.json()
+                quiz_id = quiz_data.get("quizId")
+                if quiz_id:
+                    logger.info(f"🎉 SUCCESS! Generated quiz with ID: {quiz_id} for PDF: {original_path}")
+                    print(f"🎉 QUIZ GENERATED: {quiz_id}")
+                    return quiz_id
                 else:
-                    logger.error(f"Quiz microservice returned status {quiz_response.status_code} - Response: {quiz_response.text}")
-                    print(f"❌ Quiz microservice error - Status: {quiz_response.status_code}")
+                    logger.error("Quiz microservice returned invalid response - no quizId")
+                    print("❌ Quiz microservice returned invalid response")
                     return None
+            else:
+                logger.error(f"Quiz microservice returned status {quiz_response.status_code} - Response: {quiz_response.text}")
+                print(f"❌ Quiz microservice error - Status: {quiz_response.status_code}")
+                return None
         except Exception as e:
             logger.error(f"Error sending PDF to quiz service: {type(e).__name__}: {str(e)}")
             print(f"❌ Error sending PDF to quiz service: {type(e).__name__}: {str(e)}")
@@ -115,7 +168,10 @@ class QuizBackgroundService:
             return None
     
     async def get_lessons_without_quiz(self, db: AsyncSession):
-        """Get all lessons that have PDF content (including those with existing quiz_id for regeneration)"""
+        """
+        Get all lessons that have PDF content (including those with existing quiz_id).
+        Lessons whose PDF fingerprint is unchanged are skipped later, per lesson.
+        """
         try:
             stmt = select(Lesson).where(
                 Lesson.pdf.isnot(None),
@@ -127,67 +183,153 @@ class QuizBackgroundService:
             logger.error(f"Error getting lessons with PDF: {str(e)}")
             return []
     
-    async def update_lesson_quiz_id(self, db: AsyncSession, lesson_id, quiz_id: str):
-        """Update lesson with the generated quiz_id"""
+    async def update_lessons_quiz_ids(self, db: AsyncSession, generated: Dict[object, Tuple[str, Optional[str]]]):
+        """
+        Write a whole batch of generated quiz_ids and PDF fingerprints
+        in one UPDATE ... FROM (VALUES ...)
+        """
+        if not generated:
+            return True
         try:
-            stmt = update(Lesson).where(Lesson.id == lesson_id).values(quiz_id=quiz_id)
+            rows = values(
+                column("lesson_id", UUID(as_uuid=True)),
+                column("quiz_id", String),
+                column("pdf_fingerprint", String),
+                name="generated"
+            ).data([(lesson_id, quiz_id, fingerprint) for lesson_id, (quiz_id, fingerprint) in generated.items()])
+            stmt = (
+                update(Lesson)
+                .where(Lesson.id == rows.c.lesson_id)
+                .values(quiz_id=rows.c.quiz_id, pdf_fingerprint=rows.c.pdf_fingerprint)
+            )
             await db.execute(stmt)
             await db.commit()
+            await catalog_cache.bump()
             return True
         except Exception as e:
-            logger.error(f"Error updating lesson {lesson_id} with quiz_id: {str(e)}")
+            await db.rollback()
+            logger.error(f"Error updating {len(generated)} lessons with quiz_ids: {str(e)}")
             return False
     
-    async def process_lessons_for_quiz_generation(self):
-        """Process all lessons that need quiz generation"""
+    async def generate_quiz_if_changed(self, lesson, force: bool = False) -> Optional[dict]:
+        """
+        Regenerate a lesson's quiz only when its PDF fingerprint changed.
+        Returns {"skipped": True} for unchanged PDFs, {"quiz_id", "pdf_fingerprint"}
+        on success and None on failure.
+        """
+        def is_unchanged(fingerprint: Optional[str]) -> bool:
+            return (
+                not force
+                and bool(lesson.quiz_id)
+                and fingerprint is not None
+                and fingerprint == lesson.pdf_fingerprint
+            )
+        
+        fingerprint = await self.probe_pdf_fingerprint(lesson.pdf)
+        if is_unchanged(fingerprint):
+            return {"skipped": True}
+        
+        pdf_content = await self._read_pdf(lesson.pdf)
+        if pdf_content is None:
+            return None
+        
+        if fingerprint is None:
+            # No storage validator available - fall back to hashing the bytes
+            fingerprint = self.content_fingerprint(pdf_content)
+            if is_unchanged(fingerprint):
+                return {"skipped": True}
+        
+        quiz_id = await self.call_quiz_microservice(lesson.pdf, pdf_content)
+        if not quiz_id:
+            return None
+        return {"quiz_id": quiz_id, "pdf_fingerprint": fingerprint}
+    
+    async def generate_quiz_with_retries(self, lesson, force: bool = False) -> Optional[dict]:
+        """Generate a quiz for one lesson under a per-lesson deadline, retrying with backoff"""
+        for attempt in range(1, quiz_config.QUIZ_MAX_ATTEMPTS + 1):
+            try:
+                result = await asyncio.wait_for(
+                    self.generate_quiz_if_changed(lesson, force),
+                    timeout=quiz_config.QUIZ_LESSON_TIMEOUT_SECONDS
+                )
+                if result:
+                    return result
+            except asyncio.TimeoutError:
+                logger.warning(f"⏱️ Quiz generation timed out for lesson {lesson.id} (attempt {attempt})")
+            except Exception as e:
+                # Transient network/storage errors get the same retries as a failed attempt
+                logger.warning(f"⚠️ Quiz generation failed for lesson {lesson.id} (attempt {attempt}): {type(e).__name__}: {str(e)}")
+            
+            if attempt < quiz_config.QUIZ_MAX_ATTEMPTS:
+                backoff = quiz_config.QUIZ_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+                logger.info(f"🔁 Retrying lesson {lesson.id} in {backoff}s (attempt {attempt + 1}/{quiz_config.QUIZ_MAX_ATTEMPTS})")
+                await asyncio.sleep(backoff)
+        
+        return None
+    
+    async def process_lessons_for_quiz_generation(self, force: bool = False):
+        """Process all lessons whose PDF changed (or every lesson when force=True)"""
+        with QUIZ_RUN_DURATION.time():
+            await self._process_lessons_for_quiz_generation(force)
+    
+    async def _process_lessons_for_quiz_generation(self, force: bool):
         try:
-            async for db in get_db():
-                try:
-                    # Get all lessons with PDFs (including those with existing quiz_ids)
-                    lessons = await self.get_lessons_without_quiz(db)
-                    logger.info(f"📚 Found {len(lessons)} lessons with PDFs to process for quiz generation/regeneration")
-                    print(f"📚 Found {len(lessons)} lessons with PDFs (including existing quiz_ids)")
-                    
-                    if len(lessons) == 0:
-                        logger.info("✅ No lessons with PDFs found!")
-                        print("✅ No lessons with PDFs found!")
-                    
-                    for lesson in lessons:
-                        try:
-                            existing_quiz_status = "🔄 UPDATING" if lesson.quiz_id else "🆕 CREATING"
-                            logger.info(f"Processing lesson {lesson.id}: {lesson.title} ({existing_quiz_status})")
-                            print(f"{existing_quiz_status} quiz for: {lesson.title}")
-                            
-                            # Generate quiz using microservice
-                            quiz_id = await self.call_quiz_microservice(lesson.pdf)
-                            
-                            if quiz_id:
-                                # Update lesson with new quiz_id (overwrites existing if present)
-                                success = await self.update_lesson_quiz_id(db, lesson.id, quiz_id)
-                                if success:
-                                    if lesson.quiz_id:
-                                        logger.info(f"🔄 Successfully UPDATED lesson {lesson.id} with NEW quiz_id: {quiz_id} (replaced old: {lesson.quiz_id})")
-                                        print(f"🔄 UPDATED: {lesson.title} → NEW Quiz ID: {quiz_id}")
-                                    else:
-                                        logger.info(f"✅ Successfully CREATED quiz for lesson {lesson.id} with quiz_id: {quiz_id}")
-                                        print(f"✅ CREATED: {lesson.title} → Quiz ID: {quiz_id}")
-                                else:
-                                    logger.error(f"❌ Failed to update lesson {lesson.id} in database")
-                            else:
-                                logger.warning(f"⚠️ Failed to generate quiz for lesson {lesson.id}: {lesson.title}")
-                                
-                        except Exception as e:
-                            logger.error(f"Error processing lesson {lesson.id}: {str(e)}")
-                            continue
-                            
-                except Exception as e:
-                    logger.error(f"Error in quiz generation process: {str(e)}")
-                finally:
-                    await db.close()
-                break  # Only need one iteration of the async generator
+            # Load the candidates and release the connection: the batches below
+            # spend minutes on PDF downloads and agent calls, and each gets its
+            # own short session for the write
+            async with AsyncSessionLocal() as db:
+                # Get all lessons with PDFs (including those with existing quiz_ids)
+                lessons = await self.get_lessons_without_quiz(db)
+            logger.info(f"📚 Found {len(lessons)} lessons with PDFs to process for quiz generation/regeneration")
+            print(f"📚 Found {len(lessons)} lessons with PDFs (including existing quiz_ids)")
+            
+            if len(lessons) == 0:
+                logger.info("✅ No lessons with PDFs found!")
+                print("✅ No lessons with PDFs found!")
+            
+            semaphore = asyncio.Semaphore(quiz_config.QUIZ_GENERATION_CONCURRENCY)
+            
+            async def process_lesson(lesson):
+                async with semaphore:
+                    existing_quiz_status = "🔄 UPDATING" if lesson.quiz_id else "🆕 CREATING"
+                    logger.info(f"Processing lesson {lesson.id}: {lesson.title} ({existing_quiz_status})")
+                    print(f"{existing_quiz_status} quiz for: {lesson.title}")
+                    try:
+                        return await self.generate_quiz_with_retries(lesson, force)
+                    except Exception as e:
+                        logger.error(f"Error processing lesson {lesson.id}: {str(e)}")
+                        return None
+            
+            batch_size = quiz_config.QUIZ_GENERATION_BATCH_SIZE
+            for start in range(0, len(lessons), batch_size):
+                batch = lessons[start:start + batch_size]
+                results = await asyncio.gather(*(process_lesson(lesson) for lesson in batch))
+                
+                generated = {}
+                skipped = 0
+                for lesson, result in zip(batch, results):
+                    if not result:
+                        QUIZ_LESSONS_FAILED.inc()
+                        logger.warning(f"⚠️ Failed to generate quiz for lesson {lesson.id}: {lesson.title}")
+                    elif result.get("skipped"):
+                        skipped += 1
+                    else:
+                        generated[lesson.id] = (result["quiz_id"], result["pdf_fingerprint"])
+                QUIZ_LESSONS_SKIPPED.inc(skipped)
+                
+                # Update the whole batch (overwrites existing quiz_ids if present)
+                async with AsyncSessionLocal() as db:
+                    stored = await self.update_lessons_quiz_ids(db, generated)
+                if stored:
+                    QUIZ_LESSONS_GENERATED.inc(len(generated))
+                    logger.info(f"✅ Stored {len(generated)}/{len(batch)} quiz_ids for lessons {start + 1}-{start + len(batch)} ({skipped} unchanged)")
+                    print(f"✅ Batch done: {len(generated)} generated, {skipped} unchanged PDFs skipped")
+                else:
+                    QUIZ_LESSONS_FAILED.inc(len(generated))
+                    logger.error(f"❌ Failed to update batch of {len(generated)} lessons in database")
                 
         except Exception as e:
-            logger.error(f"Error in process_lessons_for_quiz_generation: {str(e)}")
+            logger.error(f"Error in quiz generation process: {str(e)}")
     
     async def start_background_task(self):
         """Start the background task that runs every 3 minutes"""
@@ -230,14 +372,14 @@ class QuizBackgroundService:
             logger.info("Background quiz generation task stopped")
             print("🛑 Background quiz generation task stopped")
     
-    async def process_now(self):
+    async def process_now(self, force: bool = False):
         """Process lessons immediately (for manual trigger)"""
         if self.is_running:
             logger.warning("Background task is already running, skipping manual process")
             return False
             
         try:
-            await self.process_lessons_for_quiz_generation()
+            await self.process_lessons_for_quiz_generation(force=force)
             return True
         except Exception as e:
             logger.error(f"Error in manual process: {str(e)}")
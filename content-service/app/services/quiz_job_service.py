@@ -0,0 +1,175 @@
+# app/services/quiz_job_service.py
+import asyncio
+import json
+import logging
+import os
+from typing import Optional, List, Set
+from uuid import UUID
+
+import httpx
+from sqlalchemy import update
+
+from app.core.quiz_config import quiz_config
+from app.crud.exam import r
+from app.crud.quiz_generation_job import (
+    update_quiz_job, fail_interrupted_quiz_jobs, fail_quiz_jobs, touch_quiz_jobs
+)
+from app.db.session import AsyncSessionLocal
+from app.models.lesson import Lesson
+from app.services.catalog_cache import catalog_cache
+
+logger = logging.getLogger(__name__)
+
+QUIZ_JOB_WORKERS = int(os.getenv("QUIZ_JOB_WORKERS", "2"))
+QUIZ_JOB_QUEUE_SIZE = int(os.getenv("QUIZ_JOB_QUEUE_SIZE", "20"))
+QUIZ_JOB_STALE_MINUTES = int(os.getenv("QUIZ_JOB_STALE_MINUTES", "15"))
+# Heartbeat for owned jobs and stale sweep; must stay well under QUIZ_JOB_STALE_MINUTES
+QUIZ_JOB_SWEEP_SECONDS = float(os.getenv("QUIZ_JOB_SWEEP_SECONDS", "120"))
+
+
+class QuizJobQueueFull(Exception):
+    pass
+
+
+def _remove_file(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+class QuizJobService:
+    """
+    Runs quiz generation for uploaded lesson PDFs outside the HTTP request.
+    The upload endpoint persists a job row and hands the spooled PDF's temp file
+    path to this in-process queue (the PDF itself is never held in memory);
+    workers stream the file to the agent service, delete it, store the
+    resulting quiz_json on the lesson and record progress on the job row.
+
+    Jobs queued or running here can't be resumed elsewhere: stop() fails them,
+    and a sweeper heartbeats them while periodically failing jobs that other
+    (crashed) processes left without updates for QUIZ_JOB_STALE_MINUTES.
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._client: Optional[httpx.AsyncClient] = None
+        self._sweeper: Optional[asyncio.Task] = None
+        # Unfinished jobs owned by this process (queued or running)
+        self._owned: Set[UUID] = set()
+
+    async def start(self):
+        if self._workers:
+            return
+        await self._sweep()
+
+        self._queue = asyncio.Queue(maxsize=QUIZ_JOB_QUEUE_SIZE)
+        self._client = httpx.AsyncClient(timeout=quiz_config.HTTP_TIMEOUT_SECONDS)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(QUIZ_JOB_WORKERS)]
+        self._sweeper = asyncio.create_task(self._sweep_periodically())
+
+    async def stop(self):
+        interrupted = set(self._owned)
+        tasks = self._workers + ([self._sweeper] if self._sweeper else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._sweeper = None
+        while self._queue is not None and not self._queue.empty():
+            _remove_file(self._queue.get_nowait()[2])
+        self._owned.clear()
+        if interrupted:
+            try:
+                async with AsyncSessionLocal() as db:
+                    failed = await fail_quiz_jobs(
+                        db, interrupted, "Interrupted by a service shutdown, please upload the PDF again"
+                    )
+                logger.warning(f"Marked {failed} quiz generation jobs interrupted by shutdown as failed")
+            except Exception as e:
+                logger.error(f"Could not fail quiz generation jobs on shutdown: {str(e)}")
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _sweep(self):
+        async with AsyncSessionLocal() as db:
+            await touch_quiz_jobs(db, self._owned)
+            interrupted = await fail_interrupted_quiz_jobs(db, QUIZ_JOB_STALE_MINUTES)
+        if interrupted:
+            logger.warning(f"Marked {interrupted} interrupted quiz generation jobs as failed")
+
+    async def _sweep_periodically(self):
+        while True:
+            await asyncio.sleep(QUIZ_JOB_SWEEP_SECONDS)
+            try:
+                await self._sweep()
+            except Exception as e:
+                logger.error(f"Quiz job sweep failed: {str(e)}")
+
+    def enqueue(self, job_id: UUID, lesson_id: UUID, pdf_path: str, filename: str, content_type: str):
+        """Queue a job; on success the worker owns (and deletes) the file at pdf_path"""
+        if self._queue is None:
+            raise QuizJobQueueFull("Quiz job workers are not running")
+        try:
+            self._queue.put_nowait((job_id, lesson_id, pdf_path, filename, content_type))
+        except asyncio.QueueFull:
+            raise QuizJobQueueFull("Too many quiz generation jobs in progress")
+        self._owned.add(job_id)
+
+    async def _set_status(self, job_id: UUID, **fields):
+        async with AsyncSessionLocal() as db:
+            await update_quiz_job(db, job_id, **fields)
+
+    async def _worker(self):
+        while True:
+            job_id, lesson_id, pdf_path, filename, content_type = await self._queue.get()
+            try:
+                await self._run_job(job_id, lesson_id, pdf_path, filename, content_type)
+            except Exception as e:
+                logger.error(f"Quiz generation job {job_id} failed: {str(e)}")
+                await self._set_status(job_id, status="failed", error=str(e), message="Quiz generation failed")
+            finally:
+                # stop() takes its snapshot of owned jobs before cancelling workers
+                self._owned.discard(job_id)
+                _remove_file(pdf_path)
+                self._queue.task_done()
+
+    async def _run_job(self, job_id: UUID, lesson_id: UUID, pdf_path: str, filename: str, content_type: str):
+        await self._set_status(job_id, status="running", progress=10, message="Sending PDF to the quiz agent")
+
+        # httpx reads the file object in chunks while sending the multipart body
+        with open(pdf_path, "rb") as pdf_file:
+            response = await self._client.post(
+                quiz_config.QUIZ_MICROSERVICE_URL,
+                files={"pdf": (filename, pdf_file, content_type)}
+            )
+        if response.status_code != 200:
+            raise Exception(f"Agent failed to process PDF: {response.status_code} - {response.text}")
+
+        quiz_id = response.json().get("quizId")
+        if not quiz_id:
+            raise Exception("Agent returned no quizId")
+
+        await self._set_status(job_id, progress=70, quiz_id=quiz_id, message="Fetching generated quiz")
+
+        # Fetch quiz JSON from Redis
+        quiz_data = await r.get(quiz_id)
+        if not quiz_data:
+            raise Exception(f"Quiz {quiz_id} not found in Redis")
+        quiz_json = json.loads(quiz_data)
+
+        # Save quiz JSON in Lesson table and finish the job in one transaction
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Lesson).where(Lesson.id == lesson_id).values(quiz_json=quiz_json, quiz_id=quiz_id)
+            )
+            await update_quiz_job(db, job_id, status="completed", progress=100, message="Quiz stored on lesson")
+        await catalog_cache.bump()
+
+        logger.info(f"Quiz generation job {job_id} completed for lesson {lesson_id} (quiz {quiz_id})")
+
+
+# Global instance
+quiz_job_service = QuizJobService()
@@ -0,0 +1,262 @@
+# app/services/resolution_scoring.py
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import httpx
+
+from app.core.resolution_config import resolution_config
+
+logger = logging.getLogger(__name__)
+
+MODEL_PATH = Path(__file__).resolve().parent.parent / "model" / "all-MiniLM-L6-v2"
+
+
+class ResolutionScoringService:
+    """
+    Scores student resolution answers against model answers by embedding similarity.
+
+    Concurrent requests are collected for a few milliseconds and encoded in one
+    batched call on a dedicated worker thread, and model-answer embeddings are
+    kept in an LRU cache keyed by text hash since every student is compared
+    against the same model answer.
+
+    The model (and sentence_transformers itself) is loaded on first use, on
+    the encoder thread, so workers that never score a resolution never pay for it.
+    """
+
+    def __init__(self):
+        self.model = None
+        self._model_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="resolution-encoder")
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._answer_cache: "OrderedDict[str, object]" = OrderedDict()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.model is not None
+
+    def _get_model(self):
+        """Load the model once; runs on the encoder thread"""
+        if self.model is None:
+            with self._model_lock:
+                if self.model is None:
+                    from sentence_transformers import SentenceTransformer
+
+                    start_time = time.time()
+                    self.model = SentenceTransformer(str(MODEL_PATH))
+                    logger.info(f"Loaded resolution model in {round(time.time() - start_time, 2)}s")
+        return self.model
+
+    def _encode(self, texts: List[str]):
+        return self._get_model().encode(texts, convert_to_tensor=True, batch_size=len(texts))
+
+    @staticmethod
+    def _similarities(model_embeddings, student_embeddings) -> List[float]:
+        """Pairwise cosine similarities; runs on the encoder thread"""
+        from sentence_transformers import util
+
+        return [
+            util.cos_sim(emb_model, emb_student).item()
+            for emb_model, emb_student in zip(model_embeddings, student_embeddings)
+        ]
+
+    async def _similarities_now(self, model_embeddings, student_embeddings) -> List[float]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._similarities, model_embeddings, student_embeddings)
+
+    async def warm_up(self):
+        """Load the model in the background without blocking the event loop"""
+        try:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._executor, self._get_model)
+        except Exception as e:
+            logger.error(f"Resolution model warm-up failed: {str(e)}")
+
+    async def _encode_now(self, texts: List[str]):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._encode, texts)
+
+    def _ensure_batcher(self) -> asyncio.Queue:
+        if self._batcher is None or self._batcher.done():
+            self._queue = asyncio.Queue()
+            self._batcher = asyncio.create_task(self._batch_loop())
+        return self._queue
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        window = resolution_config.BATCH_WINDOW_MS / 1000
+
+        while True:
+            batch: List[Tuple[str, asyncio.Future]] = [await self._queue.get()]
+            deadline = loop.time() + window
+
+            while len(batch) < resolution_config.MAX_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                embeddings = await self._encode_now([text for text, _ in batch])
+            except Exception as e:
+                logger.error(f"Resolution batch encoding failed: {str(e)}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+
+    async def encode(self, text: str):
+        """Encode one text through the micro-batching queue"""
+        queue = self._ensure_batcher()
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((text, future))
+        return await future
+
+    @staticmethod
+    def _text_key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _cache_answer(self, key: str, embedding) -> None:
+        self._answer_cache[key] = embedding
+        self._answer_cache.move_to_end(key)
+        while len(self._answer_cache) > resolution_config.MODEL_ANSWER_CACHE_SIZE:
+            self._answer_cache.popitem(last=False)
+
+    async def get_model_answer_embedding(self, model_answer: str):
+        """Model-answer embedding from the LRU cache, encoded on a miss"""
+        key = self._text_key(model_answer)
+        embedding = self._answer_cache.get(key)
+        if embedding is not None:
+            self._answer_cache.move_to_end(key)
+            return embedding
+
+        embedding = await self.encode(model_answer)
+        self._cache_answer(key, embedding)
+        return embedding
+
+    async def score(self, student_answer: str, model_answer: str) -> float:
+        """Cosine similarity between a student answer and its model answer"""
+        emb_model, emb_student = await asyncio.gather(
+            self.get_model_answer_embedding(model_answer),
+            self.encode(student_answer)
+        )
+        similarities = await self._similarities_now([emb_model], [emb_student])
+        return similarities[0]
+
+    async def score_many(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        """
+        Score many (student_answer, model_answer) pairs at once.
+        Pairs are scored MAX_BATCH_SIZE at a time: each chunk's uncached model
+        answers and student answers are encoded in one batched call each, and
+        other callers' batches get the encoder thread between chunks.
+        """
+        similarities = []
+        for start in range(0, len(pairs), resolution_config.MAX_BATCH_SIZE):
+            similarities.extend(await self._score_chunk(pairs[start:start + resolution_config.MAX_BATCH_SIZE]))
+        return similarities
+
+    async def _score_chunk(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        # Encode the model answers missing from the cache in one call
+        resolved = {}
+        missing = {}
+        for _, model_answer in pairs:
+            key = self._text_key(model_answer)
+            if key in resolved or key in missing:
+                continue
+            embedding = self._answer_cache.get(key)
+            if embedding is not None:
+                resolved[key] = embedding
+            else:
+                missing[key] = model_answer
+        if missing:
+            embeddings = await self._encode_now(list(missing.values()))
+            for key, embedding in zip(missing.keys(), embeddings):
+                self._cache_answer(key, embedding)
+                resolved[key] = embedding
+
+        model_embeddings = [resolved[self._text_key(m)] for _, m in pairs]
+        student_embeddings = await self._encode_now([s for s, _ in pairs])
+
+        return await self._similarities_now(model_embeddings, student_embeddings)
+
+    async def shutdown(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+            self._batcher = None
+        self._executor.shutdown(wait=False)
+
+
+class RemoteResolutionScoringService:
+    """
+    Delegates scoring to a shared local scoring process (app.scoring_server),
+    so several uvicorn workers share one loaded model.
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return True
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=resolution_config.SCORER_TIMEOUT_SECONDS
+            )
+        return self._client
+
+    async def warm_up(self):
+        try:
+            await self._get_client().post("/warmup")
+        except Exception as e:
+            logger.error(f"Resolution scoring process warm-up failed: {str(e)}")
+
+    async def score(self, student_answer: str, model_answer: str) -> float:
+        response = await self._get_client().post(
+            "/score",
+            json={"studentAnswer": student_answer, "modelAnswer": model_answer}
+        )
+        response.raise_for_status()
+        return response.json()["similarity"]
+
+    async def score_many(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        if not pairs:
+            return []
+        response = await self._get_client().post(
+            "/score-many",
+            json={"pairs": [{"studentAnswer": s, "modelAnswer": m} for s, m in pairs]}
+        )
+        response.raise_for_status()
+        return response.json()["similarities"]
+
+    async def shutdown(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def create_resolution_scoring_service():
+    if resolution_config.SCORER_URL:
+        return RemoteResolutionScoringService(resolution_config.SCORER_URL)
+    return ResolutionScoringService()
+
+
+resolution_scoring_service = create_resolution_scoring_service()
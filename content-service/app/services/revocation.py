@@ -0,0 +1,74 @@
+# app/services/revocation.py
+import os
+import time
+from typing import List, Optional, Tuple
+
+import jwt
+
+from app.services.revocation_filter import RevocationFilter
+
+# Same signing key as the auth service; sync calls use a short-lived "service" token
+SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key")
+ALGORITHM = "HS256"
+REVOCATIONS_URL = os.getenv("AUTH_SERVICE_URL", "http://localhost:8001") + "/api/v1/revocations"
+
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.01"))
+REVOCATION_RECENT_SIZE = int(os.getenv("REVOCATION_RECENT_SIZE", "10000"))
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", "5"))
+REVOCATION_REBUILD_SECONDS = float(os.getenv("REVOCATION_REBUILD_SECONDS", "3600"))
+# Re-read on every sync: ids are allocated before commit and can become visible out of order
+REVOCATION_SYNC_OVERLAP_IDS = int(os.getenv("REVOCATION_SYNC_OVERLAP_IDS", "1000"))
+# Must not exceed the auth service's SERVICE_TOKEN_EXPIRE_SECONDS, which caps exp - iat
+SERVICE_TOKEN_EXPIRE_SECONDS = int(os.getenv("SERVICE_TOKEN_EXPIRE_SECONDS", "60"))
+
+
+# =================== SYNC FROM AUTH SERVICE ===================
+
+_service_token: Optional[Tuple[float, str]] = None
+
+def _service_headers() -> dict:
+    """Bearer header with a service token, re-minted shortly before it expires"""
+    global _service_token
+    now = time.time()
+    if _service_token is None or _service_token[0] - SERVICE_TOKEN_EXPIRE_SECONDS / 6 <= now:
+        issued_at = int(now)
+        expires_at = issued_at + SERVICE_TOKEN_EXPIRE_SECONDS
+        token = jwt.encode(
+            {"sub": "content-service", "token_type": "service", "iat": issued_at, "exp": expires_at},
+            SECRET_KEY,
+            algorithm=ALGORITHM,
+        )
+        _service_token = (expires_at, token)
+    return {"Authorization": f"Bearer {_service_token[1]}"}
+
+async def load_revocations(since: int, limit: int = 1000) -> Tuple[List[Tuple[int, str]], bool]:
+    # Imported here: app.dependencies.auth imports this module
+    from app.dependencies.auth import get_auth_client
+
+    response = await get_auth_client().get(
+        REVOCATIONS_URL, params={"since": since, "limit": limit}, headers=_service_headers()
+    )
+    response.raise_for_status()
+    body = response.json()
+    rows = [(item["id"], item["jti"]) for item in body["revocations"]]
+    return rows, body["has_more"]
+
+async def confirm_revocation(jti: str) -> bool:
+    from app.dependencies.auth import get_auth_client
+
+    response = await get_auth_client().get(f"{REVOCATIONS_URL}/{jti}", headers=_service_headers())
+    response.raise_for_status()
+    return response.json()["revoked"]
+
+
+revocation_filter = RevocationFilter(
+    load=load_revocations,
+    confirm=confirm_revocation,
+    capacity=REVOCATION_BLOOM_CAPACITY,
+    error_rate=REVOCATION_BLOOM_ERROR_RATE,
+    recent_size=REVOCATION_RECENT_SIZE,
+    sync_interval=REVOCATION_SYNC_SECONDS,
+    rebuild_interval=REVOCATION_REBUILD_SECONDS,
+    sync_overlap=REVOCATION_SYNC_OVERLAP_IDS,
+)
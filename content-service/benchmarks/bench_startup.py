@@ -0,0 +1,119 @@
+"""
+Startup benchmark: time from process start to the first successful /health.
+
+Launches the content-service in a fresh uvicorn process per run, polls
+/health until it answers 200, and records the elapsed time and the worker's
+resident memory at that point. Modes:
+- "eager":      the model loaded at import time, as resolution.py used to do
+                (reproduced by loading it before uvicorn starts)
+- "lazy":       RESOLUTION_MODEL_LOADING=lazy, loaded on the first scoring call
+- "background": RESOLUTION_MODEL_LOADING=background, loaded after serving starts
+- "remote":     RESOLUTION_SCORER_URL set, the model lives in app.scoring_server
+
+Needs the service's full requirements and the model in app/model/.
+
+    cd content-service
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+
+EAGER_LAUNCHER = """
+import uvicorn
+from app.services.resolution_scoring import resolution_scoring_service
+resolution_scoring_service._get_model()
+uvicorn.run("app.main:app", host="127.0.0.1", port={port}, log_level="warning")
+"""
+
+MODES = {
+    "eager": {"RESOLUTION_MODEL_LOADING": "lazy"},
+    "lazy": {"RESOLUTION_MODEL_LOADING": "lazy"},
+    "background": {"RESOLUTION_MODEL_LOADING": "background"},
+    # Nothing has to listen there for /health to answer
+    "remote": {"RESOLUTION_SCORER_URL": "http://127.0.0.1:9"},
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def rss_mb(pid: int) -> float:
+    """Resident memory of a process, from /proc (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def command(mode: str, port: int):
+    if mode == "eager":
+        return [sys.executable, "-c", EAGER_LAUNCHER.format(port=port)]
+    return [sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+
+
+def time_to_first_health(mode: str, timeout: float):
+    port = free_port()
+    env = {**os.environ, **MODES[mode]}
+    if mode != "remote":
+        env.pop("RESOLUTION_SCORER_URL", None)
+
+    started = time.perf_counter()
+    process = subprocess.Popen(command(mode, port), cwd=SERVICE_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"{mode}: exited with {process.returncode}\n"
+                                   f"{process.stderr.read().decode(errors='replace')[-2000:]}")
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1.0).status_code == 200:
+                    return time.perf_counter() - started, rss_mb(process.pid)
+            except httpx.TransportError:
+                pass
+            time.sleep(0.02)
+        raise RuntimeError(f"{mode}: no /health answer within {timeout}s")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main(args):
+    print(f"{args.runs} runs per mode")
+    print(f"{'mode':<11} {'median s':>9} {'min s':>7} {'max s':>7} {'RSS MB':>8}")
+    for mode in args.modes:
+        timings, memory = [], []
+        for _ in range(args.runs):
+            elapsed, rss = time_to_first_health(mode, args.timeout)
+            timings.append(elapsed)
+            memory.append(rss)
+        print(f"{mode:<11} {statistics.median(timings):>9.2f} {min(timings):>7.2f} "
+              f"{max(timings):>7.2f} {statistics.median(memory):>8.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    main(parser.parse_args())
@@ -0,0 +1,9 @@
+-- Track which PDF version each lesson's quiz was generated from,
+-- so the quiz background job only regenerates quizzes for changed PDFs
+ALTER TABLE public.lesson
+ADD COLUMN IF NOT EXISTS pdf_fingerprint VARCHAR;
+
+-- Verify the change
+SELECT id, title, pdf, quiz_id, pdf_fingerprint
+FROM public.lesson
+LIMIT 5;
@@ -0,0 +1,14 @@
+-- Persisted quiz generation jobs created by /lessonfiles/upload-and-create
+CREATE TABLE IF NOT EXISTS public.quiz_generation_job (
+    id UUID PRIMARY KEY,
+    lesson_id UUID NOT NULL REFERENCES public.lesson(id) ON DELETE CASCADE,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    progress INTEGER NOT NULL DEFAULT 0,
+    message VARCHAR(255),
+    error TEXT,
+    quiz_id VARCHAR,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_quiz_generation_job_lesson_id ON public.quiz_generation_job(lesson_id);
@@ -0,0 +1,102 @@
+# tests/test_semester_progress_queries.py
+"""
+Query-count regression tests for the semester progression engine: every
+progress endpoint must issue a constant number of statements, with the
+grouped semester query run once, however many modules exist.
+"""
+import uuid
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.deps import get_current_user
+from app.crud.crud_user_progress import get_user_dashboard_progress
+from app.db.query_stats import assert_max_queries, sql_instrumentation_middleware, track_queries
+from app.db.session import get_db
+from app.models.module import Module
+from app.models.user_progress import UserProgress
+from app.routers import users_progress
+from app.schemas.user import CurrentUser
+
+USER_ID = 42
+SEMESTERS = ["S1", "S2", "S3", "S4"]
+
+
+async def seed(session_factory, modules_per_semester: int):
+    """Modules in every semester; the user has completed all of S1 and one S2 module"""
+    async with session_factory() as db:
+        order = 0
+        for semester in SEMESTERS:
+            for index in range(modules_per_semester):
+                order += 1
+                module = Module(
+                    id=uuid.uuid4(),
+                    title=f"{semester} module {index}",
+                    code=f"{semester}-{index}",
+                    semester=semester,
+                    order=order,
+                )
+                db.add(module)
+                if semester == "S1" or (semester == "S2" and index == 0):
+                    db.add(UserProgress(
+                        external_user_id=USER_ID,
+                        module_id=module.id,
+                        is_module_unlocked=True,
+                        is_module_completed=True,
+                        progress_percentage=100,
+                    ))
+        await db.commit()
+
+
+@pytest.fixture
+def client(session_factory):
+    app = FastAPI()
+    app.middleware("http")(sql_instrumentation_middleware)
+    app.include_router(users_progress.router)
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: CurrentUser(id=USER_ID, email="student@example.com")
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def grouped_semester_queries(stats) -> int:
+    return sum(n for shape, n in stats.shapes.items() if "GROUP BY module.semester" in shape)
+
+
+@pytest.mark.parametrize("modules_per_semester", [2, 25])
+async def test_dashboard_runs_grouped_query_once(session_factory, modules_per_semester):
+    await seed(session_factory, modules_per_semester)
+
+    async with session_factory() as db:
+        with track_queries() as stats:
+            dashboard = await get_user_dashboard_progress(db, USER_ID)
+
+    assert grouped_semester_queries(stats) == 1
+    # progress rows, their modules (selectinload) and the grouped semester query
+    assert stats.count == 3
+    assert dashboard["current_semester"] == "S2"
+    assert dashboard["semester_stats"]["S1"]["is_completed"] is True
+    assert dashboard["semester_stats"]["S2"]["completed_modules"] == 1
+    assert dashboard["semester_stats"]["S2"]["total_modules"] == modules_per_semester
+    assert dashboard["semester_stats"]["S3"]["is_accessible"] is False
+
+
+@pytest.mark.parametrize("path, max_queries", [
+    ("/userprogress/dashboard/progress", 3),
+    ("/userprogress/stats", 3),
+    ("/userprogress/modulesProgress", 2),
+])
+@pytest.mark.parametrize("modules_per_semester", [2, 25])
+async def test_progress_endpoints_query_count_is_constant(client, session_factory, path, max_queries, modules_per_semester):
+    await seed(session_factory, modules_per_semester)
+
+    async with client:
+        response = await client.get(path)
+
+    assert response.status_code == 200, response.text
+    assert_max_queries(response, max_queries)
@@ -0,0 +1,170 @@
+# revocation_filter.py
+"""
+In-memory revoked-token filter shared by the auth and content services.
+Each service supplies its own loader/confirmer (database or HTTP).
+"""
+import asyncio
+import hashlib
+import logging
+import math
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MASK_64 = (1 << 64) - 1
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over jti strings (double hashing on a 128-bit digest)"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, jti: str):
+        try:
+            digest = int(jti, 16)  # our jtis are uuid4 hex: already uniformly random
+        except ValueError:
+            digest = int.from_bytes(hashlib.blake2b(jti.encode(), digest_size=16).digest(), "big")
+        h1 = digest & _MASK_64
+        h2 = (digest >> 64) | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hash_count)]
+
+    def add(self, jti: str):
+        bits = self._bits
+        for position in self._positions(jti):
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, jti: str) -> bool:
+        bits = self._bits
+        for position in self._positions(jti):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+# load(since) -> ([(id, jti), ...], has_more) ; confirm(jti) -> revoked?
+Loader = Callable[[int], Awaitable[Tuple[List[Tuple[int, str]], bool]]]
+Confirmer = Callable[[str], Awaitable[bool]]
+
+
+class RevocationFilter:
+    """
+    In-memory view of revoked token ids.
+
+    A Bloom filter holds every unexpired revocation and a small exact set holds
+    the most recent ones. A jti absent from the filter is answered "not revoked"
+    without I/O; the rare filter hit that is not in the recent set is confirmed
+    against the source of truth and memoized. New revocations are pulled
+    incrementally by id, and the filter is rebuilt periodically so expired
+    entries fall out.
+
+    Ids come from a sequence and are allocated before commit, so a lower id can
+    become visible after a higher one. Each sync therefore re-reads the last
+    sync_overlap ids as well; rows already seen are skipped.
+    """
+
+    def __init__(self, load: Loader, confirm: Confirmer, capacity: int, error_rate: float,
+                 recent_size: int, sync_interval: float, rebuild_interval: float,
+                 sync_overlap: int = 1000):
+        self._load = load
+        self._confirm = confirm
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.recent_size = recent_size
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self.sync_overlap = sync_overlap
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+        self._confirmed: "OrderedDict[str, bool]" = OrderedDict()
+        self._last_id = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, jti: str):
+        """Record a revocation made (or pulled) by this process"""
+        self._bloom.add(jti)
+        self._recent[jti] = None
+        self._recent.move_to_end(jti)
+        while len(self._recent) > self.recent_size:
+            self._recent.popitem(last=False)
+        self._confirmed.pop(jti, None)
+
+    async def is_revoked(self, jti: Optional[str]) -> bool:
+        if not jti:
+            return False  # tokens issued before jti was introduced cannot be revoked
+        if jti not in self._bloom:
+            return False
+        if jti in self._recent:
+            return True
+        cached = self._confirmed.get(jti)
+        if cached is not None:
+            return cached
+        try:
+            revoked = await self._confirm(jti)
+        except Exception as e:
+            logger.warning(f"Could not confirm revocation of {jti}, treating as revoked: {str(e)}")
+            return True
+        self._confirmed[jti] = revoked
+        while len(self._confirmed) > self.recent_size:
+            self._confirmed.popitem(last=False)
+        return revoked
+
+    async def _pull(self, bloom: BloomFilter, since: int) -> int:
+        while True:
+            rows, has_more = await self._load(since)
+            for revocation_id, jti in rows:
+                if bloom is self._bloom:
+                    if jti not in self._recent:
+                        self.add(jti)
+                else:
+                    bloom.add(jti)
+                since = max(since, revocation_id)
+            if not has_more:
+                return since
+
+    async def sync(self):
+        """Pull revocations newer than the last one seen, re-reading the overlap window"""
+        since = max(0, self._last_id - self.sync_overlap)
+        self._last_id = max(self._last_id, await self._pull(self._bloom, since))
+
+    async def rebuild(self):
+        """Reload every unexpired revocation into a fresh filter and swap it in"""
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        last_id = await self._pull(bloom, 0)
+        # Anything revoked locally meanwhile is still in the recent set
+        for jti in self._recent:
+            bloom.add(jti)
+        self._bloom = bloom
+        self._last_id = max(self._last_id, last_id)
+        self._confirmed.clear()
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_rebuild = 0.0
+        while True:
+            try:
+                if loop.time() >= next_rebuild:
+                    await self.rebuild()
+                    next_rebuild = loop.time() + self.rebuild_interval
+                else:
+                    await self.sync()
+            except Exception as e:
+                logger.warning(f"Revocation sync failed: {str(e)}")
+            await asyncio.sleep(self.sync_interval)
@@ -0,0 +1,67 @@
+"""
+Copy the shared modules into each service that uses them.
+
+Every service is built from its own directory (see the Dockerfiles), so code
+shared between services is vendored rather than imported from here. Edit the
+file in shared/, then run:
+
+    python shared/sync.py          # rewrite the vendored copies
+    python shared/sync.py --check  # fail if a copy has drifted
+"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SHARED = ROOT / "shared"
+
+# shared module -> vendored copies (relative to the repo root)
+VENDORED = {
+    "http_metrics.py": [
+        "api-gateway/app/core/http_metrics.py",
+        "auth-service/app/core/http_metrics.py",
+        "content-service/app/core/http_metrics.py",
+    ],
+    "pool_metrics.py": [
+        "auth-service/db/metrics.py",
+        "content-service/app/db/metrics.py",
+    ],
+    "revocation_filter.py": [
+        "auth-service/app/services/revocation_filter.py",
+        "content-service/app/services/revocation_filter.py",
+    ],
+}
+
+
+def render(source: str, target: str) -> str:
+    """The shared file with its path comment replaced by a vendoring notice"""
+    body = (SHARED / source).read_text(encoding="utf-8").split("\n", 1)[1]
+    relative = target.split("/", 1)[1]
+    return (
+        f"# {relative}\n"
+        f"# Vendored from shared/{source}: edit it there and run `python shared/sync.py`\n"
+        f"{body}"
+    )
+
+
+def main(check: bool) -> int:
+    stale = []
+    for source, targets in VENDORED.items():
+        for target in targets:
+            expected = render(source, target)
+            path = ROOT / target
+            current = path.read_text(encoding="utf-8") if path.exists() else None
+            if current == expected:
+                continue
+            if check:
+                stale.append(target)
+            else:
+                with open(path, "w", encoding="utf-8", newline="\n") as f:
+                    f.write(expected)
+                print(f"✅ {target}")
+    for target in stale:
+        print(f"❌ {target} differs from shared/; run python shared/sync.py")
+    return 1 if stale else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main("--check" in sys.argv[1:]))